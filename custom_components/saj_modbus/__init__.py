@@ -1,20 +1,63 @@
 """The SAJ Modbus Integration."""
 import logging
+from typing import Optional
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT, CONF_SCAN_INTERVAL
 
 from .hub import SAJModbusHub
-from .const import DOMAIN, ATTR_MANUFACTURER, DEFAULT_SCAN_INTERVAL
+from .modbus_gateway import ModbusGateway
+from .services import async_setup_services
+from .identity_store import get_identity_store
+from .snapshot_store import SnapshotStore
+from .const import (
+    DOMAIN,
+    ATTR_MANUFACTURER,
+    CONF_ADAPTIVE_SCAN,
+    CONF_AGGREGATE_WINDOW,
+    CONF_CONNECTION_MODE,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_IDLE_TIMEOUT,
+    CONF_INVERTER_MODEL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_PIPELINED_READS,
+    CONF_SLOW_SCAN_INTERVAL,
+    CONF_MAX_REGISTER_GAP,
+    CONF_UNIT_ID,
+    DEFAULT_ADAPTIVE_SCAN,
+    DEFAULT_AGGREGATE_WINDOW,
+    DEFAULT_CONNECTION_MODE,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_MAX_REGISTER_GAP,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_PIPELINED_READS,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    DEFAULT_UNIT_ID,
+    MODEL_AUTO,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS = ["sensor", "switch", "number", "text"]
+PLATFORMS = ["sensor", "binary_sensor", "switch", "number", "text"]
+DATA_GATEWAYS = f"{DOMAIN}_gateways"
+
+# Unique ids of version 1 entries that were the same for every inverter; version 2 prefixes them with the name
+LEGACY_UNIQUE_IDS = {
+    "saj_first_charge_day_mask_input": "first_charge_day_mask_input",
+    "saj_first_charge_power_percent_input": "first_charge_power_percent_input",
+    "saj_first_charge_start_time_time": "first_charge_start_time_time",
+    "saj_first_charge_end_time_time": "first_charge_end_time_time",
+}
 
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the SAJ Modbus component."""
     hass.data.setdefault(DOMAIN, {})
+    async_setup_services(hass)
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -26,13 +69,37 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     hass.data[DOMAIN][entry.entry_id] = {
         "hub": hub,
-        "device_info": _create_device_info(entry)
+        "device_info": _create_device_info(entry, hub)
     }
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
 
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate an entry of an older version."""
+    if entry.version > 2:
+        # Written by a newer version of the integration
+        return False
+
+    if entry.version == 1:
+        # Version 1 identified an entry by its host only, version 2 by host, port and unit id
+        host = entry.data[CONF_HOST]
+        port = entry.data[CONF_PORT]
+        unit = entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)
+        name = entry.data[CONF_NAME]
+
+        @callback
+        def _migrate_unique_id(entity_entry: er.RegistryEntry) -> Optional[dict]:
+            key = LEGACY_UNIQUE_IDS.get(entity_entry.unique_id)
+            return {"new_unique_id": f"{name}_{key}"} if key is not None else None
+
+        await er.async_migrate_entries(hass, entry.entry_id, _migrate_unique_id)
+        hass.config_entries.async_update_entry(entry, unique_id=f"{host}:{port}:{unit}", version=2)
+        _LOGGER.info(f"Migrated SAJ Modbus entry {name} to version 2")
+
+    return True
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -41,30 +108,80 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN].pop(entry.entry_id)
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the stored data of a removed entry."""
+    await SnapshotStore(hass, entry.entry_id).async_remove()
+    await get_identity_store(hass).async_remove(
+        entry.data[CONF_HOST], entry.data[CONF_PORT], entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)
+    )
+
 async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Update options."""
     await hass.config_entries.async_reload(entry.entry_id)
 
+def _get_gateway(hass: HomeAssistant, host: str, port: int) -> ModbusGateway:
+    """Returns the gateway at host and port, shared by the hubs of all inverters behind it."""
+    gateways = hass.data.setdefault(DATA_GATEWAYS, {})
+    gateway = gateways.get((host, port))
+    if gateway is None or not gateway.units:
+        # The last hub closed the connection of the old one
+        gateway = gateways[(host, port)] = ModbusGateway(host, port)
+    return gateway
+
 async def _create_hub(hass: HomeAssistant, entry: ConfigEntry) -> SAJModbusHub:
     """Helper function to create the SAJ Modbus hub."""
+    hub = None
     try:
         hub = SAJModbusHub(
             hass,
             entry.data[CONF_NAME],
             entry.data[CONF_HOST],
             entry.data[CONF_PORT],
-            entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+            entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+            entry.data.get(CONF_MAX_REGISTER_GAP, DEFAULT_MAX_REGISTER_GAP),
+            entry.data.get(CONF_CONNECTION_MODE, DEFAULT_CONNECTION_MODE),
+            entry.data.get(CONF_IDLE_TIMEOUT, DEFAULT_IDLE_TIMEOUT),
+            entry.data.get(CONF_FAST_SCAN_INTERVAL),
+            entry.data.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL),
+            entry.data.get(CONF_INVERTER_MODEL, MODEL_AUTO),
+            entry.data.get(CONF_ADAPTIVE_SCAN, DEFAULT_ADAPTIVE_SCAN),
+            entry.data.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+            entry.data.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+            entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID),
+            _get_gateway(hass, entry.data[CONF_HOST], entry.data[CONF_PORT]),
+            entry.data.get(CONF_PIPELINED_READS, DEFAULT_PIPELINED_READS),
+            entry.data.get(CONF_AGGREGATE_WINDOW, DEFAULT_AGGREGATE_WINDOW),
         )
-        await hub.async_config_entry_first_refresh()
+        # Blocks whose sensors are all disabled are not read
+        entry.async_on_unload(hub.async_track_entity_registry(entry.entry_id))
+        # Serial number and versions come from the cache, the inverter is asked again only later
+        await hub.async_restore_identity()
+        if await hub.async_restore_snapshot(SnapshotStore(hass, entry.entry_id)):
+            # The entities start with the data of the last run, the inverter is read in the background
+            entry.async_create_background_task(hass, hub.async_refresh(), f"{DOMAIN} first refresh {entry.entry_id}")
+        else:
+            await hub.async_config_entry_first_refresh()
+        # The entities are created for the profile selected so far, another one needs a reload
+        entry.async_on_unload(hub.async_reload_on_profile_change(entry.entry_id))
         return hub
     except Exception as e:
         _LOGGER.error(f"Failed to set up SAJ Modbus hub: {e}")
+        if hub is not None:
+            # Frees the unit id at the gateway for the next attempt
+            await hub.close()
         return None
 
-def _create_device_info(entry: ConfigEntry) -> dict:
+def _create_device_info(entry: ConfigEntry, hub: SAJModbusHub) -> dict:
     """Create the device info for SAJ Modbus hub."""
-    return {
+    device_info = {
         "identifiers": {(DOMAIN, entry.data[CONF_NAME])},
         "name": entry.data[CONF_NAME],
-        "manufacturer": ATTR_MANUFACTURER
+        "manufacturer": ATTR_MANUFACTURER,
+        "model": hub.profile.title,
     }
+    serial = hub.inverter_data.get("sn")
+    if serial:
+        # The name stays an identifier so that existing devices keep their entities
+        device_info["identifiers"].add((DOMAIN, serial))
+        device_info["serial_number"] = serial
+    return device_info
@@ -0,0 +1,64 @@
+"""Binary sensor that shows whether the inverter reports a fault."""
+import logging
+from typing import Any, Dict, Optional
+
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .hub import SAJModbusHub
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
+    """Set up the fault binary sensor from a config entry."""
+    hub: SAJModbusHub = hass.data[DOMAIN][entry.entry_id]["hub"]
+    device_info = hass.data[DOMAIN][entry.entry_id]["device_info"]
+    async_add_entities([SajFaultBinarySensor(hub, device_info)])
+
+
+class SajFaultBinarySensor(CoordinatorEntity, BinarySensorEntity):
+    """On while at least one fault bit is set; the active faults are in the attributes."""
+
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+    _attr_icon = "mdi:alert-octagon-outline"
+
+    def __init__(self, hub: SAJModbusHub, device_info: dict) -> None:
+        super().__init__(coordinator=hub)
+        self._attr_device_info = device_info
+        self._attr_unique_id = f"{hub.name}_fault"
+        self._attr_name = f"{hub.name} Inverter Fault"
+        self._written_revision: Optional[int] = None
+        self._written_available: Optional[bool] = None
+
+    @property
+    def is_on(self) -> bool:
+        return bool(self.coordinator.faults.active)
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        return {
+            "faults": [
+                {"message": fault.message, "word": fault.word, "bit": fault.bit, "since": since.isoformat()}
+                for fault, since in self.coordinator.faults.active.items()
+            ],
+        }
+
+    @property
+    def available(self) -> bool:
+        return self.coordinator.last_update_success
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Writes the state only when a fault was raised or cleared, or the availability changed."""
+        revision = self.coordinator.faults.revision
+        available = self.available
+        if revision == self._written_revision and available == self._written_available:
+            return
+        self._written_revision = revision
+        self._written_available = available
+        self.async_write_ha_state()
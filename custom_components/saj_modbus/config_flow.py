@@ -6,8 +6,39 @@ from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT, CONF_SCAN_INTER
 from homeassistant.core import HomeAssistant, callback
 import logging
 
-from .const import DEFAULT_NAME, DEFAULT_PORT, DEFAULT_SCAN_INTERVAL, DOMAIN
+from .const import (
+    CONF_ADAPTIVE_SCAN,
+    CONF_AGGREGATE_WINDOW,
+    CONF_CONNECTION_MODE,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_IDLE_TIMEOUT,
+    CONF_INVERTER_MODEL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_PIPELINED_READS,
+    CONF_SLOW_SCAN_INTERVAL,
+    CONF_MAX_REGISTER_GAP,
+    CONF_UNIT_ID,
+    CONNECTION_MODES,
+    DEFAULT_ADAPTIVE_SCAN,
+    DEFAULT_AGGREGATE_WINDOW,
+    DEFAULT_CONNECTION_MODE,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_MAX_REGISTER_GAP,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_NAME,
+    DEFAULT_PIPELINED_READS,
+    DEFAULT_PORT,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    DEFAULT_UNIT_ID,
+    DOMAIN,
+    INVERTER_MODELS,
+    MODEL_AUTO,
+)
 from .hub import SAJModbusHub
+from .identity_store import get_identity_store
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,6 +46,7 @@ DATA_SCHEMA = vol.Schema({
     vol.Optional(CONF_NAME, default=DEFAULT_NAME): str,
     vol.Required(CONF_HOST): str,
     vol.Required(CONF_PORT, default=DEFAULT_PORT): int,
+    vol.Required(CONF_UNIT_ID, default=DEFAULT_UNIT_ID): vol.All(int, vol.Range(min=1, max=247)),
     vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): int,
 })
 
@@ -22,6 +54,17 @@ OPTIONS_SCHEMA = vol.Schema({
     vol.Required(CONF_HOST): str,
     vol.Required(CONF_PORT, default=DEFAULT_PORT): int,
     vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): int,
+    vol.Optional(CONF_MAX_REGISTER_GAP, default=DEFAULT_MAX_REGISTER_GAP): vol.All(int, vol.Range(min=0, max=100)),
+    vol.Optional(CONF_CONNECTION_MODE, default=DEFAULT_CONNECTION_MODE): vol.In(CONNECTION_MODES),
+    vol.Optional(CONF_IDLE_TIMEOUT, default=DEFAULT_IDLE_TIMEOUT): vol.All(int, vol.Range(min=10)),
+    vol.Optional(CONF_FAST_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): vol.All(int, vol.Range(min=1)),
+    vol.Optional(CONF_SLOW_SCAN_INTERVAL, default=DEFAULT_SLOW_SCAN_INTERVAL): vol.All(int, vol.Range(min=1)),
+    vol.Optional(CONF_INVERTER_MODEL, default=MODEL_AUTO): vol.In(INVERTER_MODELS),
+    vol.Optional(CONF_ADAPTIVE_SCAN, default=DEFAULT_ADAPTIVE_SCAN): bool,
+    vol.Optional(CONF_MIN_SCAN_INTERVAL, default=DEFAULT_MIN_SCAN_INTERVAL): vol.All(int, vol.Range(min=1)),
+    vol.Optional(CONF_MAX_SCAN_INTERVAL, default=DEFAULT_MAX_SCAN_INTERVAL): vol.All(int, vol.Range(min=1)),
+    vol.Optional(CONF_PIPELINED_READS, default=DEFAULT_PIPELINED_READS): bool,
+    vol.Optional(CONF_AGGREGATE_WINDOW, default=DEFAULT_AGGREGATE_WINDOW): vol.All(int, vol.Range(min=0, max=3600)),
 })
 
 ERROR_ALREADY_CONFIGURED = "already_configured"
@@ -38,17 +81,21 @@ def host_valid(host):
 
 @callback
 def saj_modbus_entries(hass: HomeAssistant):
-    """Return the hosts already configured."""
-    return {entry.data[CONF_HOST] for entry in hass.config_entries.async_entries(DOMAIN)}
+    """Return the host, port and unit id of the inverters already configured."""
+    return {
+        (entry.data[CONF_HOST], entry.data.get(CONF_PORT, DEFAULT_PORT), entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID))
+        for entry in hass.config_entries.async_entries(DOMAIN)
+    }
 
 class SAJModbusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """SAJ Modbus configflow."""
-    VERSION = 1
+    VERSION = 2
     CONNECTION_CLASS = config_entries.CONN_CLASS_LOCAL_POLL
 
-    def _host_in_configuration_exists(self, host) -> bool:
-        """Return True if host exists in configuration."""
-        return host in saj_modbus_entries(self.hass)
+    def _inverter_in_configuration_exists(self, host, port, unit) -> bool:
+        """Return True if the inverter at host, port and unit id exists in configuration."""
+        # Several inverters behind one gateway share host and port
+        return (host, port, unit) in saj_modbus_entries(self.hass)
 
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
@@ -56,13 +103,15 @@ class SAJModbusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             host = user_input[CONF_HOST]
+            port = user_input[CONF_PORT]
+            unit = user_input[CONF_UNIT_ID]
 
-            if self._host_in_configuration_exists(host):
-                errors[CONF_HOST] = ERROR_ALREADY_CONFIGURED
+            if self._inverter_in_configuration_exists(host, port, unit):
+                errors[CONF_UNIT_ID] = ERROR_ALREADY_CONFIGURED
             elif not host_valid(host):
                 errors[CONF_HOST] = ERROR_INVALID_HOST
             else:
-                await self.async_set_unique_id(host)
+                await self.async_set_unique_id(f"{host}:{port}:{unit}")
                 self._abort_if_unique_id_configured()
                 return self.async_create_entry(title=user_input[CONF_NAME], data=user_input)
 
@@ -84,28 +133,49 @@ class SAJModbusOptionsFlowHandler(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """Manage the options."""
+        errors = {}
         if user_input is not None:
-            try:
-                # Get the hub from the saved data
-                hub = self.hass.data[DOMAIN].get(self.config_entry.entry_id, {}).get("hub")
-
-                if hub is None:
-                    _LOGGER.error(f"Hub not found for entry_id: {self.config_entry.entry_id}")
-                    return self.async_abort(reason="hub_not_found")
-
-                # Update the hub configuration
-                await hub.update_connection_settings(user_input[CONF_HOST], user_input[CONF_PORT], user_input[CONF_SCAN_INTERVAL])
-
-                # Save the new options in the configuration entry
-                self.hass.config_entries.async_update_entry(
-                    self.config_entry,
-                    data={**self.config_entry.data, **user_input},
-                )
+            host = user_input[CONF_HOST]
+            port = user_input[CONF_PORT]
+            unit = self.config_entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)
+            moved = (host, port) != (self.config_entry.data[CONF_HOST], self.config_entry.data[CONF_PORT])
 
-                return self.async_create_entry(title="", data=user_input)
-            except Exception as e:
-                _LOGGER.error(f"Error updating SAJ Modbus configuration: {str(e)}")
-                return self.async_abort(reason="update_failed")
+            if moved and (host, port, unit) in saj_modbus_entries(self.hass):
+                errors[CONF_HOST] = ERROR_ALREADY_CONFIGURED
+            elif moved and not host_valid(host):
+                errors[CONF_HOST] = ERROR_INVALID_HOST
+            else:
+                try:
+                    # Get the hub from the saved data
+                    hub = self.hass.data[DOMAIN].get(self.config_entry.entry_id, {}).get("hub")
+
+                    if hub is None:
+                        _LOGGER.error(f"Hub not found for entry_id: {self.config_entry.entry_id}")
+                        return self.async_abort(reason="hub_not_found")
+
+                    if moved:
+                        # The hub belongs to the gateway at the old address; the reload of the entry
+                        # by its update listener creates it again at the gateway at the new one
+                        _LOGGER.info(f"Moving {hub.name} to {host}:{port}")
+                        # The identity cached for the old address is read again at the new one
+                        await get_identity_store(self.hass).async_remove(
+                            self.config_entry.data[CONF_HOST], self.config_entry.data[CONF_PORT], unit
+                        )
+                    else:
+                        # Update the hub configuration
+                        await hub.update_connection_settings(host, port, user_input[CONF_SCAN_INTERVAL])
+
+                    # Save the new options in the configuration entry, identified by the new address
+                    self.hass.config_entries.async_update_entry(
+                        self.config_entry,
+                        data={**self.config_entry.data, **user_input},
+                        unique_id=f"{host}:{port}:{unit}",
+                    )
+
+                    return self.async_create_entry(title="", data=user_input)
+                except Exception as e:
+                    _LOGGER.error(f"Error updating SAJ Modbus configuration: {str(e)}")
+                    return self.async_abort(reason="update_failed")
 
         # Show the options form
         return self.async_show_form(
@@ -114,5 +184,17 @@ class SAJModbusOptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Required(CONF_HOST, default=self.config_entry.data.get(CONF_HOST, '')): str,
                 vol.Required(CONF_PORT, default=self.config_entry.data.get(CONF_PORT, 502)): int,
                 vol.Optional(CONF_SCAN_INTERVAL, default=self.config_entry.data.get(CONF_SCAN_INTERVAL, 30)): int,
+                vol.Optional(CONF_MAX_REGISTER_GAP, default=self.config_entry.data.get(CONF_MAX_REGISTER_GAP, DEFAULT_MAX_REGISTER_GAP)): vol.All(int, vol.Range(min=0, max=100)),
+                vol.Optional(CONF_CONNECTION_MODE, default=self.config_entry.data.get(CONF_CONNECTION_MODE, DEFAULT_CONNECTION_MODE)): vol.In(CONNECTION_MODES),
+                vol.Optional(CONF_IDLE_TIMEOUT, default=self.config_entry.data.get(CONF_IDLE_TIMEOUT, DEFAULT_IDLE_TIMEOUT)): vol.All(int, vol.Range(min=10)),
+                vol.Optional(CONF_FAST_SCAN_INTERVAL, default=self.config_entry.data.get(CONF_FAST_SCAN_INTERVAL, self.config_entry.data.get(CONF_SCAN_INTERVAL, 30))): vol.All(int, vol.Range(min=1)),
+                vol.Optional(CONF_SLOW_SCAN_INTERVAL, default=self.config_entry.data.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL)): vol.All(int, vol.Range(min=1)),
+                vol.Optional(CONF_INVERTER_MODEL, default=self.config_entry.data.get(CONF_INVERTER_MODEL, MODEL_AUTO)): vol.In(INVERTER_MODELS),
+                vol.Optional(CONF_ADAPTIVE_SCAN, default=self.config_entry.data.get(CONF_ADAPTIVE_SCAN, DEFAULT_ADAPTIVE_SCAN)): bool,
+                vol.Optional(CONF_MIN_SCAN_INTERVAL, default=self.config_entry.data.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL)): vol.All(int, vol.Range(min=1)),
+                vol.Optional(CONF_MAX_SCAN_INTERVAL, default=self.config_entry.data.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)): vol.All(int, vol.Range(min=1)),
+                vol.Optional(CONF_PIPELINED_READS, default=self.config_entry.data.get(CONF_PIPELINED_READS, DEFAULT_PIPELINED_READS)): bool,
+                vol.Optional(CONF_AGGREGATE_WINDOW, default=self.config_entry.data.get(CONF_AGGREGATE_WINDOW, DEFAULT_AGGREGATE_WINDOW)): vol.All(int, vol.Range(min=0, max=3600)),
             }),
+            errors=errors,
         )
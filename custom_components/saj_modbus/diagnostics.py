@@ -0,0 +1,41 @@
+"""Diagnostics support for SAJ Modbus."""
+import time
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .hub import SAJModbusHub
+
+TO_REDACT = {CONF_HOST, "sn", "pc"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> Dict[str, Any]:
+    """Returns the settings, inverter data and Modbus metrics of a config entry."""
+    hub: SAJModbusHub = hass.data[DOMAIN][entry.entry_id]["hub"]
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "inverter": async_redact_data(hub.inverter_data, TO_REDACT),
+        "identity_read_at": hub.identity_read_at.isoformat() if hub.identity_read_at else None,
+        "last_update_success": hub.last_update_success,
+        "profile": {"name": hub.profile.name, "version": hub.profile.version, "source": hub.profile_source},
+        "skipped_blocks": hub.skipped_blocks,
+        "block_reads": {
+            name: {"age": round(time.monotonic() - read_at, 1), "failed": hub.values.failed_reads(name)}
+            for name, read_at in hub.values.read_at.items()
+        },
+        "scan_policy": hub.scan_policy.as_dict() if hub.scan_policy is not None else None,
+        "connection": {
+            "connected": hub.connection.connected,
+            "circuit": hub.connection.state,
+            "unit": hub.unit,
+            "gateway_units": hub.gateway.units,
+        },
+        "pacing": hub.pacing.as_dict(),
+        "pipeline": hub.pipeline.as_dict() if hub.pipeline is not None else None,
+        "samples": hub.samples.as_dict() if hub.samples is not None else None,
+        "metrics": hub.metrics.as_dict(),
+    }
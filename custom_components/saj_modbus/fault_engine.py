@@ -0,0 +1,102 @@
+"""Change-driven decoding of the three fault words of the realtime block.
+
+The messages of every bit position are looked up in tables built once from
+FAULT_MESSAGES, and a word is only decoded again when its value changes.
+FaultTracker compares the words of two cycles and reports the faults that
+were raised or cleared in between.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .modbus_const import FAULT_MESSAGES
+
+FAULT_WORDS = len(FAULT_MESSAGES)
+FAULT_KEYS = tuple(f"faultMsg{number}" for number in range(FAULT_WORDS))
+
+# Message of every bit position per fault word
+FAULT_BITS: Tuple[Tuple[str, ...], ...] = tuple(
+    tuple(
+        FAULT_MESSAGES[number].get(1 << bit, f"Unknown fault (word {number}, bit {bit})")
+        for bit in range(32)
+    )
+    for number in range(FAULT_WORDS)
+)
+
+
+@dataclass(frozen=True)
+class Fault:
+    """One fault bit."""
+    word: int
+    bit: int
+    message: str
+
+    @property
+    def mask(self) -> int:
+        return 1 << self.bit
+
+
+@dataclass(frozen=True)
+class FaultEdge:
+    """A fault that was raised or cleared; ``since`` is when it was raised."""
+    fault: Fault
+    raised: bool
+    since: Any
+
+
+@lru_cache(maxsize=128)
+def decode_fault_word(number: int, value: int) -> Tuple[Fault, ...]:
+    """Returns the faults set in a fault word, lowest bit first."""
+    bits = FAULT_BITS[number]
+    faults = []
+    value &= 0xFFFFFFFF
+    while value:
+        lowest = value & -value
+        bit = lowest.bit_length() - 1
+        faults.append(Fault(number, bit, bits[bit]))
+        value ^= lowest
+    return tuple(faults)
+
+
+@lru_cache(maxsize=32)
+def fault_text(words: Tuple[int, ...]) -> str:
+    """Joins the messages of all faults set in the fault words, as shown by the error message sensor."""
+    messages = [fault.message for number, value in enumerate(words) for fault in decode_fault_word(number, value)]
+    return ", ".join(messages).strip()[:254]
+
+
+def fault_words(data: Dict[str, Any]) -> Tuple[int, ...]:
+    """The fault words in the decoded data, missing ones as 0."""
+    return tuple(int(data.get(key) or 0) for key in FAULT_KEYS)
+
+
+class FaultTracker:
+    """Remembers the fault words and reports the faults that were raised or cleared.
+
+    ``active`` maps every active fault to the time it was raised, ``revision``
+    counts the changes so that entities can skip cycles without one.
+    """
+
+    def __init__(self) -> None:
+        self.active: Dict[Fault, Any] = {}
+        self.revision = 0
+        self._words: Tuple[int, ...] = (0,) * FAULT_WORDS
+
+    def update(self, words: Sequence[int], now: Any) -> List[FaultEdge]:
+        """Takes the fault words of a cycle and returns the edges since the previous one."""
+        words = tuple(words)
+        if words == self._words:
+            return []
+
+        edges: List[FaultEdge] = []
+        for number, (old, new) in enumerate(zip(self._words, words)):
+            if old == new:
+                continue
+            for fault in decode_fault_word(number, old & ~new):
+                edges.append(FaultEdge(fault, False, self.active.pop(fault, now)))
+            for fault in decode_fault_word(number, new & ~old):
+                self.active[fault] = now
+                edges.append(FaultEdge(fault, True, now))
+        self._words = words
+        self.revision += 1
+        return edges
@@ -1,254 +1,723 @@
 import asyncio
 import logging
-from datetime import timedelta
-from typing import Dict, Any, Optional
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Mapping, Optional, Set, Tuple
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 from pymodbus.client import AsyncModbusTcpClient
-from .modbus_utils import safe_close, close, ensure_connection, try_read_registers
-
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+from .modbus_connection import ModbusConnection
+from .modbus_gateway import ModbusGateway
+from .modbus_pipeline import ModbusPipeline
+
+from .const import (
+    CONNECTION_MODE_CLOSE_PER_CYCLE,
+    DEFAULT_CONNECTION_MODE,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_MAX_REGISTER_GAP,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    DEFAULT_UNIT_ID,
+    EVENT_FAULT_CLEARED,
+    EVENT_FAULT_RAISED,
+    INTERNAL_KEYS,
+    MODEL_AUTO,
+    TIER_FAST,
+    TIER_NORMAL,
+)
+from .identity_store import IDENTITY_MAX_AGE, IDENTITY_RESET_MODES, get_identity_store, identity_read_at
+from .fault_engine import FAULT_KEYS, FaultEdge, FaultTracker, fault_words
 from .modbus_data_readers import (
+    POLL_BLOCKS,
+    PV_STRING_DATA_BLOCK,
+    SLOT_INDEX,
+    RegisterBlock,
+    read_charge_schedule,
+    read_charging_state,
     read_modbus_inverter_data,
-    read_modbus_realtime_data,
-    read_additional_modbus_data_1_part_1,
-    read_additional_modbus_data_1_part_2,
-    read_additional_modbus_data_2_part_1,
-    read_additional_modbus_data_2_part_2,
-    read_additional_modbus_data_3,
-    read_additional_modbus_data_4,
-    read_battery_data,
-    read_first_charge_data,
 )
+from .model_profiles import DEFAULT_PROFILE, PROFILES, CompiledProfile, ModelProfile, device_type_key, select_profile
+from .modbus_poller import run_poll_cycle
+from .profile_store import get_profile_store
+from .modbus_register_map import RegisterMap
+from .sample_buffer import SampleBuffer, capacity_for
+from .slot_data import SlotData
+from .register_scanner import RangeCallback, ScanResult, scan_registers
+from .saj_h1_registers import SAJ_H1_REGISTER_MAP
+from .scan_policy import INPUT_KEYS, AdaptiveScanPolicy
+from .snapshot_store import SnapshotStore
+from .modbus_stats import CycleStats, ModbusMetrics
+from .modbus_write_queue import ModbusWriteQueue, PendingWrite, group_adjacent
+from .poll_scheduler import PollScheduler, default_tier_intervals
 
 _LOGGER = logging.getLogger(__name__)
 
-class SAJModbusHub(DataUpdateCoordinator[Dict[str, Any]]):
-    def __init__(self, hass: HomeAssistant, name: str, host: str, port: int, scan_interval: int) -> None:
+# Faults are evaluated in the cycles that read the fault words
+FAULT_BLOCKS = set(SAJ_H1_REGISTER_MAP.blocks_for(FAULT_KEYS))
+
+class SAJModbusHub(DataUpdateCoordinator[SlotData]):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        name: str,
+        host: str,
+        port: int,
+        scan_interval: int,
+        max_register_gap: int = DEFAULT_MAX_REGISTER_GAP,
+        connection_mode: str = DEFAULT_CONNECTION_MODE,
+        idle_timeout: int = DEFAULT_IDLE_TIMEOUT,
+        fast_scan_interval: Optional[int] = None,
+        slow_scan_interval: int = DEFAULT_SLOW_SCAN_INTERVAL,
+        inverter_model: str = MODEL_AUTO,
+        adaptive_scan: bool = False,
+        min_scan_interval: int = DEFAULT_MIN_SCAN_INTERVAL,
+        max_scan_interval: int = DEFAULT_MAX_SCAN_INTERVAL,
+        unit_id: int = DEFAULT_UNIT_ID,
+        gateway: Optional[ModbusGateway] = None,
+        pipelined_reads: bool = False,
+        aggregate_window: int = 0,
+    ) -> None:
+        # Every block of the register table is read until the model is known.
+        # Without a dedicated fast interval the fast tier runs at the normal rate
+        self._scheduler = PollScheduler(
+            POLL_BLOCKS,
+            default_tier_intervals(fast_scan_interval or scan_interval, scan_interval, slow_scan_interval),
+        )
         super().__init__(
             hass,
             _LOGGER,
             name=name,
-            update_interval=timedelta(seconds=scan_interval),
+            update_interval=timedelta(seconds=self._scheduler.shortest_interval),
             update_method=self._async_update_data,
         )
         self._host = host
         self._port = port
-        self._client: Optional[AsyncModbusTcpClient] = None
-        self._read_lock = asyncio.Lock()
-        self._connection_lock = asyncio.Lock()
+        self._max_register_gap = max_register_gap
+        self._connection_mode = connection_mode
+        self._idle_timeout = idle_timeout
+        self._unsub_idle_close: Optional[CALLBACK_TYPE] = None
+        self._unit = unit_id
+        self._settings_lock = asyncio.Lock()
         self.updating_settings = False
         self.inverter_data: Dict[str, Any] = {}
-        self._closing = False
-        self._reconnecting = False
-        self._max_retries = 2
-        self._retry_delay = 1
-        self._operation_timeout = 30
-        
-        # Initialize the pending charging state:
-        self._pending_charging_state: Optional[bool] = None
-        
-         # Neue Pending-Variablen für First Charge:
-        self._pending_first_charge_start: Optional[str] = None  # Erwartet im Format "HH:MM"
-        self._pending_first_charge_end: Optional[str] = None    # Erwartet im Format "HH:MM"
-        self._pending_first_charge_day_mask: Optional[int] = None
-        self._pending_first_charge_power_percent: Optional[int] = None
-
-    def _create_client(self) -> AsyncModbusTcpClient:
-        """Creates a new optimized instance of the AsyncModbusTcpClient."""
-        client = AsyncModbusTcpClient(
-            host=self._host,
-            port=self._port,
-            timeout=10,
-            
+        # The coordinator data: allocated once, the decoders write every cycle into its slots
+        self.values = SlotData(SLOT_INDEX)
+        # Blocks with a value that changed in the last cycle
+        self.changed_blocks: Set[str] = set()
+        # Read latencies, errors and connection churn for the diagnostic entities
+        self.metrics = ModbusMetrics()
+        # Inverters behind the same gateway share its connection, its arbiter and its pacing
+        self._gateway = gateway or ModbusGateway(host, port)
+        self._gateway.attach(unit_id, self.metrics)
+        # The one client of the gateway; reconnects in the background and fails fast while it is gone
+        self._connection = self._gateway.connection
+        # Serializes every request to the gateway, reads and writes alike
+        self._arbiter = self._gateway.arbiter
+        # Pause between two requests, learned from the response times and errors of the gateway
+        self.pacing = self._gateway.pacing
+        # Block reads of a cycle sent at once, if the gateway passes the probe
+        self._pipeline: Optional[ModbusPipeline] = self._gateway.enable_pipeline() if pipelined_reads else None
+        # Register profile of the inverter model, selected after the identity block has been read
+        self._inverter_model = inverter_model
+        self._profile: Optional[CompiledProfile] = None
+        self.profile_source: Optional[str] = None
+        # Profile the entities were created for and the entry to reload when another one is selected
+        self._entity_profile: Optional[Tuple[str, str]] = None
+        # Sensor keys whose entities are disabled in the entity registry; their blocks are not read
+        self._config_entry_id: Optional[str] = None
+        self._disabled_keys: Set[str] = set()
+        self.skipped_blocks: List[str] = []
+        # Stretches or shortens the interval of the fast and normal tiers with the state of the inverter
+        self._scan_interval = scan_interval
+        self.scan_policy: Optional[AdaptiveScanPolicy] = (
+            AdaptiveScanPolicy(
+                fast_scan_interval or scan_interval,
+                min(min_scan_interval, max_scan_interval),
+                max(min_scan_interval, max_scan_interval),
+            )
+            if adaptive_scan else None
         )
-        _LOGGER.debug(f"Created new Modbus client: AsyncModbusTcpClient {self._host}:{self._port}")
-        return client
+        # History of the fast power values for the window aggregates, sized for the shortest interval
+        self.aggregate_window = aggregate_window
+        self.samples: Optional[SampleBuffer] = None
+        if aggregate_window > 0:
+            shortest = fast_scan_interval or scan_interval
+            if self.scan_policy is not None:
+                shortest = min(shortest, self.scan_policy.minimum)
+            self.samples = SampleBuffer(
+                _fast_power_keys(self.profile.register_map), capacity_for(aggregate_window, shortest)
+            )
+        # Block of every buffered value in the register profile
+        self._sample_blocks: Dict[str, str] = self._sample_blocks_of(self.profile.register_map)
+
+        # When the identity block was last read from the inverter; it is cached between restarts
+        self._identity_read_at: Optional[datetime] = None
+        self._identity_outdated = False
+        # Data of the last run, restored at startup until the first live read
+        self._snapshot_store: Optional[SnapshotStore] = None
+        self.restored_at: Optional[datetime] = None
+        # Active faults of the inverter; raise and clear edges are fired as events
+        self.faults = FaultTracker()
+
+        # Writes from the control entities are debounced and flushed right away
+        self._write_queue = ModbusWriteQueue(self._async_write_registers)
+        # False once the inverter rejected reading the charge schedule with a single request
+        self._schedule_single_read = True
 
     async def update_connection_settings(self, host: str, port: int, scan_interval: int) -> None:
-        """Updates the connection settings with improved synchronization."""
-        async with self._connection_lock:
+        """Updates the connection settings with improved synchronization.
+
+        A new host or port is not applied here: the hub belongs to the gateway
+        at its address, so the options flow reloads the entry instead, which
+        moves the hub to the gateway at the new address.
+        """
+        if (host, port) != (self._host, self._port):
+            raise ValueError(f"{self.name} moves to {host}:{port} only with a reload of its entry")
+        async with self._settings_lock:
             self.updating_settings = True
             try:
-                connection_changed = (host != self._host) or (port != self._port)
-                self._host = host
-                self._port = port
-                self.update_interval = timedelta(seconds=scan_interval)
-
-                if connection_changed:
-                    await safe_close(self._client)
-                    self._client = self._create_client()
-                    self._client = await ensure_connection(self._client, self._host, self._port)
+                self._scan_interval = scan_interval
+                self._scheduler.set_interval(TIER_NORMAL, scan_interval)
+                self.update_interval = timedelta(seconds=self._scheduler.shortest_interval)
             finally:
                 self.updating_settings = False
 
+    @property
+    def connection(self) -> ModbusConnection:
+        return self._connection
 
-    async def _async_update_data(self) -> Dict[str, Any]:
-        self._client = await ensure_connection(self._client, self._host, self._port)
-        if not self.inverter_data:
-            self.inverter_data.update(await read_modbus_inverter_data(self._client))
-        combined_data = {**self.inverter_data}
-
-        # Loop through all methods that provide dictionary data
-        for method in [
-            read_modbus_realtime_data,
-            read_additional_modbus_data_1_part_1,
-            read_additional_modbus_data_1_part_2,
-            read_additional_modbus_data_2_part_1,
-            read_additional_modbus_data_2_part_2,
-            read_additional_modbus_data_3,
-            read_additional_modbus_data_4,
-            read_battery_data,
-            read_first_charge_data,
-        ]:
-            result = await method(self._client)
-            combined_data.update(result)
-            await asyncio.sleep(0.2)
-        
-        # Separate call to query the current charging state
-        charging_state = await self.get_charging_state()
-        combined_data["charging_enabled"] = charging_state
-
-        # Handle pending charging state
-        if self._pending_charging_state is not None:
-            if self._pending_charging_state != charging_state:
-                await self._handle_pending_charging_state()
-                charging_state = await self.get_charging_state()
-                combined_data["charging_enabled"] = charging_state
-            else:
-                _LOGGER.info("Charging state unchanged, no write required.")
-                self._pending_charging_state = None
-
-        # Handle pending first charge settings
-        if (self._pending_first_charge_start is not None or
-            self._pending_first_charge_end is not None or
-            self._pending_first_charge_day_mask is not None or
-            self._pending_first_charge_power_percent is not None):
-            _LOGGER.info(
-                "Writing First Charge values: start=%s, end=%s, day_mask=%s, power_percent=%s",
-                self._pending_first_charge_start,
-                self._pending_first_charge_end,
-                self._pending_first_charge_day_mask,
-                self._pending_first_charge_power_percent
-            )
-            await self._handle_pending_first_charge_settings()
-
-        await close(self._client, self._closing, self._connection_lock)
-        return combined_data
-
-    async def _handle_pending_first_charge_settings(self) -> None:
-        """Schreibt die pending First-Charge-Werte in die Register 0x3606, 0x3607 und 0x3608."""
-        async with self._read_lock:
-            # Register 0x3606: Start Time (High Byte = Stunde, Low Byte = Minute)
-            if self._pending_first_charge_start is not None:
-                try:
-                    hour, minute = map(int, self._pending_first_charge_start.split(":"))
-                    value = (hour << 8) | minute
-                    response = await self._client.write_register(0x3606, value)
-                    if response and not response.isError():
-                        _LOGGER.info(f"Successfully set first charge start time: {self._pending_first_charge_start}")
-                    else:
-                        _LOGGER.error(f"Failed to write first charge start time: {response}")
-                except Exception as e:
-                    _LOGGER.error(f"Error writing first charge start time: {e}")
-                finally:
-                    self._pending_first_charge_start = None
-
-            # Register 0x3607: End Time (High Byte = Stunde, Low Byte = Minute)
-            if self._pending_first_charge_end is not None:
-                try:
-                    hour, minute = map(int, self._pending_first_charge_end.split(":"))
-                    value = (hour << 8) | minute
-                    response = await self._client.write_register(0x3607, value)
-                    if response and not response.isError():
-                        _LOGGER.info(f"Successfully set first charge end time: {self._pending_first_charge_end}")
-                    else:
-                        _LOGGER.error(f"Failed to write first charge end time: {response}")
-                except Exception as e:
-                    _LOGGER.error(f"Error writing first charge end time: {e}")
-                finally:
-                    self._pending_first_charge_end = None
-
-            # Register 0x3608: Power Time (High Byte = Day Mask, Low Byte = Power Percent)
-            if self._pending_first_charge_day_mask is not None or self._pending_first_charge_power_percent is not None:
-                try:
-                    # Zuerst den aktuellen Registerwert für 0x3608 auslesen
-                    response = await self._client.read_holding_registers(address=0x3608, count=1)
-                    if not response or response.isError() or len(response.registers) < 1:
-                        current_value = 0
-                    else:
-                        current_value = response.registers[0]
-                    current_day_mask = (current_value >> 8) & 0xFF
-                    current_power_percent = current_value & 0xFF
-
-                    # Fehlende Teile mit den Pending-Werten ergänzen (falls vorhanden)
-                    day_mask = self._pending_first_charge_day_mask if self._pending_first_charge_day_mask is not None else current_day_mask
-                    power_percent = self._pending_first_charge_power_percent if self._pending_first_charge_power_percent is not None else current_power_percent
-
-                    value = (day_mask << 8) | power_percent
-                    response = await self._client.write_register(0x3608, value)
-                    if response and not response.isError():
-                        _LOGGER.info(f"Successfully set first charge power time: day_mask={day_mask}, power_percent={power_percent}")
-                    else:
-                        _LOGGER.error(f"Failed to write first charge power time: {response}")
-                except Exception as e:
-                    _LOGGER.error(f"Error writing first charge power time: {e}")
-                finally:
-                    self._pending_first_charge_day_mask = None
-                    self._pending_first_charge_power_percent = None
+    @property
+    def unit(self) -> int:
+        """The Modbus unit id of the inverter."""
+        return self._unit
 
+    @property
+    def gateway(self) -> ModbusGateway:
+        return self._gateway
 
+    @property
+    def pipeline(self) -> Optional[ModbusPipeline]:
+        return self._pipeline
 
+    def slot(self, key: str) -> int:
+        """The slot of a value in the coordinator data, for entities that read it every cycle."""
+        return self.values.index.slot(key)
 
+    @property
+    def profile(self) -> ModelProfile:
+        """The register profile of the inverter, the default one until the model is known."""
+        return self._profile.profile if self._profile is not None else PROFILES[DEFAULT_PROFILE]
 
-    # Setter-Methoden, die von HA bei Änderung der Sensoren aufgerufen werden:
-    async def set_first_charge_start(self, time_str: str) -> None:
-        """Setzt den neuen Startzeitpunkt (Format 'HH:MM') für First Charge."""
-        self._pending_first_charge_start = time_str
+    async def async_restore_snapshot(self, store: SnapshotStore) -> bool:
+        """Restores the data of the last run from ``store`` and keeps saving new data there.
 
-    async def set_first_charge_end(self, time_str: str) -> None:
-        """Setzt den neuen Endzeitpunkt (Format 'HH:MM') für First Charge."""
-        self._pending_first_charge_end = time_str
+        Returns True if data was restored; it is served as stale until the first live read succeeds.
+        """
+        self._snapshot_store = store
+        snapshot = await store.async_load()
+        if snapshot is None or not snapshot["data"]:
+            return False
 
-    async def set_first_charge_day_mask(self, day_mask: int) -> None:
-        """Setzt den neuen Day Mask Wert für First Charge."""
-        self._pending_first_charge_day_mask = day_mask
+        model = self._inverter_model if self._inverter_model in PROFILES else snapshot.get("profile")
+        if self._profile is None and model in PROFILES:
+            self._profile = await get_profile_store(self.hass).async_compiled(PROFILES[model], self._max_register_gap)
+            self.profile_source = "configured" if model == self._inverter_model else "snapshot"
+            self._update_poll_blocks()
+        # The identity read since takes precedence over the stored one
+        self.values.update({**snapshot["data"], **self.inverter_data})
+        self.data = self.values
+        self.restored_at = dt_util.parse_datetime(snapshot.get("saved_at") or "") or dt_util.utcnow()
+        _LOGGER.info(f"Restored the data of {self.name} from {self.restored_at.isoformat()}, reading the inverter in the background")
+        return True
+
+    async def async_restore_identity(self) -> bool:
+        """Takes the identity block from the cache instead of reading it, and selects the profile.
+
+        The cached block is read again in the background once it is older than
+        IDENTITY_MAX_AGE or the inverter went through an initialization or update.
+        """
+        cached = await get_identity_store(self.hass).async_get(self._host, self._port, self._unit)
+        if cached is None:
+            return False
+        self.inverter_data.update(cached["data"])
+        self.values.update(cached["data"])
+        self._identity_read_at = identity_read_at(cached)
+        # The cache is kept per address: the serial number is checked after the first cycle
+        self._identity_outdated = True
+        _LOGGER.debug(f"Using the cached identity of {self.name} (serial number {cached.get('sn')})")
+        await self._async_select_profile()
+        return True
+
+    @property
+    def identity_read_at(self) -> Optional[datetime]:
+        """When the identity block was last read from the inverter, possibly before a restart."""
+        return self._identity_read_at
+
+    async def _async_read_identity(self) -> Dict[str, Any]:
+        """Reads the identity block and caches it; returns the values that changed."""
+        identity = await read_modbus_inverter_data(
+            self._connection, self._arbiter, self.metrics, self.pacing, self._unit
+        )
+        if not identity:
+            return {}
+        self._identity_read_at = dt_util.utcnow()
+        self._identity_outdated = False
+        changed = {key: value for key, value in identity.items() if self.inverter_data.get(key) != value}
+        self.inverter_data.update(identity)
+        self.values.update(identity)
+        await get_identity_store(self.hass).async_set(
+            self._host, self._port, identity, self._identity_read_at, self._unit
+        )
+        return changed
 
-    async def set_first_charge_power_percent(self, power_percent: int) -> None:
-        """Setzt den neuen Power Percent Wert für First Charge."""
-        self._pending_first_charge_power_percent = power_percent
+    def _identity_due(self, data: Mapping[str, Any]) -> bool:
+        """Tells whether the identity block should be read again after this cycle."""
+        if data.get("mpvmode") in IDENTITY_RESET_MODES:
+            # Serial number and firmware may change; read them once the inverter runs again
+            self._identity_outdated = True
+            return False
+        if self._identity_outdated:
+            return True
+        return self._identity_read_at is None or dt_util.utcnow() - self._identity_read_at > IDENTITY_MAX_AGE
+
+    async def _async_revalidate_identity(self) -> Dict[str, Any]:
+        """Reads the identity block again and selects the profile again if the inverter changed."""
+        changed = await self._async_read_identity()
+        if changed:
+            _LOGGER.info(f"Identity of {self._host} changed: {', '.join(sorted(changed))}")
+            if {"sn", "devtype", "subtype"} & set(changed):
+                await self._async_select_profile()
+            if "sn" in changed:
+                # The serial number identifies the device of the entities
+                self._async_reload_entities(f"serial number {changed['sn']}")
+        return changed
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            "saved_at": dt_util.utcnow().isoformat(),
+            "profile": self._profile.name if self._profile is not None else None,
+            "data": dict(self.data or {}),
+        }
+
+    async def _async_select_profile(self) -> None:
+        """Selects the register profile from the identity block and loads its compiled read plans."""
+        store = get_profile_store(self.hass)
+        profile, self.profile_source = select_profile(
+            self.inverter_data, await store.async_device_types(), self._inverter_model
+        )
+        self._profile = await store.async_compiled(profile, self._max_register_gap)
+        # Only what was recognised, an unknown device type is looked at again on the next start
+        if self.profile_source not in ("configured", "default"):
+            store.async_record_device_type(device_type_key(self.inverter_data), profile.name)
+        self._update_poll_blocks()
+        # Every block of the new profile is read in the next cycle, not only the ones that are due
+        self._scheduler.reset()
+        _LOGGER.info(
+            f"Using register profile {profile.title} for {self._host} ({self.profile_source}, "
+            f"devtype {self.inverter_data.get('devtype')}, subtype {self.inverter_data.get('subtype')})"
+        )
+        if self._entity_profile is not None and self._entity_profile[0] != profile.name:
+            self._async_reload_entities(f"profile {profile.title}")
+
+    @callback
+    def _async_reload_entities(self, reason: str) -> None:
+        """Reloads the entry, once, if its entities were created for another inverter."""
+        if self._entity_profile is None:
+            return
+        _LOGGER.info(f"Reloading {self.name} to create the entities for {reason}")
+        self.hass.config_entries.async_schedule_reload(self._entity_profile[1])
+        self._entity_profile = None
+
+    @callback
+    def async_reload_on_profile_change(self, config_entry_id: str) -> CALLBACK_TYPE:
+        """Reloads the entry once another profile than the current one is selected.
+
+        The entities are created for the registers of the current profile only.
+        Returns the function that stops watching.
+        """
+        self._entity_profile = (self.profile.name, config_entry_id)
+
+        @callback
+        def _stop() -> None:
+            self._entity_profile = None
+
+        return _stop
+
+    @callback
+    def async_track_entity_registry(self, config_entry_id: str) -> CALLBACK_TYPE:
+        """Reads only the blocks of enabled entities and follows changes in the entity registry.
+
+        Returns the function that stops listening for registry updates.
+        """
+        self._config_entry_id = config_entry_id
+        self._async_read_disabled_keys()
+
+        @callback
+        def _async_registry_updated(event: Event) -> None:
+            if event.data["action"] == "update" and "disabled_by" not in event.data.get("changes", {}):
+                return
+            self._async_read_disabled_keys()
+
+        return self.hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, _async_registry_updated)
+
+    @callback
+    def _async_read_disabled_keys(self) -> None:
+        """Collects the keys of the disabled sensors of this entry and updates the blocks to read."""
+        prefix = f"{self.name}_"
+        registry = er.async_get(self.hass)
+        disabled_keys = {
+            entry.unique_id[len(prefix):]
+            for entry in er.async_entries_for_config_entry(registry, self._config_entry_id)
+            if entry.domain == "sensor" and entry.disabled_by is not None and entry.unique_id.startswith(prefix)
+        }
+        if disabled_keys != self._disabled_keys:
+            self._disabled_keys = disabled_keys
+            self._update_poll_blocks()
+
+    def _sample_blocks_of(self, register_map: RegisterMap) -> Dict[str, str]:
+        """Maps the buffered values the register profile has to the names of their blocks."""
+        if self.samples is None:
+            return {}
+        return {key: register_map.block_of(key).name for key in self.samples.keys if key in register_map.by_key}
+
+    def _update_poll_blocks(self) -> None:
+        """Hands the blocks of the profile that feed an enabled sensor or the hub itself to the scheduler.
+
+        Sensors without an entity registry entry yet count as enabled. The PV strings
+        are left out while the scan policy reports PV as off.
+        """
+        register_map = self.profile.register_map
+        blocks: List[RegisterBlock] = self._profile.poll_blocks if self._profile is not None else POLL_BLOCKS
+        self._sample_blocks = self._sample_blocks_of(register_map)
+        wanted = {key for key, _ in register_map.sensors() if key not in self._disabled_keys}
+        wanted.update(INTERNAL_KEYS)
+        if self.scan_policy is not None:
+            wanted.update(INPUT_KEYS)
+        if self.samples is not None:
+            wanted.update(self.samples.keys)
+        needed = set(register_map.blocks_for(wanted))
+        if self.scan_policy is not None and self.scan_policy.pv_off:
+            needed.discard(PV_STRING_DATA_BLOCK.name)
+        skipped = [block.name for block in blocks if block.name not in needed]
+        if skipped != self.skipped_blocks:
+            _LOGGER.debug(f"Not reading {', '.join(skipped) or 'no blocks'}")
+        self.skipped_blocks = skipped
+        self._scheduler.set_blocks([block for block in blocks if block.name in needed])
+        self.update_interval = timedelta(seconds=self._scheduler.shortest_interval)
+
+    def _apply_scan_policy(self, data: Mapping[str, Any]) -> None:
+        """Adapts the tier intervals and the PV string reads to the data of the last cycle."""
+        policy = self.scan_policy
+        pv_off = policy.pv_off
+        interval = policy.update(data)
+        self._scheduler.set_interval(TIER_FAST, interval)
+        # The normal tier never runs faster than configured, but backs off together with the fast one
+        self._scheduler.set_interval(TIER_NORMAL, max(self._scan_interval, interval))
+        if policy.pv_off != pv_off:
+            _LOGGER.info(f"PV is {'off, pausing' if policy.pv_off else 'on, resuming'} the reads of the PV strings")
+            self._update_poll_blocks()
+        new_interval = timedelta(seconds=self._scheduler.shortest_interval)
+        if new_interval != self.update_interval:
+            _LOGGER.debug(f"Scan interval {new_interval.total_seconds()} s ({policy.state})")
+            self.update_interval = new_interval
+
+    @callback
+    def _async_process_faults(self, data: Mapping[str, Any]) -> None:
+        """Fires an event and logs once for every fault that was raised or cleared since the last read."""
+        for edge in self.faults.update(fault_words(data), dt_util.utcnow()):
+            if edge.raised:
+                _LOGGER.error(f"Fault raised on {self.name}: {edge.fault.message}")
+            else:
+                _LOGGER.info(f"Fault cleared on {self.name}: {edge.fault.message}")
+            self.hass.bus.async_fire(
+                EVENT_FAULT_RAISED if edge.raised else EVENT_FAULT_CLEARED, self._fault_event_data(edge)
+            )
 
-    
-    
-    # ende charing time
+    def _fault_event_data(self, edge: FaultEdge) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "host": self._host,
+            "unit": self._unit,
+            "word": edge.fault.word,
+            "bit": edge.fault.bit,
+            "mask": edge.fault.mask,
+            "message": edge.fault.message,
+            "since": edge.since.isoformat(),
+        }
+
+    async def close(self) -> None:
+        """Closes the Modbus connection when the integration is unloaded, unless other inverters still use it."""
+        await self._write_queue.async_shutdown()
+        self._cancel_idle_close()
+        if not self._gateway.detach(self._unit):
+            await self._gateway.close()
+
+    def _cancel_idle_close(self) -> None:
+        if self._unsub_idle_close is not None:
+            self._unsub_idle_close()
+            self._unsub_idle_close = None
+
+    async def _disconnect(self) -> None:
+        await self._connection.disconnect()
+        if self._pipeline is not None:
+            await self._pipeline.disconnect()
+
+    async def _release_connection(self, cycle_failed: bool) -> None:
+        """Closes the connection after a cycle or keeps it open until it has been idle for too long."""
+        if self._connection_mode == CONNECTION_MODE_CLOSE_PER_CYCLE:
+            await self._disconnect()
+            return
+
+        if cycle_failed and not self._connection.circuit_open:
+            # Nothing came back on this socket, it is most likely half-open
+            _LOGGER.info("No data received in this cycle, dropping the persistent connection.")
+            await self._disconnect()
+            return
+
+        if self._pipeline is not None and self._pipeline.supported and self._connection.connected:
+            # The pipeline keeps its own socket open, the client only carried writes or reads retried one by one
+            async with self._arbiter:
+                await self._connection.disconnect()
+
+        self._cancel_idle_close()
+        self._unsub_idle_close = async_call_later(self.hass, self._idle_timeout, self._async_idle_close)
+
+    async def _async_idle_close(self, _now) -> None:
+        """Closes the persistent connection after the idle timeout has expired."""
+        self._unsub_idle_close = None
+        idle_time = self._gateway.idle_time()
+        if idle_time is not None and idle_time < self._idle_timeout:
+            # Another inverter behind the gateway was polled since, its own timer closes the connection
+            return
+        _LOGGER.debug(f"Closing Modbus connection after {self._idle_timeout} s of inactivity")
+        await self._disconnect()
+
+    async def _async_update_data(self) -> SlotData:
+        # Inverters behind the same gateway are polled one after the other
+        async with self._gateway.cycle(self._unit, self.update_interval.total_seconds()):
+            started = time.perf_counter()
+            stats = CycleStats()
+            try:
+                return await self._async_poll(stats)
+            finally:
+                self.metrics.record_cycle(time.perf_counter() - started, stats)
 
+    async def _async_poll(self, stats: CycleStats) -> SlotData:
+        self._cancel_idle_close()
+        if self._pipeline is None or not self._pipeline.usable:
+            # The pipeline opens its own socket, the client connects only if the blocks are read one by one
+            try:
+                await self._connection.get_client()
+            except ConnectionException as e:
+                raise UpdateFailed(str(e)) from e
+        if not self.inverter_data:
+            if await self._async_read_identity():
+                # Also replaces a profile restored from the snapshot
+                await self._async_select_profile()
+        # Written in place; blocks that are not due keep their values from the previous cycles
+        changed_blocks: Set[str] = set()
+        data, read_blocks = await run_poll_cycle(
+            self._connection, self._arbiter, self._scheduler, self._max_register_gap,
+            stats=stats, metrics=self.metrics, planner=self._profile.plan if self._profile else None,
+            pacing=self.pacing, unit=self._unit, pipeline=self._pipeline,
+            into=self.values, changed_blocks=changed_blocks
+        )
+        self.changed_blocks = changed_blocks
+        fresh = [key for key, block in self._sample_blocks.items() if block in read_blocks]
+        if self.samples is not None and fresh:
+            # Only when the values were read in this cycle, not carried over
+            self.samples.record(time.monotonic(), data, fresh)
+        if FAULT_BLOCKS <= read_blocks:
+            self._async_process_faults(data)
+        if self.scan_policy is not None and read_blocks:
+            self._apply_scan_policy(data)
+        if read_blocks and self._identity_due(data):
+            # Lazily, after the cycle, so that a cached identity never delays the live values
+            await self._async_revalidate_identity()
+        if self._profile is not None and self._profile.changed:
+            get_profile_store(self.hass).async_save_changes()
+
+        if not read_blocks and self._connection.circuit_open:
+            raise UpdateFailed(f"{self._host}:{self._port} is unreachable")
+        if read_blocks:
+            self.restored_at = None
+            if self._snapshot_store is not None and changed_blocks:
+                self._snapshot_store.async_schedule_save(self._snapshot)
+        await self._release_connection(cycle_failed=not read_blocks)
+        return self.values
+
+    async def _async_write_registers(self, writes: Dict[int, PendingWrite]) -> None:
+        """Writes the queued registers, adjacent ones in a single FC16 transaction.
+
+        Raises ModbusIOException after the other writes if the inverter rejected one of them.
+        """
+        self._cancel_idle_close()
+        client = await self._connection.get_client()
+        written: Dict[int, int] = {}
+        rejected: List[str] = []
+
+        # Priority access lets the writes in between two block reads of a running poll
+        async with self._arbiter.priority():
+            for address, run in group_adjacent(writes):
+                values = []
+                for offset, pending in enumerate(run):
+                    if pending.complete:
+                        values.append(pending.value)
+                    else:
+                        current = await self._current_register_value(client, address + offset)
+                        values.append(pending.apply(current))
 
-    async def _handle_pending_charging_state(self) -> dict:
-        """Writes the pending charging state to register 0x3647 and returns an empty dictionary."""
-        if self._pending_charging_state is not None:
-            value = 1 if self._pending_charging_state else 0
-            async with self._read_lock:
-                response = await self._client.write_register(0x3647, value)
+                if len(values) == 1:
+                    response = await client.write_register(address, values[0], slave=self._unit)
+                else:
+                    response = await client.write_registers(address, values, slave=self._unit)
                 if response and not response.isError():
-                    _LOGGER.info(f"Successfully set charging to: {self._pending_charging_state}")
+                    _LOGGER.info(f"Successfully wrote {values} to register {address:#06x}")
+                    written.update({address + offset: value for offset, value in enumerate(values)})
                 else:
-                    _LOGGER.error(f"Failed to set charging state: {response}")
-            # After the write operation, the pending state is reset.
-            self._pending_charging_state = None
-        return {}
+                    rejected.append(f"{values} to register {address:#06x}: {response}")
+
+        if self._connection_mode != CONNECTION_MODE_CLOSE_PER_CYCLE:
+            await self._release_connection(cycle_failed=False)
+        if written and self.data is not None:
+            # Publish the new values right away instead of waiting for the next poll
+            self.values.update(_decode_written_registers(written))
+            self.async_update_listeners()
+        if rejected:
+            raise ModbusIOException(f"Failed to write {'; '.join(rejected)}")
+
+    async def _current_register_value(self, client: AsyncModbusTcpClient, address: int) -> int:
+        """Returns the last known value of a control register, reading it only if it is unknown."""
+        data = self.data or {}
+        if address == 0x3608 and "first_charge_day_mask" in data and "first_charge_power_percent" in data:
+            return (data["first_charge_day_mask"] << 8) | data["first_charge_power_percent"]
+
+        # Called with the arbiter already held, so read directly
+        response = await client.read_holding_registers(address=address, count=1, slave=self._unit)
+        if not response or response.isError() or len(response.registers) < 1:
+            return 0
+        return response.registers[0]
+
+    # Setter-Methoden, die von HA bei Änderung der Entitäten aufgerufen werden.
+    # Sie warten, bis der Wert geschrieben ist, und werfen ValueError bzw. ModbusException.
+    async def set_first_charge_start(self, time_str: str) -> None:
+        """Setzt den neuen Startzeitpunkt (Format 'HH:MM') für First Charge."""
+        await self._write_queue.async_write(0x3606, charge_time_register(time_str))
+
+    async def set_first_charge_end(self, time_str: str) -> None:
+        """Setzt den neuen Endzeitpunkt (Format 'HH:MM') für First Charge."""
+        await self._write_queue.async_write(0x3607, charge_time_register(time_str))
 
+    async def set_first_charge_day_mask(self, day_mask: int) -> None:
+        """Setzt den neuen Day Mask Wert für First Charge (High Byte von 0x3608)."""
+        if not 0 <= day_mask <= 127:
+            raise ValueError(f"Invalid day mask {day_mask}, expected 0 to 127")
+        await self._write_queue.async_write(0x3608, day_mask << 8, 0xFF00)
+
+    async def set_first_charge_power_percent(self, power_percent: int) -> None:
+        """Setzt den neuen Power Percent Wert für First Charge (Low Byte von 0x3608)."""
+        if not 0 <= power_percent <= 25:
+            raise ValueError(f"Invalid power percent {power_percent}, expected 0 to 25")
+        await self._write_queue.async_write(0x3608, power_percent, 0x00FF)
 
     async def get_charging_state(self) -> bool:
         """Get the current charging control state."""
         try:
-            regs = await try_read_registers(self._client, self._read_lock, 1, 0x3647, 1)
-            return bool(regs[0])
+            return await read_charging_state(self._connection, self._arbiter, self.metrics, self.pacing, self._unit)
         except Exception as e:
             _LOGGER.error(f"Error reading charging state: {e}")
             return False
 
-
     async def set_charging(self, enable: bool) -> None:
-        """Set the charging control state by scheduling it for the next update cycle."""
-        self._pending_charging_state = enable
-        # The call to async_request_refresh() was removed so that the write operation
-        # occurs exclusively in the regular update cycle.
+        """Set the charging control state; returns once the write queue has written it."""
+        await self._write_queue.async_write(0x3647, 1 if enable else 0)
+
+    async def async_set_charge_schedule(
+        self, start: str, end: str, day_mask: int, power_percent: int, charging: bool
+    ) -> Dict[int, int]:
+        """Writes the First Charge schedule (times 'HH:MM') and the charging switch at once and reads them back.
+
+        The three First Charge registers go out in one FC16 transaction, the
+        charging switch in a second one. Writes of the entities that are still
+        queued are sent along. Returns the registers read back by address;
+        the caller compares them with ``charge_schedule_registers``. Raises
+        ModbusException if a write fails, without reading back.
+        """
+        for address, value in charge_schedule_registers(start, end, day_mask, power_percent, charging).items():
+            self._write_queue.set_register(address, value)
+        await self._write_queue.async_flush(raise_errors=True)
+
+        registers, self._schedule_single_read = await read_charge_schedule(
+            self._connection, self._arbiter, self.metrics, self.pacing, self._unit, self._schedule_single_read
+        )
+        if self.data is not None:
+            self.values.update(_decode_written_registers(registers))
+            self.async_update_listeners()
+        if self._connection_mode != CONNECTION_MODE_CLOSE_PER_CYCLE:
+            await self._release_connection(cycle_failed=False)
+        return registers
+
+    async def async_scan_registers(
+        self, start: int, end: int, on_range: RangeCallback, max_chunk: int, min_chunk: int
+    ) -> ScanResult:
+        """Sweeps the registers from start up to, not including, end over the connection of the poll cycle."""
+        self._cancel_idle_close()
+        _LOGGER.info(f"Scanning registers {start:#06x} to {end - 1:#06x} of unit {self._unit}")
+        try:
+            return await scan_registers(
+                self._connection, self._arbiter, start, end, on_range,
+                self._unit, max_chunk, min_chunk, self.pacing
+            )
+        finally:
+            if self._connection_mode != CONNECTION_MODE_CLOSE_PER_CYCLE:
+                await self._release_connection(cycle_failed=False)
+
+
+def _fast_power_keys(register_map: RegisterMap) -> List[str]:
+    """The power values of the fast tier, the ones kept in the sample buffer."""
+    return [
+        key for key, spec in register_map.sensors()
+        if spec.group == "power" and register_map.block_of(key).tier == TIER_FAST
+    ]
+
+
+def charge_schedule_registers(start: str, end: str, day_mask: int, power_percent: int, charging: bool) -> Dict[int, int]:
+    """The register values of a First Charge schedule and the charging switch."""
+    return {
+        0x3606: charge_time_register(start),
+        0x3607: charge_time_register(end),
+        0x3608: (day_mask << 8) | power_percent,
+        0x3647: 1 if charging else 0,
+    }
+
+
+def charge_time_register(time_str: str) -> int:
+    """The register value of a First Charge time 'HH:MM'; raises ValueError for anything else."""
+    try:
+        hour, minute = map(int, time_str.split(":"))
+    except (AttributeError, ValueError) as e:
+        raise ValueError(f"Invalid time {time_str!r}, expected HH:MM") from e
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        raise ValueError(f"Invalid time {time_str!r}, expected 00:00 to 23:59")
+    return (hour << 8) | minute
+
+
+def _decode_written_registers(written: Dict[int, int]) -> Dict[str, Any]:
+    """Translates written control registers into the keys of the coordinator data."""
+    data: Dict[str, Any] = {}
+    for address, value in written.items():
+        if address == 0x3606:
+            data["first_charge_start_time"] = f"{(value >> 8) & 0xFF:02d}:{value & 0xFF:02d}"
+        elif address == 0x3607:
+            data["first_charge_end_time"] = f"{(value >> 8) & 0xFF:02d}:{value & 0xFF:02d}"
+        elif address == 0x3608:
+            data["first_charge_day_mask"] = (value >> 8) & 0xFF
+            data["first_charge_power_percent"] = value & 0xFF
+        elif address == 0x3647:
+            data["charging_enabled"] = bool(value)
+    return data
@@ -0,0 +1,82 @@
+"""Disk cache of the identity block (0x8F00) of every inverter, shared by all hubs."""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DEFAULT_UNIT_ID, DOMAIN
+
+STORAGE_KEY = f"{DOMAIN}.identity"
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+DATA_IDENTITY_STORE = f"{DOMAIN}_identity_store"
+
+# A cached identity is read again in the background after this time
+IDENTITY_MAX_AGE = timedelta(days=7)
+# Working modes after which serial and firmware versions may have changed: Initialization, Update
+IDENTITY_RESET_MODES = (0, 6)
+
+
+class IdentityStore:
+    """Keeps the decoded identity block per inverter address, together with the serial number it belongs to.
+
+    Another inverter may sit at the address by the next start, so the hub
+    reads the identity block again after its first cycle and compares the
+    serial number.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._lock = asyncio.Lock()
+        self._identities: Optional[Dict[str, Dict[str, Any]]] = None
+
+    async def _async_identities(self) -> Dict[str, Dict[str, Any]]:
+        async with self._lock:
+            if self._identities is None:
+                self._identities = await self._store.async_load() or {}
+            return self._identities
+
+    async def async_get(self, host: str, port: int, unit: int = DEFAULT_UNIT_ID) -> Optional[Dict[str, Any]]:
+        """Returns the cached identity of the inverter at host, port and unit: ``sn``, ``data`` and ``read_at``."""
+        cached = (await self._async_identities()).get(_identity_key(host, port, unit))
+        if not isinstance(cached, dict) or not isinstance(cached.get("data"), dict) or not cached["data"]:
+            return None
+        return cached
+
+    async def async_set(
+        self, host: str, port: int, data: Dict[str, Any], read_at: datetime, unit: int = DEFAULT_UNIT_ID
+    ) -> None:
+        """Caches the identity block that was just read from the inverter at host, port and unit."""
+        identities = await self._async_identities()
+        identities[_identity_key(host, port, unit)] = {
+            "sn": data.get("sn"),
+            "read_at": read_at.isoformat(),
+            "data": dict(data),
+        }
+        self._store.async_delay_save(lambda: identities, SAVE_DELAY)
+
+    async def async_remove(self, host: str, port: int, unit: int = DEFAULT_UNIT_ID) -> None:
+        """Forgets the identity of the inverter at host, port and unit."""
+        identities = await self._async_identities()
+        if identities.pop(_identity_key(host, port, unit), None) is not None:
+            self._store.async_delay_save(lambda: identities, SAVE_DELAY)
+
+
+def _identity_key(host: str, port: int, unit: int) -> str:
+    return f"{host}:{port}:{unit}"
+
+
+def identity_read_at(cached: Dict[str, Any]) -> Optional[datetime]:
+    """When a cached identity was read from the inverter."""
+    return dt_util.parse_datetime(cached.get("read_at") or "")
+
+
+@callback
+def get_identity_store(hass: HomeAssistant) -> IdentityStore:
+    """Returns the identity store of this Home Assistant instance."""
+    if DATA_IDENTITY_STORE not in hass.data:
+        hass.data[DATA_IDENTITY_STORE] = IdentityStore(hass)
+    return hass.data[DATA_IDENTITY_STORE]
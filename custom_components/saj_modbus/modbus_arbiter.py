@@ -0,0 +1,82 @@
+"""Per-device arbitration of Modbus requests."""
+import asyncio
+from collections import deque
+from typing import Deque
+
+
+class RequestArbiter:
+    """Serializes all Modbus requests sent to one device.
+
+    Every hub owns its own arbiter, so requests to the same inverter never
+    overlap while different inverters are polled in parallel. Requests that
+    enter through ``priority()`` are served before all waiting normal requests,
+    which lets writes preempt a running poll cycle between two block reads.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._busy = False
+        self._priority_waiters: Deque[asyncio.Future] = deque()
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def busy(self) -> bool:
+        """Returns True while a request holds the arbiter."""
+        return self._busy
+
+    def priority(self) -> "_PriorityAccess":
+        """Returns a context manager that acquires the arbiter ahead of normal requests."""
+        return _PriorityAccess(self)
+
+    async def _acquire(self, priority: bool) -> None:
+        if not self._busy and not self._priority_waiters and (priority or not self._waiters):
+            self._busy = True
+            return
+
+        waiters = self._priority_waiters if priority else self._waiters
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The arbiter was already handed over to us, pass it on
+                self._release()
+            raise
+        finally:
+            if waiter in waiters:
+                waiters.remove(waiter)
+
+    def _release(self) -> None:
+        # Hand the arbiter directly to the next waiter so nobody can cut in
+        for waiters in (self._priority_waiters, self._waiters):
+            while waiters:
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self._busy = False
+
+    async def __aenter__(self) -> "RequestArbiter":
+        await self._acquire(priority=False)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._release()
+
+    def __repr__(self) -> str:
+        return f"RequestArbiter({self.name})"
+
+
+class _PriorityAccess:
+    """Context manager returned by RequestArbiter.priority()."""
+
+    def __init__(self, arbiter: RequestArbiter) -> None:
+        self._arbiter = arbiter
+
+    async def __aenter__(self) -> RequestArbiter:
+        await self._arbiter._acquire(priority=True)
+        return self._arbiter
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._arbiter._release()
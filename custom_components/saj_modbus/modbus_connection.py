@@ -0,0 +1,192 @@
+"""Ownership of the Modbus TCP connection to one inverter."""
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ConnectionException
+
+from .modbus_stats import ModbusMetrics
+from .modbus_utils import ensure_connection, is_connection_usable, safe_close
+
+_LOGGER = logging.getLogger(__name__)
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ConnectionException):
+    """Raised instead of sending a request while the inverter is known to be unreachable."""
+
+
+class ModbusConnection:
+    """Keeps the one client of a hub and reconnects it when the inverter goes away.
+
+    Requests report their transport failures here. After ``failure_threshold``
+    failures in a row the circuit opens: the client is closed, every request
+    fails at once with CircuitOpenError and a background task reconnects with
+    jittered exponential backoff. Once it is connected again the circuit is
+    half open, the next failure opens it again and the next success closes it.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: float = 10,
+        metrics: Optional[ModbusMetrics] = None,
+        failure_threshold: int = 3,
+        base_backoff: float = 2.0,
+        max_backoff: float = 120.0
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.metrics = metrics
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = CIRCUIT_CLOSED
+        self.opened_at: Optional[float] = None
+        self._client: Optional[AsyncModbusTcpClient] = None
+        self._lock = asyncio.Lock()
+        self._failures = 0
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def client(self) -> Optional[AsyncModbusTcpClient]:
+        return self._client
+
+    @property
+    def circuit_open(self) -> bool:
+        return self.state == CIRCUIT_OPEN
+
+    @property
+    def connected(self) -> bool:
+        return is_connection_usable(self._client)
+
+    def _create_client(self) -> AsyncModbusTcpClient:
+        # Reconnecting and retrying are done here and in try_read_registers,
+        # pymodbus must not run loops of its own on top of them
+        client = AsyncModbusTcpClient(
+            host=self.host, port=self.port, timeout=self.timeout, retries=0, reconnect_delay=0
+        )
+        _LOGGER.debug(f"Created new Modbus client: AsyncModbusTcpClient {self.host}:{self.port}")
+        return client
+
+    async def get_client(self) -> AsyncModbusTcpClient:
+        """Returns the connected client, connecting it first if necessary.
+
+        Raises CircuitOpenError while the circuit is open and ConnectionException
+        if the connection attempt fails.
+        """
+        if self._closed:
+            raise ConnectionException(f"Connection to {self.host}:{self.port} is closed")
+        if self.circuit_open:
+            raise CircuitOpenError(f"{self.host}:{self.port} is unreachable, waiting for the reconnect")
+
+        async with self._lock:
+            if is_connection_usable(self._client):
+                return self._client
+            try:
+                await self._connect()
+            except ConnectionException as e:
+                # Nothing listens at the address, there is no point in trying again right away
+                self._failures += 1
+                self._trip(e)
+                raise
+            return self._client
+
+    async def _connect(self) -> None:
+        """Replaces the client by a newly connected one; the caller holds the lock."""
+        await self._drop_client()
+        self._client = await ensure_connection(self._create_client(), self.host, self.port)
+        if self.metrics is not None:
+            self.metrics.record_connect()
+
+    async def _drop_client(self) -> None:
+        client, self._client = self._client, None
+        if client is None:
+            return
+        if client.connected and self.metrics is not None:
+            self.metrics.record_disconnect()
+        await safe_close(client)
+
+    def report_success(self) -> None:
+        """Called after a request was answered."""
+        self._failures = 0
+        if self.state == CIRCUIT_HALF_OPEN:
+            _LOGGER.info(f"Modbus connection to {self.host}:{self.port} recovered")
+            self.state = CIRCUIT_CLOSED
+
+    def report_failure(self, error: BaseException) -> None:
+        """Called after a request or connection attempt failed on the transport."""
+        self._failures += 1
+        if self.state == CIRCUIT_OPEN:
+            return
+        if self.state == CIRCUIT_HALF_OPEN or self._failures >= self.failure_threshold:
+            self._trip(error)
+
+    def _trip(self, error: BaseException) -> None:
+        _LOGGER.warning(
+            f"Modbus connection to {self.host}:{self.port} failed {self._failures} times ({error}), "
+            "pausing requests until it is back"
+        )
+        self.state = CIRCUIT_OPEN
+        self.opened_at = time.monotonic()
+        if self.metrics is not None:
+            self.metrics.record_circuit_trip()
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self) -> None:
+        """Reconnects in the background until the inverter answers again."""
+        async with self._lock:
+            await self._drop_client()
+
+        attempt = 0
+        while not self._closed:
+            # The jitter keeps several hubs from reconnecting in lockstep
+            delay = random.uniform(0.5, 1.0) * min(self.max_backoff, self.base_backoff * 2 ** attempt)
+            await asyncio.sleep(delay)
+            attempt += 1
+            async with self._lock:
+                try:
+                    await self._connect()
+                except ConnectionException:
+                    _LOGGER.debug(f"Reconnect attempt {attempt} to {self.host}:{self.port} failed")
+                    continue
+            self.state = CIRCUIT_HALF_OPEN
+            self.opened_at = None
+            _LOGGER.info(f"Reconnected to {self.host}:{self.port} after {attempt} attempts")
+            return
+
+    async def disconnect(self) -> None:
+        """Closes the socket; the next request connects again."""
+        async with self._lock:
+            await self._drop_client()
+
+    async def set_target(self, host: str, port: int) -> None:
+        """Points the connection at another address."""
+        async with self._lock:
+            self.host = host
+            self.port = port
+            await self._drop_client()
+        self._failures = 0
+        self.state = CIRCUIT_CLOSED
+
+    async def close(self) -> None:
+        """Stops reconnecting and closes the socket for good."""
+        self._closed = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            try:
+                await self._reconnect_task
+            except asyncio.CancelledError:
+                pass
+            self._reconnect_task = None
+        await self.disconnect()
@@ -1,295 +1,342 @@
 import asyncio
 import logging
-import struct
-from typing import Dict, Any, List, Optional, TypeAlias
-from pymodbus.client import AsyncModbusTcpClient
-from pymodbus.client.mixin import ModbusClientMixin
-from .const import DEVICE_STATUSSES, FAULT_MESSAGES
-from .modbus_utils import try_read_registers
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, List, Optional, Sequence, Set, Tuple, TypeAlias
+from pymodbus.exceptions import ConnectionException
+from .modbus_const import DEFAULT_UNIT_ID, TIER_NORMAL, TIER_STATIC
+from .modbus_arbiter import RequestArbiter
+from .modbus_connection import ModbusConnection
+from .modbus_decoder import BlockDecoder
+from .modbus_pacing import PacingController
+from .modbus_pipeline import ModbusPipeline, PipelinedRead, PipelineError
+from .modbus_read_planner import ReadRequest, RegisterSpan, plan_reads
+from .modbus_register_map import BlockDefinition, RegisterMap
+from .modbus_stats import CycleStats, ModbusMetrics
+from .modbus_utils import ExceptionResponseError, is_timeout, try_read_registers
+from .saj_h1_registers import SAJ_H1_REGISTER_MAP
+from .slot_data import SlotData, SlotIndex
 
 # Type aliases to make function signatures more compact
-ModbusClient: TypeAlias = AsyncModbusTcpClient
-Lock: TypeAlias = asyncio.Lock
 DataDict: TypeAlias = Dict[str, Any]
 
 _LOGGER = logging.getLogger(__name__)
 
-# Shared lock for all Modbus read operations
-_MODBUS_READ_LOCK = asyncio.Lock()
-
-async def _read_modbus_data(
-    client: ModbusClient,
-    start_address: int,
-    count: int,
-    decode_instructions: List[tuple],
-    data_key: str,
-    default_decoder: str = "16u",
-    default_factor: float = 0.01
-) -> DataDict:
-    """Helper function to read and decode Modbus data."""
+@dataclass(frozen=True)
+class RegisterBlock:
+    """A register range together with the decoder that turns it into sensor values."""
+    name: str
+    address: int
+    count: int
+    decode: Callable[[List[int]], DataDict]
+    tier: str = TIER_NORMAL
+    # The keys the block produces; blocks without derived values also decode straight
+    # into the slots of SlotData: the values of ``keys`` in order, None if the block
+    # could not be decoded
+    keys: Tuple[str, ...] = ()
+    decode_values: Optional[Callable[[List[int]], Optional[List[Any]]]] = None
+
+    @property
+    def span(self) -> RegisterSpan:
+        return RegisterSpan(self.name, self.address, self.count)
+
+def _decode_block(decoder: BlockDecoder, regs: List[int], data_key: str) -> DataDict:
+    """Helper function to decode a block of Modbus registers with its compiled decoder."""
+    if not regs:
+        _LOGGER.error(f"Error decoding modbus data: No registers for {data_key}")
+        return {}
     try:
-        regs = await try_read_registers(client, _MODBUS_READ_LOCK, 1, start_address, count)
-        if not regs:
-            _LOGGER.error(f"Error reading modbus data: No response for {data_key}")
-            return {}
-
-        new_data = {}
-        index = 0
-
-        for instruction in decode_instructions:
-            key, method, factor = (instruction + (default_factor,))[:3]
-            method = method or default_decoder
-
-            if method == "skip_bytes":
-                index += factor // 2  # Each register is 2 bytes in size
-                continue
-
-            if not key:
-                continue
+        return decoder.decode(regs)
+    except Exception as e:
+        _LOGGER.error(f"Error decoding {data_key}: {e}")
+        return {}
 
+async def read_register_blocks(
+    connection: ModbusConnection,
+    arbiter: RequestArbiter,
+    blocks: List[RegisterBlock],
+    max_gap: int = 0,
+    request_delay: float = 0.2,
+    read_blocks: Optional[Set[str]] = None,
+    stats: Optional[CycleStats] = None,
+    metrics: Optional[ModbusMetrics] = None,
+    planner: Optional[Callable[[List[RegisterBlock], int], List[ReadRequest]]] = None,
+    pacing: Optional[PacingController] = None,
+    unit: int = DEFAULT_UNIT_ID,
+    pipeline: Optional[ModbusPipeline] = None,
+    into: Optional[SlotData] = None,
+    changed_blocks: Optional[Set[str]] = None
+) -> DataDict:
+    """Reads the given blocks with as few requests as possible and decodes them.
+
+    The blocks are merged by the read planner; every decoder receives only its own
+    slice of the merged response. Blocks whose request fails are left out of the result,
+    the names of the blocks that were read are added to ``read_blocks`` if given.
+    Requests, bytes, decode and sleep times are added to ``stats`` if given,
+    latencies and errors per block to ``metrics``. ``planner`` returns the requests
+    for the blocks and the gap, e.g. from a precompiled plan; by default they are planned here.
+    With ``pacing`` the pause between two requests is the one it learned, not ``request_delay``.
+    The blocks are read from the inverter with the Modbus unit id ``unit``.
+    With a usable ``pipeline`` all requests go out at once; those that fail there
+    are read again one by one. With ``into`` the blocks are decoded into its slots
+    in place and it is returned instead of a new dict; the names of the blocks
+    with a changed value are then added to ``changed_blocks`` if given.
+    """
+    blocks_by_name = {block.name: block for block in blocks}
+    data: DataDict = into if into is not None else {}
+    if planner is not None:
+        requests = planner(blocks, max_gap)
+    else:
+        requests = plan_reads([block.span for block in blocks], max_gap)
+
+    pipelined: Sequence[Optional[PipelinedRead]] = [None] * len(requests)
+    if pipeline is not None and pipeline.usable and requests:
+        reads = [(request.address, request.count, [span.name for span in request.spans]) for request in requests]
+        pipelined = await _read_pipelined(pipeline, connection, arbiter, reads, unit, metrics) or pipelined
+    sent = any(read is not None for read in pipelined)
+
+    for request, read in zip(requests, pipelined):
+        if read is not None and read.error is None:
+            regs = read.registers
+        else:
+            delay = pacing.delay if pacing is not None else request_delay
+            if sent and delay:
+                started = time.perf_counter()
+                await asyncio.sleep(delay)
+                if stats is not None:
+                    stats.sleep_time += time.perf_counter() - started
+            sent = True
             try:
-                raw_value = regs[index]
-
-                if method == "16i":
-                    value = client.convert_from_registers([raw_value], ModbusClientMixin.DATATYPE.INT16)
-                elif method == "16u":
-                    value = client.convert_from_registers([raw_value], ModbusClientMixin.DATATYPE.UINT16)
-                elif method == "32u":
-                    if index + 1 < len(regs):
-                        value = client.convert_from_registers([raw_value, regs[index + 1]], ModbusClientMixin.DATATYPE.UINT32)
-                        index += 1  # 32-bit values occupy two registers
-                    else:
-                        value = 0
-                else:
-                    value = raw_value  # Default value if no conversion is necessary
-
-                new_data[key] = round(value * factor, 2) if factor != 1 else value
-                index += 1
-
+                regs = await try_read_registers(
+                    connection, arbiter, unit, request.address, request.count,
+                    metrics=metrics, blocks=[span.name for span in request.spans], pacing=pacing
+                )
             except Exception as e:
-                _LOGGER.error(f"Error decoding {key}: {e}")
-                return {}
+                names = ", ".join(span.name for span in request.spans)
+                _LOGGER.error(f"Error reading modbus data for {names}: {e}")
+                if stats is not None:
+                    stats.add_failed_read()
+                continue
 
-        return new_data
+        started = time.perf_counter()
+        for span in request.spans:
+            block = blocks_by_name[span.name]
+            if into is None:
+                data.update(block.decode(request.slice(regs, span)))
+            elif _decode_into(into, block, request.slice(regs, span)) and changed_blocks is not None:
+                changed_blocks.add(span.name)
+            if read_blocks is not None:
+                read_blocks.add(span.name)
+        if stats is not None:
+            stats.decode_time += time.perf_counter() - started
+            stats.add_read(request.count)
 
-    except Exception as e:
-        _LOGGER.error(f"Error reading modbus data: {e}")
-        return {}
+    return data
 
-async def read_modbus_inverter_data(client: ModbusClient) -> DataDict:
-    """Reads basic inverter data using the pymodbus 3.9 API, without BinaryPayloadDecoder."""
+async def _read_pipelined(
+    pipeline: ModbusPipeline,
+    connection: ModbusConnection,
+    arbiter: RequestArbiter,
+    reads: Sequence[Tuple[int, int, Sequence[str]]],
+    unit: int,
+    metrics: Optional[ModbusMetrics] = None
+) -> Optional[List[PipelinedRead]]:
+    """Sends the reads (address, count, block names) in one pipelined sweep.
+
+    The gateway is probed first if that has not happened yet. Returns None if
+    the reads have to be sent one by one, because the gateway cannot pipeline
+    or cannot be reached right now.
+    """
+    if connection.circuit_open:
+        return None
     try:
-        regs = await try_read_registers(client, _MODBUS_READ_LOCK, 1, 0x8F00, 29)
-        data = {}
-        index = 0
-
-        # Basic parameters: devtype and subtype as 16-bit unsigned values
-        for key in ["devtype", "subtype"]:
-            value = client.convert_from_registers(
-                [regs[index]], ModbusClientMixin.DATATYPE.UINT16
-            )
-            data[key] = value
-            index += 1
-
-        # Communication version: 16-bit unsigned, multiplied by 0.001 and rounded to 3 decimal places
-        commver = client.convert_from_registers(
-            [regs[index]], ModbusClientMixin.DATATYPE.UINT16
-        )
-        data["commver"] = round(commver * 0.001, 3)
-        index += 1
-
-        # Serial number and PC: 20 bytes each (equivalent to 10 registers)
-        for key in ["sn", "pc"]:
-            reg_slice = regs[index : index + 10]
-            raw_bytes = b"".join(struct.pack(">H", r) for r in reg_slice)
-            data[key] = raw_bytes.decode("ascii", errors="replace").strip()
-            index += 10
-
-        # Hardware version numbers: Each as 16-bit unsigned, multiplied by 0.001
-        for key in ["dv", "mcv", "scv", "disphwversion", "ctrlhwversion", "powerhwversion"]:
-            value = client.convert_from_registers(
-                [regs[index]], ModbusClientMixin.DATATYPE.UINT16
-            )
-            data[key] = round(value * 0.001, 3)
-            index += 1
-
+        async with arbiter:
+            if pipeline.supported is None and not await pipeline.probe(unit):
+                return None
+            results = await pipeline.read_registers([(address, count) for address, count, _ in reads], unit)
+    except PipelineError as e:
+        _LOGGER.debug(f"Pipelined read failed, reading one by one: {e}")
+        return None
+    except ConnectionException as e:
+        # The pipeline talks to the same gateway, its failures count for the circuit breaker as well
+        connection.report_failure(e)
+        _LOGGER.debug(f"Pipelined read failed, reading one by one: {e}")
+        return None
+
+    timeouts = [result.error for result in results if result.error is not None and is_timeout(result.error)]
+    if len(timeouts) < len(results):
+        connection.report_success()
+    if timeouts:
+        connection.report_failure(timeouts[0])
+    if metrics is not None:
+        for (_, _, names), result in zip(reads, results):
+            if result.error is None:
+                metrics.record_read(names, result.latency)
+            else:
+                # Read again one by one right after the sweep
+                metrics.record_attempt_failed(names, is_timeout(result.error), retried=True)
+    return results
+
+def _decode_into(data: SlotData, block: RegisterBlock, regs: List[int]) -> bool:
+    """Decodes a block into its slots; returns True if one of its values changed."""
+    slots = data.index.bind(block.name, block.keys) if block.decode_values is not None else None
+    if slots is None:
+        # Derived values are computed from the decoded dict
+        return data.update(block.decode(regs))
+    values = block.decode_values(regs)
+    return values is not None and data.write(slots, values)
+
+def _block_decoder(definition: BlockDefinition, decoder: BlockDecoder) -> Callable[[List[int]], DataDict]:
+    """Builds the decode function of a block from its entry in the register table."""
+    def decode(regs: List[int]) -> DataDict:
+        data = _decode_block(decoder, regs, definition.name)
+        if data and definition.derive is not None:
+            try:
+                data = definition.derive(data)
+            except Exception as e:
+                _LOGGER.error(f"Error processing {definition.name}: {e}")
+                return {}
         return data
-    except Exception as e:
-        _LOGGER.error(f"Error reading inverter data: {e}")
-        return {}
 
-async def read_modbus_realtime_data(client: ModbusClient) -> DataDict:
-    """Reads real-time operating data."""
-    decode_instructions = [
-        ("mpvmode", None), ("faultMsg0", "32u"), ("faultMsg1", "32u"),
-        ("faultMsg2", "32u"), (None, "skip_bytes", 8), ("errorcount", None),
-        ("SinkTemp", "16i", 0.1), ("AmbTemp", "16i", 0.1),
-        ("gfci", None), ("iso1", None), ("iso2", None), ("iso3", None), ("iso4", None),
-    ]
-
-    data = await _read_modbus_data(client, 16388, 19, decode_instructions, 'realtime_data', default_factor=1)
-
-    fault_messages = []
-    for key in ["faultMsg0", "faultMsg1", "faultMsg2"]:
-        fault_code = data.get(key, 0)
-        fault_messages.extend([
-            msg for code, msg in FAULT_MESSAGES[int(key[-1])].items()
-            if int(fault_code) & code
-        ])
-        data[key] = fault_code
-
-    data["mpvstatus"] = DEVICE_STATUSSES.get(data.get("mpvmode"), "Unknown")
-    data["faultmsg"] = ", ".join(fault_messages).strip()[:254]
-    
-    if fault_messages:
-        _LOGGER.error(f"Fault detected: {data['faultmsg']}")
-        
-    return data
+    return decode
 
-async def read_additional_modbus_data_1_part_1(client: ModbusClient) -> DataDict:
-    """Reads the first part of additional operating data (Set 1), up to sensor pv4Power."""
-    decode_instructions_part_1 = [
-        ("BatTemp", "16i", 0.1),         # 406FH - Battery Temperature with 0.1 scale
-        ("batEnergyPercent", None, 0.01), # 4070H - Battery energy percent with 0.01 scale
-        (None, "skip_bytes", 2),
-        ("pv1Voltage", None, 0.1),       # 4071H - PV1 Voltage with 0.1 scale
-        ("pv1TotalCurrent", None, 0.01), # 4072H - PV1 Current with 0.01 scale
-        ("pv1Power", None),              # 4073H - PV1 Power no scaling
-        ("pv2Voltage", None, 0.1),       # 4074H - PV2 Voltage with 0.1 scale
-        ("pv2TotalCurrent", None, 0.01), # 4075H - PV2 Current with 0.01 scale
-        ("pv2Power", None),              # 4076H - PV2 Power no scaling
-        ("pv3Voltage", None, 0.1),       # 4077H - PV3 Voltage with 0.1 scale
-        ("pv3TotalCurrent", None, 0.01), # 4078H - PV3 Current with 0.01 scale
-        ("pv3Power", None),              # 4079H - PV3 Power no scaling
-        ("pv4Voltage", None, 0.1),       # 407AH - PV4 Voltage with 0.1 scale
-        ("pv4TotalCurrent", None, 0.01), # 407BH - PV4 Current with 0.01 scale
-        ("pv4Power", None),              # 407CH - PV4 Power no scaling
-    ]
-
-    return await _read_modbus_data(client, 16494, 15, decode_instructions_part_1, 'additional_data_1_part_1', default_factor=0.01)
-
-async def read_additional_modbus_data_1_part_2(client: ModbusClient) -> DataDict:
-    """Reads the second part of additional operating data (Set 1)."""
-    decode_instructions_part_2 = [
-        ("directionPV", None), ("directionBattery", "16i"), ("directionGrid", "16i"),
-        ("directionOutput", None), (None, "skip_bytes", 14), ("TotalLoadPower", "16i"),
-        ("CT_GridPowerWatt", "16i"), ("CT_GridPowerVA", "16i"),
-        ("CT_PVPowerWatt", "16i"), ("CT_PVPowerVA", "16i"),
-        ("pvPower", "16i"), ("batteryPower", "16i"),
-        ("totalgridPower", "16i"), ("totalgridPowerVA", "16i"),
-        ("inverterPower", "16i"), ("TotalInvPowerVA", "16i"),
-        ("BackupTotalLoadPowerWatt", None), ("BackupTotalLoadPowerVA", None),
-        ("gridPower", "16i"),
-    ]
-    
-    return await _read_modbus_data(client, 16533, 25, decode_instructions_part_2, 'additional_data_1_part_2', default_factor=1)
-
-async def read_additional_modbus_data_2_part_1(client: ModbusClient) -> DataDict:
-    """Reads the first part of additional operating data (Set 2)."""
-    data_keys_part_1 = [
-        "todayenergy", "monthenergy", "yearenergy", "totalenergy",
-        "bat_today_charge", "bat_month_charge", "bat_year_charge", "bat_total_charge",
-        "bat_today_discharge", "bat_month_discharge", "bat_year_discharge", "bat_total_discharge",
-        "inv_today_gen", "inv_month_gen", "inv_year_gen", "inv_total_gen",
-    ]
-    decode_instructions_part_1 = [(key, "32u", 0.01) for key in data_keys_part_1]
-
-    return await _read_modbus_data(client, 16575, 32, decode_instructions_part_1, 'additional_data_2_part_1')
-
-async def read_additional_modbus_data_2_part_2(client: ModbusClient) -> DataDict:
-    """Reads the second part of additional operating data (Set 2)."""
-    data_keys_part_2 = [
-        "total_today_load", "total_month_load", "total_year_load", "total_total_load",
-        "backup_today_load", "backup_month_load", "backup_year_load", "backup_total_load",
-        "sell_today_energy", "sell_month_energy", "sell_year_energy", "sell_total_energy",
-        "feedin_today_energy", "feedin_month_energy", "feedin_year_energy", "feedin_total_energy",
-    ]
-    decode_instructions_part_2 = [(key, "32u", 0.01) for key in data_keys_part_2]
-
-    return await _read_modbus_data(client, 16607, 32, decode_instructions_part_2, 'additional_data_2_part_2')
-
-async def read_additional_modbus_data_3(client: ModbusClient) -> DataDict:
-    """Reads additional operating data (Set 3)."""
-    data_keys_part_3 = [
-        "today_pv_energy2", "month_pv_energy2", "year_pv_energy2",
-        "total_pv_energy2", "today_pv_energy3", "month_pv_energy3",
-        "year_pv_energy3", "total_pv_energy3", "sell_today_energy_2",
-        "sell_month_energy_2", "sell_year_energy_2", "sell_total_energy_2",
-        "sell_today_energy_3", "sell_month_energy_3", "sell_year_energy_3",
-        "sell_total_energy_3", "feedin_today_energy_2", "feedin_month_energy_2",
-        "feedin_year_energy_2", "feedin_total_energy_2", "feedin_today_energy_3",
-        "feedin_month_energy_3", "feedin_year_energy_3", "feedin_total_energy_3",
-        "sum_feed_in_today", "sum_feed_in_month", "sum_feed_in_year",
-        "sum_feed_in_total", "sum_sell_today", "sum_sell_month",
-        "sum_sell_year", "sum_sell_total"
-    ]
-    decode_instructions_part_3 = [(key, "32u", 0.01) for key in data_keys_part_3]
-    
-    return await _read_modbus_data(client, 16695, 64, decode_instructions_part_3, 'additional_data_3')
-
-async def read_additional_modbus_data_4(client: ModbusClient) -> DataDict:
-    """Reads data for grid parameters (R, S, and T phase)."""
-    decode_instructions = [
-        ("RGridVolt", None, 0.1),        # 4031H - Voltage scale factor 0.1
-        ("RGridCurr", None, 0.01),       # 4032H - Current scale factor 0.01
-        ("RGridFreq", None, 0.01),       # 4033H - Frequency scale factor 0.01
-        ("RGridDCI", "16i"),             # 4034H - DC component
-        ("RGridPowerWatt", None),        # 4035H - No scaling needed for power
-        ("RGridPowerVA", None),          # 4036H - No scaling needed for VA
-        ("RGridPowerPF", "16i", 0.001),  # 4037H - Power Factor scale 0.001
-        ("SGridVolt", None, 0.1),        # 4038H - Voltage scale factor 0.1
-        ("SGridCurr", None, 0.01),       # 4039H - Current scale factor 0.01
-        ("SGridFreq", None, 0.01),       # 403AH - Frequency scale factor 0.01
-        ("SGridDCI", "16i"),             # 403BH - DC component
-        ("SGridPowerWatt", None),        # 403CH - No scaling needed for power
-        ("SGridPowerVA", None),          # 403DH - No scaling needed for VA
-        ("SGridPowerPF", "16i", 0.001),  # 403EH - Power Factor scale 0.001
-        ("TGridVolt", None, 0.1),        # 403FH - Voltage scale factor 0.1
-        ("TGridCurr", None, 0.01),       # 4040H - Current scale factor 0.01
-        ("TGridFreq", None, 0.01),       # 4041H - Frequency scale factor 0.01
-        ("TGridDCI", "16i"),             # 4042H - DC component
-        ("TGridPowerWatt", None),        # 4043H - No scaling needed for power
-        ("TGridPowerVA", None),          # 4044H - No scaling needed for VA
-        ("TGridPowerPF", "16i", 0.001),  # 4045H - Power Factor scale 0.001
-    ]
-    
-    return await _read_modbus_data(client, 16433, 21, decode_instructions, "grid_phase_data", default_factor=0.001)
-
-async def read_battery_data(client: ModbusClient) -> DataDict:
-    """Reads battery data from registers for SAJ H1 inverter."""
-    decode_instructions = [
-        ("BatVolt", None, 0.1),         # 406AH - Battery Voltage with 0.1 scale
-        ("BatCurr", "16i", 0.01),       # 406BH - Battery Current with 0.01 scale
-        ("BatCurr1", "16i", 0.01),      # 406CH - Battery control1 Current
-        ("BatCurr2", "16i", 0.01),      # 406DH - Battery control2 Current
-        ("BatPower", "16i"),            # 406EH - Battery Power
-        ("BatTempC", "16i", 0.1),       # 406FH - Battery Temperature with 0.1 scale
-        ("BatEnergyPercent", None, 0.01) # 4070H - Battery energy percent with 0.01 scale
-    ]
-    
-    return await _read_modbus_data(client, 16489, 7, decode_instructions, 'battery_data', default_factor=1)
-
-async def read_first_charge_data(client: ModbusClient) -> DataDict:
-    """Reads the First Charge registers using the generic read_modbus_data function."""
-    decode_instructions = [
-        ("first_charge_start_time_raw", "16u", 1),
-        ("first_charge_end_time_raw", "16u", 1),
-        ("power_time_raw", "16u", 1),
-    ]
-
-    data = await _read_modbus_data(client, 0x3606, 3, decode_instructions, "first_charge_data", default_factor=1)
-
-    if data:
+def _block_value_decoder(definition: BlockDefinition, decoder: BlockDecoder) -> Callable[[List[int]], Optional[List[Any]]]:
+    """Builds the decode function of a block without derived values that returns the values in key order."""
+    def decode_values(regs: List[int]) -> Optional[List[Any]]:
+        if not regs:
+            _LOGGER.error(f"Error decoding modbus data: No registers for {definition.name}")
+            return None
         try:
-            def decode_time(value: int) -> str:
-                return f"{(value >> 8) & 0xFF:02d}:{value & 0xFF:02d}"
-            data["first_charge_start_time"] = decode_time(data.pop("first_charge_start_time_raw"))
-            data["first_charge_end_time"] = decode_time(data.pop("first_charge_end_time_raw"))
-            power_value = data.pop("power_time_raw")
-            data["first_charge_day_mask"] = (power_value >> 8) & 0xFF
-            data["first_charge_power_percent"] = power_value & 0xFF
+            return decoder.decode_values(regs)
         except Exception as e:
-            _LOGGER.error(f"Error processing First Charge data: {e}")
-            return {}
-
-    return data
+            _LOGGER.error(f"Error decoding {definition.name}: {e}")
+            return None
+
+    return decode_values
+
+def build_register_blocks(
+    register_map: RegisterMap,
+    decoders: Optional[Dict[str, BlockDecoder]] = None
+) -> Dict[str, RegisterBlock]:
+    """Returns the readable blocks of a register table by name, each with its decoder.
+
+    Decoders missing from ``decoders`` are compiled from the table.
+    """
+    decoders = decoders or {}
+    blocks = {}
+    for name, definition in register_map.blocks.items():
+        decoder = decoders.get(name) or register_map.compile(name)
+        keys = tuple(register_map.keys(name))
+        decode_values = None
+        if definition.derive is None:
+            keys, decode_values = tuple(decoder.keys), _block_value_decoder(definition, decoder)
+        blocks[name] = RegisterBlock(
+            name, definition.address, definition.count, _block_decoder(definition, decoder), definition.tier,
+            keys, decode_values
+        )
+    return blocks
+
+# Compiled once at import: every block is decoded with a single struct unpack
+REGISTER_BLOCKS = build_register_blocks(SAJ_H1_REGISTER_MAP)
+
+INVERTER_DATA_BLOCK = REGISTER_BLOCKS["inverter_data"]
+REALTIME_DATA_BLOCK = REGISTER_BLOCKS["realtime_data"]
+ADDITIONAL_DATA_1_PART_1_BLOCK = REGISTER_BLOCKS["additional_data_1_part_1"]
+PV_STRING_DATA_BLOCK = REGISTER_BLOCKS["pv_string_data"]
+ADDITIONAL_DATA_1_PART_2_BLOCK = REGISTER_BLOCKS["additional_data_1_part_2"]
+ADDITIONAL_DATA_2_PART_1_BLOCK = REGISTER_BLOCKS["additional_data_2_part_1"]
+ADDITIONAL_DATA_2_PART_2_BLOCK = REGISTER_BLOCKS["additional_data_2_part_2"]
+ADDITIONAL_DATA_3_BLOCK = REGISTER_BLOCKS["additional_data_3"]
+GRID_PHASE_DATA_BLOCK = REGISTER_BLOCKS["grid_phase_data"]
+BATTERY_DATA_BLOCK = REGISTER_BLOCKS["battery_data"]
+FIRST_CHARGE_DATA_BLOCK = REGISTER_BLOCKS["first_charge_data"]
+
+# Blocks read by the poll cycle, each at the rate of its tier
+POLL_BLOCKS = [block for block in REGISTER_BLOCKS.values() if block.tier != TIER_STATIC]
+
+CHARGING_ENABLED = "charging_enabled"
+# Slots of the coordinator data: every value of the register table, which
+# covers all profiles, and the charging state read next to the blocks
+SLOT_INDEX = SlotIndex.for_register_map(SAJ_H1_REGISTER_MAP, (CHARGING_ENABLED,))
+
+async def read_modbus_inverter_data(
+    connection: ModbusConnection,
+    arbiter: RequestArbiter,
+    metrics: Optional[ModbusMetrics] = None,
+    pacing: Optional[PacingController] = None,
+    unit: int = DEFAULT_UNIT_ID
+) -> DataDict:
+    """Reads basic inverter data."""
+    return await read_register_blocks(
+        connection, arbiter, [INVERTER_DATA_BLOCK], metrics=metrics, pacing=pacing, unit=unit
+    )
+
+CHARGING_STATE = "charging_state"
+
+async def read_charging_state(
+    connection: ModbusConnection,
+    arbiter: RequestArbiter,
+    metrics: Optional[ModbusMetrics] = None,
+    pacing: Optional[PacingController] = None,
+    unit: int = DEFAULT_UNIT_ID,
+    pipeline: Optional[ModbusPipeline] = None
+) -> bool:
+    """Reads the charging control register (0x3647)."""
+    if pipeline is not None and pipeline.usable:
+        # Keeps the cycle on the socket of the pipeline
+        results = await _read_pipelined(pipeline, connection, arbiter, [(0x3647, 1, [CHARGING_STATE])], unit, metrics)
+        if results and results[0].error is None:
+            return bool(results[0].registers[0])
+    regs = await try_read_registers(
+        connection, arbiter, unit, 0x3647, 1, metrics=metrics, blocks=[CHARGING_STATE], pacing=pacing
+    )
+    return bool(regs[0])
+
+CHARGE_SCHEDULE = "charge_schedule"
+FIRST_CHARGE_ADDRESS = 0x3606
+CHARGING_CONTROL_ADDRESS = 0x3647
+# Start, end, day mask and power percent of First Charge, and the charging switch
+CHARGE_SCHEDULE_ADDRESSES = (0x3606, 0x3607, 0x3608, CHARGING_CONTROL_ADDRESS)
+
+async def read_charge_schedule(
+    connection: ModbusConnection,
+    arbiter: RequestArbiter,
+    metrics: Optional[ModbusMetrics] = None,
+    pacing: Optional[PacingController] = None,
+    unit: int = DEFAULT_UNIT_ID,
+    single_request: bool = True
+) -> Tuple[Dict[int, int], bool]:
+    """Reads the First Charge registers (0x3606-0x3608) and the charging control register (0x3647).
+
+    With ``single_request`` one request covers all 66 registers from 0x3606 to
+    0x3647; if it fails, the two ranges are read with a request each. Returns
+    the registers by address and whether to try the single request next time,
+    which is only given up if the inverter rejects the registers in between
+    with an exception response.
+    """
+    count = CHARGING_CONTROL_ADDRESS - FIRST_CHARGE_ADDRESS + 1
+    if single_request:
+        try:
+            # Not retried and not counted as a failure, the two requests below are the fallback
+            regs = await try_read_registers(connection, arbiter, unit, FIRST_CHARGE_ADDRESS, count, max_retries=1)
+            return {address: regs[address - FIRST_CHARGE_ADDRESS] for address in CHARGE_SCHEDULE_ADDRESSES}, True
+        except ExceptionResponseError:
+            single_request = False
+            _LOGGER.info(
+                f"Registers {FIRST_CHARGE_ADDRESS:#06x} to {CHARGING_CONTROL_ADDRESS:#06x} cannot be read at once, "
+                "reading the charge schedule with two requests"
+            )
+        except ConnectionException as e:
+            if connection.circuit_open:
+                raise
+            # Probably a timeout, the next read-back tries the single request again
+            _LOGGER.debug(f"Reading the charge schedule at once failed, reading it with two requests: {e}")
+
+    first_charge = await try_read_registers(
+        connection, arbiter, unit, FIRST_CHARGE_ADDRESS, 3, metrics=metrics, blocks=[CHARGE_SCHEDULE], pacing=pacing
+    )
+    control = await try_read_registers(
+        connection, arbiter, unit, CHARGING_CONTROL_ADDRESS, 1, metrics=metrics, blocks=[CHARGE_SCHEDULE], pacing=pacing
+    )
+    registers = dict(zip(CHARGE_SCHEDULE_ADDRESSES, first_charge + control))
+    return registers, single_request
@@ -0,0 +1,129 @@
+"""Block decoders that are compiled once from decode instructions."""
+import struct
+from typing import Any, Dict, List, Optional, Sequence
+
+# struct format characters of the supported register types
+_FORMATS = {
+    "16u": ("H", 1),
+    "16i": ("h", 1),
+    "32u": ("I", 2),
+    "32i": ("i", 2),
+}
+
+
+class BlockDecoder:
+    """Decodes a whole register block with a single struct unpack.
+
+    Decode instructions have the form ``(key, method[, factor])`` like in
+    ``modbus_data_readers``: ``method`` is one of 16u, 16i, 32u, 32i, string
+    or skip_bytes (None selects the default), ``factor`` scales the value, or
+    gives the size in bytes for string and skip_bytes.
+    """
+
+    def __init__(
+        self,
+        instructions: Sequence[tuple],
+        count: int,
+        default_decoder: str = "16u",
+        default_factor: float = 0.01,
+        digits: int = 2
+    ) -> None:
+        self.count = count
+        self.digits = digits
+        self.keys: List[str] = []
+        self.scales: List[Optional[float]] = []
+        self._strings: List[bool] = []
+
+        fmt = ">"
+        size = 0
+        for instruction in instructions:
+            key, method, factor = (tuple(instruction) + (default_factor,))[:3]
+            method = method or default_decoder
+
+            if method in ("skip_bytes", "string"):
+                if factor % 2:
+                    raise ValueError(f"{method} needs an even number of bytes, got {factor}")
+                fmt += f"{int(factor)}{'x' if method == 'skip_bytes' else 's'}"
+                size += int(factor) // 2
+                if method == "string":
+                    self.keys.append(key)
+                    self.scales.append(None)
+                    self._strings.append(True)
+                continue
+
+            if method not in _FORMATS:
+                raise ValueError(f"Unknown decode method {method} for {key}")
+            char, registers = _FORMATS[method]
+            if not key:
+                fmt += f"{registers * 2}x"
+            else:
+                fmt += char
+                self.keys.append(key)
+                self.scales.append(None if factor == 1 else factor)
+                self._strings.append(False)
+            size += registers
+
+        if size > count:
+            raise ValueError(f"Decode instructions need {size} registers, the block only has {count}")
+        self._build(fmt)
+
+    def _build(self, fmt: str) -> None:
+        self._registers = struct.Struct(f">{self.count}H")
+        self._fields = struct.Struct(fmt)
+        self._has_strings = any(self._strings)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The compiled form of the decoder, JSON serializable."""
+        return {
+            "count": self.count,
+            "digits": self.digits,
+            "format": self.format,
+            "keys": self.keys,
+            "scales": self.scales,
+            "strings": self._strings,
+        }
+
+    @classmethod
+    def from_dict(cls, compiled: Dict[str, Any]) -> "BlockDecoder":
+        """Recreates a decoder from ``as_dict`` without going through the instructions again."""
+        decoder = cls.__new__(cls)
+        decoder.count = compiled["count"]
+        decoder.digits = compiled["digits"]
+        decoder.keys = list(compiled["keys"])
+        decoder.scales = list(compiled["scales"])
+        decoder._strings = list(compiled["strings"])
+        if not len(decoder.keys) == len(decoder.scales) == len(decoder._strings):
+            raise ValueError("Compiled decoder has inconsistent fields")
+        decoder._build(compiled["format"])
+        if decoder._fields.size > 2 * decoder.count:
+            raise ValueError(f"Compiled format needs {decoder._fields.size} bytes, the block only has {2 * decoder.count}")
+        return decoder
+
+    @property
+    def format(self) -> str:
+        """The struct format used to unpack the block."""
+        return self._fields.format
+
+    def decode(self, regs: Sequence[int]) -> Dict[str, Any]:
+        """Unpacks the registers of a block into a dict of scaled values.
+
+        Raises ``struct.error`` if the register count does not match the block.
+        """
+        return dict(zip(self.keys, self.decode_values(regs)))
+
+    def decode_values(self, regs: Sequence[int]) -> List[Any]:
+        """Unpacks the registers of a block into the scaled values, in the order of ``keys``.
+
+        Raises ``struct.error`` if the register count does not match the block.
+        """
+        raw = self._registers.pack(*regs)
+        values = self._fields.unpack_from(raw)
+        digits = self.digits
+
+        if self._has_strings:
+            values = [
+                value.decode("ascii", errors="replace").strip() if is_string else value
+                for value, is_string in zip(values, self._strings)
+            ]
+
+        return [value if scale is None else round(value * scale, digits) for value, scale in zip(values, self.scales)]
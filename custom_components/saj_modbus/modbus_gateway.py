@@ -0,0 +1,115 @@
+"""Connection, arbiter, pacing and pipeline shared by all inverters behind one Modbus TCP gateway."""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from .modbus_arbiter import RequestArbiter
+from .modbus_connection import ModbusConnection
+from .modbus_pacing import PacingController
+from .modbus_pipeline import DEFAULT_WINDOW, ModbusPipeline
+from .modbus_stats import ModbusMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _ConnectionMetrics:
+    """Records the connection events of a gateway in the metrics of every inverter behind it."""
+
+    def __init__(self, metrics: Dict[int, ModbusMetrics]) -> None:
+        self._metrics = metrics
+
+    def record_connect(self) -> None:
+        for metrics in self._metrics.values():
+            metrics.record_connect()
+
+    def record_disconnect(self) -> None:
+        for metrics in self._metrics.values():
+            metrics.record_disconnect()
+
+    def record_circuit_trip(self) -> None:
+        for metrics in self._metrics.values():
+            metrics.record_circuit_trip()
+
+
+class ModbusGateway:
+    """One TCP endpoint, e.g. an RS485-to-TCP gateway with several inverters on its bus.
+
+    The hubs of all inverters behind it share one connection, one request
+    arbiter and one pacing controller, so the gateway only ever sees one
+    socket and one request at a time. Their poll cycles run one after the
+    other through ``cycle()``, which also spreads them over the scan interval.
+    A directly connected inverter is a gateway with a single unit.
+    """
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self._metrics: Dict[int, ModbusMetrics] = {}
+        self.connection = ModbusConnection(host, port, metrics=_ConnectionMetrics(self._metrics))
+        self.arbiter = RequestArbiter(f"{host}:{port}")
+        # The pause between two requests depends on the gateway and its bus, not on the unit
+        self.pacing = PacingController()
+        # Created once a hub asks for pipelined reads
+        self.pipeline: Optional[ModbusPipeline] = None
+        self._cycle_lock = asyncio.Lock()
+        self._last_cycle: Optional[float] = None
+        self._last_unit: Optional[int] = None
+        self._last_used: Optional[float] = None
+
+    @property
+    def units(self) -> List[int]:
+        """The unit ids of the inverters polled through this gateway."""
+        return sorted(self._metrics)
+
+    @property
+    def shared(self) -> bool:
+        return len(self._metrics) > 1
+
+    def attach(self, unit: int, metrics: ModbusMetrics) -> None:
+        """Registers the hub of an inverter; its connection events are recorded in ``metrics``."""
+        if unit in self._metrics:
+            raise ValueError(f"Unit {unit} at {self.host}:{self.port} is already polled")
+        self._metrics[unit] = metrics
+
+    def enable_pipeline(self, window: int = DEFAULT_WINDOW) -> ModbusPipeline:
+        """Returns the pipeline of the gateway, creating it on first use."""
+        if self.pipeline is None:
+            self.pipeline = ModbusPipeline(self.host, self.port, self.connection.timeout, window)
+        return self.pipeline
+
+    def detach(self, unit: int) -> bool:
+        """Unregisters the hub of an inverter; returns True while other units still use the gateway."""
+        self._metrics.pop(unit, None)
+        return bool(self._metrics)
+
+    @asynccontextmanager
+    async def cycle(self, unit: int, interval: float) -> AsyncIterator[None]:
+        """Runs the poll cycle of a unit once no other unit is polling.
+
+        A cycle that follows the one of another unit starts at least
+        ``interval`` divided by the number of units after it, so that the
+        cycles spread over the interval instead of hitting the bus back to back.
+        """
+        async with self._cycle_lock:
+            if self.shared and self._last_cycle is not None and self._last_unit != unit:
+                wait = self._last_cycle + interval / len(self._metrics) - time.monotonic()
+                if wait > 0:
+                    _LOGGER.debug(f"Delaying the poll of unit {unit} at {self.host}:{self.port} by {wait:.1f} s")
+                    await asyncio.sleep(wait)
+            self._last_cycle = time.monotonic()
+            self._last_unit = unit
+            try:
+                yield
+            finally:
+                self._last_used = time.monotonic()
+
+    def idle_time(self) -> Optional[float]:
+        """Seconds since the last poll cycle through this gateway ended, None before the first one."""
+        return None if self._last_used is None else time.monotonic() - self._last_used
+
+    async def close(self) -> None:
+        if self.pipeline is not None:
+            await self.pipeline.disconnect()
+        await self.connection.close()
@@ -0,0 +1,82 @@
+"""Adaptive pause between two Modbus requests to the same inverter."""
+from typing import Any, Dict, Optional
+
+# The fixed pause the hub used before, and where a new controller starts
+DEFAULT_DELAY = 0.2
+MAX_DELAY = 2.0
+# Smallest pause that is added after a failure or a slow answer
+STEP = 0.05
+# Factor applied after a failure, and after every good answer while errors are rare;
+# pauses below MIN_DELAY become zero
+INCREASE = 1.5
+DECREASE = 0.8
+MIN_DELAY = 0.01
+# An answer counts as slow if it takes this many times the usual latency
+SLOW_FACTOR = 3.0
+# Latencies below this are never slow, whatever the baseline
+SLOW_FLOOR = 0.05
+# Weight of a new sample in the moving averages of latency and error rate
+LATENCY_ALPHA = 0.2
+ERROR_ALPHA = 0.1
+# The pause only shrinks while the error rate is below this
+ERROR_TOLERANCE = 0.05
+# The baseline latency rises this much per answer, so it follows a link that got slower for good
+BASELINE_DRIFT = 1.02
+
+
+class PacingController:
+    """Learns how much pause an inverter needs between two requests.
+
+    Every good answer shortens the pause, down to zero for gateways that answer
+    at once, unless requests failed recently. A failed request makes it half as
+    long again, an answer that takes much longer than usual adds a step, up to
+    ``maximum``. Busy WiFi dongles thus end up with the pause they need and
+    wired gateways with none.
+    """
+
+    def __init__(self, initial: float = DEFAULT_DELAY, minimum: float = 0.0, maximum: float = MAX_DELAY) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.delay = min(max(initial, minimum), maximum)
+        self.latency: Optional[float] = None
+        self.baseline: Optional[float] = None
+        self.error_rate = 0.0
+        self.increases = 0
+        self.decreases = 0
+
+    def record_response(self, latency: float) -> None:
+        """Adapts the pause to a request that was answered after ``latency`` seconds."""
+        self.error_rate *= 1 - ERROR_ALPHA
+        self.latency = latency if self.latency is None else self.latency + LATENCY_ALPHA * (latency - self.latency)
+        slow = self.baseline is not None and latency > max(SLOW_FLOOR, SLOW_FACTOR * self.baseline)
+        self.baseline = latency if self.baseline is None else min(self.baseline * BASELINE_DRIFT, latency)
+
+        if slow:
+            self._set_delay(self.delay + STEP)
+        elif self.error_rate < ERROR_TOLERANCE:
+            delay = self.delay * DECREASE
+            self._set_delay(0.0 if delay < MIN_DELAY else delay)
+
+    def record_failure(self) -> None:
+        """Adapts the pause to a request that failed or timed out."""
+        self.error_rate += ERROR_ALPHA * (1 - self.error_rate)
+        self._set_delay(max(self.delay * INCREASE, STEP))
+
+    def _set_delay(self, delay: float) -> None:
+        delay = min(max(delay, self.minimum), self.maximum)
+        if delay > self.delay:
+            self.increases += 1
+        elif delay < self.delay:
+            self.decreases += 1
+        self.delay = delay
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The current pacing for the diagnostics, times in seconds."""
+        return {
+            "delay": round(self.delay, 3),
+            "latency": None if self.latency is None else round(self.latency, 4),
+            "baseline_latency": None if self.baseline is None else round(self.baseline, 4),
+            "error_rate": round(self.error_rate, 3),
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
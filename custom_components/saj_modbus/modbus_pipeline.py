@@ -0,0 +1,260 @@
+"""Pipelined Modbus TCP reads: several transactions in flight on one socket.
+
+pymodbus sends a request only after the previous one was answered, so a poll
+cycle costs one round trip per request. Gateways that handle the transaction
+id of Modbus TCP properly accept several outstanding requests on one
+connection. ModbusPipeline frames the read requests itself (MBAP header and
+PDU), sends a window of them at once and matches the answers by transaction
+id, so that a whole sweep costs about one round trip.
+
+A probe checks whether the gateway can do this before the pipeline is used.
+A gateway that fails it, mixes up answers later or keeps leaving pipelined
+requests unanswered is read request by request again.
+"""
+import asyncio
+import logging
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+from .modbus_utils import is_timeout
+
+_LOGGER = logging.getLogger(__name__)
+
+# Transaction id, protocol id, length of unit id and PDU, unit id
+MBAP_HEADER = struct.Struct(">HHHB")
+READ_REQUEST = struct.Struct(">BHH")
+PROTOCOL_ID = 0
+READ_HOLDING_REGISTERS = 0x03
+EXCEPTION_FLAG = 0x80
+
+# Enough to send all block reads of a cycle at once
+DEFAULT_WINDOW = 8
+# The probe sends a full window of reads of the identity block; their counts
+# differ so that swapped answers are noticed
+PROBE_ADDRESS = 0x8F00
+# Sweeps in a row with unanswered requests after which the pipeline is given up
+MAX_TIMEOUT_SWEEPS = 3
+
+
+class PipelineError(ModbusIOException):
+    """The gateway answered pipelined requests wrongly; it is read request by request from now on."""
+
+
+@dataclass
+class PipelinedRead:
+    """Outcome of one read of a sweep: the registers or the error, and when the answer came."""
+    registers: Optional[List[int]] = None
+    error: Optional[Exception] = None
+    latency: float = 0.0
+
+
+class ModbusPipeline:
+    """Modbus TCP client for read requests that keeps up to ``window`` of them in flight.
+
+    ``supported`` is None until the probe ran, then True or False.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 10, window: int = DEFAULT_WINDOW) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.window = window
+        self.supported: Optional[bool] = None
+        self.reason: Optional[str] = None
+        self.sweeps = 0
+        self.max_in_flight = 0
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        # Future, register count and unit id of every request in flight by transaction id
+        self._pending: Dict[int, Tuple[asyncio.Future, int, int]] = {}
+        # Transactions that timed out; their answers may still come and are dropped
+        self._expired: Set[int] = set()
+        self._transaction_id = 0
+        self._timeout_sweeps = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def usable(self) -> bool:
+        """False once the gateway failed the probe or misbehaved."""
+        return self.supported is not False
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def _ensure_connected(self) -> None:
+        async with self._lock:
+            if self.connected:
+                return
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), timeout=self.timeout
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                raise ConnectionException(f"Pipelined connection to {self.host}:{self.port} failed: {e}") from e
+            self._read_task = asyncio.get_running_loop().create_task(self._read_loop(self._reader))
+            _LOGGER.debug(f"Opened pipelined connection to {self.host}:{self.port}")
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        """Hands every answer to the request with its transaction id.
+
+        Whatever ends the loop fails the requests still in flight, so none of
+        them waits for its timeout.
+        """
+        try:
+            while True:
+                header = await reader.readexactly(MBAP_HEADER.size)
+                transaction_id, protocol_id, length, unit = MBAP_HEADER.unpack(header)
+                if length < 2:
+                    # Unit id and function code at least
+                    raise PipelineError(f"Answer with invalid length {length} for transaction {transaction_id}")
+                pdu = await reader.readexactly(length - 1)
+                if transaction_id in self._expired:
+                    self._expired.discard(transaction_id)
+                    continue
+                pending = self._pending.get(transaction_id)
+                if pending is None or protocol_id != PROTOCOL_ID:
+                    raise PipelineError(f"Answer with unknown transaction id {transaction_id}")
+                future, count, requested_unit = pending
+                if unit != requested_unit:
+                    # Another inverter behind the gateway answered in its place
+                    raise PipelineError(
+                        f"Answer from unit {unit} to transaction {transaction_id} for unit {requested_unit}"
+                    )
+                answer = _decode_answer(pdu, count)
+                if not future.done():
+                    future.set_result(answer)
+        except PipelineError as e:
+            self._fail_pending(e)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            self._fail_pending(ConnectionException(f"Pipelined connection to {self.host}:{self.port} lost: {e}"))
+        except Exception as e:
+            _LOGGER.debug(f"Reading pipelined answers from {self.host}:{self.port} failed: {e}", exc_info=True)
+            self._fail_pending(PipelineError(f"Reading pipelined answers failed: {e}"))
+
+    def _fail_pending(self, error: Exception) -> None:
+        for future, _count, _unit in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def _read(self, unit: int, address: int, count: int, semaphore: asyncio.Semaphore) -> PipelinedRead:
+        async with semaphore:
+            if self._read_task is None or self._read_task.done():
+                # The sweep failed while this read waited for its turn
+                return PipelinedRead(error=ConnectionException(f"Pipelined connection to {self.host}:{self.port} closed"))
+            self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+            transaction_id = self._transaction_id
+            future = asyncio.get_running_loop().create_future()
+            self._pending[transaction_id] = (future, count, unit)
+            self.max_in_flight = max(self.max_in_flight, len(self._pending))
+            started = time.perf_counter()
+            try:
+                self._writer.write(
+                    MBAP_HEADER.pack(transaction_id, PROTOCOL_ID, READ_REQUEST.size + 1, unit)
+                    + READ_REQUEST.pack(READ_HOLDING_REGISTERS, address, count)
+                )
+                answer = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                self._expired.add(transaction_id)
+                answer = ModbusIOException(f"No response received for transaction {transaction_id}")
+            finally:
+                self._pending.pop(transaction_id, None)
+            latency = time.perf_counter() - started
+            if isinstance(answer, Exception):
+                return PipelinedRead(error=answer, latency=latency)
+            return PipelinedRead(registers=answer, latency=latency)
+
+    async def read_registers(self, requests: Sequence[Tuple[int, int]], unit: int) -> List[PipelinedRead]:
+        """Sends the reads (address, count) at once and returns their outcomes in the same order.
+
+        Raises ConnectionException if the gateway cannot be reached or drops
+        the connection, and PipelineError, after giving up the pipeline, if it
+        mixed up answers. Unanswered reads come back with an error; after
+        MAX_TIMEOUT_SWEEPS such sweeps in a row the pipeline is given up too.
+        """
+        if not self.usable:
+            raise PipelineError(f"Pipelining is disabled for {self.host}:{self.port}")
+        await self._ensure_connected()
+        semaphore = asyncio.Semaphore(self.window)
+        try:
+            reads = await asyncio.gather(*(self._read(unit, address, count, semaphore) for address, count in requests))
+        except PipelineError as e:
+            await self.disable(str(e))
+            raise
+        except ConnectionException:
+            await self.disconnect()
+            raise
+        self.sweeps += 1
+
+        if any(read.error is not None and is_timeout(read.error) for read in reads):
+            # Late answers must not reach the next sweep, they would carry unknown transaction ids
+            await self.disconnect()
+            self._timeout_sweeps += 1
+            if self._timeout_sweeps >= MAX_TIMEOUT_SWEEPS:
+                await self.disable(f"pipelined requests unanswered in {self._timeout_sweeps} sweeps in a row")
+        else:
+            self._timeout_sweeps = 0
+        return reads
+
+    async def probe(self, unit: int) -> bool:
+        """Sends a few reads at once and checks that every one gets its own answer; sets ``supported``."""
+        try:
+            reads = await self.read_registers([(PROBE_ADDRESS, count) for count in range(1, self.window + 1)], unit)
+        except PipelineError:
+            return False
+        errors = [read.error for read in reads if read.error is not None]
+        if errors:
+            await self.disable(f"probe failed: {errors[0]}")
+            return False
+        self.supported = True
+        _LOGGER.info(f"{self.host}:{self.port} answers pipelined requests, reading {self.window} blocks at once")
+        return True
+
+    async def disable(self, reason: str) -> None:
+        """Gives up the pipeline; the blocks are read request by request from now on."""
+        if self.supported is not False:
+            _LOGGER.warning(f"Not pipelining requests to {self.host}:{self.port} any more: {reason}")
+        self.supported = False
+        self.reason = reason
+        await self.disconnect()
+
+    async def disconnect(self) -> None:
+        """Closes the socket; the next sweep connects again."""
+        writer, self._writer = self._writer, None
+        read_task, self._read_task = self._read_task, None
+        if read_task is not None:
+            read_task.cancel()
+        self._expired.clear()
+        self._fail_pending(ConnectionException(f"Pipelined connection to {self.host}:{self.port} closed"))
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, ConnectionError):
+                pass
+
+    def as_dict(self) -> Dict[str, Any]:
+        """State of the pipeline for the diagnostics."""
+        return {
+            "supported": self.supported,
+            "reason": self.reason,
+            "window": self.window,
+            "sweeps": self.sweeps,
+            "max_in_flight": self.max_in_flight,
+            "connected": self.connected,
+        }
+
+
+def _decode_answer(pdu: bytes, count: int) -> Any:
+    """Returns the registers of a read answer, or the exception the inverter answered with."""
+    function_code = pdu[0] if pdu else 0
+    if function_code == READ_HOLDING_REGISTERS | EXCEPTION_FLAG and len(pdu) >= 2:
+        return ModbusIOException(f"Exception response {pdu[1]:#04x}")
+    if function_code != READ_HOLDING_REGISTERS or len(pdu) != 2 + 2 * count or pdu[1] != 2 * count:
+        raise PipelineError(f"Answer does not match its request: {pdu[:8].hex()}")
+    return list(struct.unpack(f">{count}H", pdu[2:]))
@@ -0,0 +1,114 @@
+"""The Modbus part of a poll cycle, independent of Home Assistant.
+
+The hub runs it from its coordinator update; tools/benchmark_poll_cycle.py runs
+it against the simulator to measure what a cycle costs.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, List, Optional, Set, Tuple
+
+from .modbus_arbiter import RequestArbiter
+from .modbus_connection import ModbusConnection
+from .modbus_const import DEFAULT_UNIT_ID, MAX_FAILED_BLOCK_READS, TIER_STATIC
+from .modbus_data_readers import CHARGING_ENABLED, DataDict, RegisterBlock, read_charging_state, read_register_blocks
+from .modbus_pacing import PacingController
+from .modbus_pipeline import ModbusPipeline
+from .modbus_read_planner import ReadRequest
+from .modbus_stats import CycleStats, ModbusMetrics
+from .poll_scheduler import PollScheduler
+from .slot_data import SlotData
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def run_poll_cycle(
+    connection: ModbusConnection,
+    arbiter: RequestArbiter,
+    scheduler: PollScheduler,
+    max_gap: int = 0,
+    request_delay: float = 0.2,
+    settle_delay: float = 0.2,
+    stats: Optional[CycleStats] = None,
+    now: Optional[float] = None,
+    metrics: Optional[ModbusMetrics] = None,
+    planner: Optional[Callable[[List[RegisterBlock], int], List[ReadRequest]]] = None,
+    pacing: Optional[PacingController] = None,
+    unit: int = DEFAULT_UNIT_ID,
+    pipeline: Optional[ModbusPipeline] = None,
+    into: Optional[SlotData] = None,
+    changed_blocks: Optional[Set[str]] = None
+) -> Tuple[DataDict, Set[str]]:
+    """Reads the due register blocks and the charging state.
+
+    ``now`` is the time of the scheduler, the monotonic clock by default.
+    Latencies and errors of the reads are recorded in ``metrics`` if given,
+    ``planner`` supplies precompiled read plans. ``pacing`` replaces both fixed
+    delays by the pause it learns from the answers of the inverter. ``unit`` is
+    the Modbus unit id of the inverter. With ``pipeline`` the due blocks are
+    read in one pipelined sweep if the gateway supports it. With ``into`` the
+    values are written into its slots in place, and the blocks with a changed
+    value are added to ``changed_blocks``; a due block whose read failed
+    ``MAX_FAILED_BLOCK_READS`` times in a row has its slots cleared, except for
+    static blocks, whose values do not age.
+    Returns the decoded data and the names of the blocks that were read.
+    """
+    started = time.perf_counter()
+    cycle_start = time.monotonic() if now is None else now
+    due_blocks = scheduler.due_blocks(cycle_start)
+    read_blocks: Set[str] = set()
+
+    # The due blocks are coalesced into as few register reads as possible
+    data = await read_register_blocks(
+        connection, arbiter, due_blocks, max_gap, request_delay, read_blocks, stats, metrics, planner, pacing, unit, pipeline,
+        into, changed_blocks
+    )
+    scheduler.mark_read(read_blocks, cycle_start)
+    scheduler.mark_failed(block.name for block in due_blocks if block.name not in read_blocks)
+    if into is not None:
+        _track_block_reads(into, due_blocks, read_blocks, cycle_start, changed_blocks)
+
+    if pipeline is not None and pipeline.supported:
+        # Pipelined requests need no pause in between
+        settle_delay = 0
+    elif pacing is not None:
+        settle_delay = pacing.delay
+    if settle_delay:
+        sleep_started = time.perf_counter()
+        await asyncio.sleep(settle_delay)
+        if stats is not None:
+            stats.sleep_time += time.perf_counter() - sleep_started
+
+    # Separate call to query the current charging state
+    try:
+        data[CHARGING_ENABLED] = await read_charging_state(connection, arbiter, metrics, pacing, unit, pipeline)
+        if stats is not None:
+            stats.add_read(1)
+    except Exception as e:
+        _LOGGER.error(f"Error reading charging state: {e}")
+        data[CHARGING_ENABLED] = False
+        if stats is not None:
+            stats.add_failed_read()
+
+    if stats is not None:
+        stats.wall_time += time.perf_counter() - started
+    return data, read_blocks
+
+
+def _track_block_reads(
+    into: SlotData,
+    due_blocks: List[RegisterBlock],
+    read_blocks: Set[str],
+    now: float,
+    changed_blocks: Optional[Set[str]] = None
+) -> None:
+    """Records the reads of the due blocks in ``into`` and clears the blocks that keep failing."""
+    for block in due_blocks:
+        if block.name in read_blocks:
+            into.mark_read(block.name, now)
+        elif into.mark_failed(block.name, block.keys, None if block.tier == TIER_STATIC else MAX_FAILED_BLOCK_READS):
+            _LOGGER.warning(
+                f"Block {block.name} could not be read {into.failed_reads(block.name)} times in a row, clearing its values"
+            )
+            if changed_blocks is not None:
+                changed_blocks.add(block.name)
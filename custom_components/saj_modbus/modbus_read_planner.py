@@ -0,0 +1,70 @@
+"""Read planner that coalesces register spans into as few Modbus requests as possible."""
+from dataclasses import dataclass, field
+from typing import Iterable, List, Sequence
+
+# Modbus limits a single FC3 request to 125 holding registers
+MAX_READ_REGISTERS = 125
+
+
+@dataclass(frozen=True)
+class RegisterSpan:
+    """A contiguous range of registers that one decoder needs."""
+    name: str
+    address: int
+    count: int
+
+    @property
+    def end(self) -> int:
+        """First register address after the span."""
+        return self.address + self.count
+
+
+@dataclass
+class ReadRequest:
+    """A single read request covering one or more register spans."""
+    address: int
+    count: int
+    spans: List[RegisterSpan] = field(default_factory=list)
+
+    @property
+    def end(self) -> int:
+        """First register address after the request."""
+        return self.address + self.count
+
+    def slice(self, registers: Sequence[int], span: RegisterSpan) -> List[int]:
+        """Returns the part of a merged response that belongs to the given span."""
+        offset = span.address - self.address
+        return list(registers[offset:offset + span.count])
+
+
+def plan_reads(
+    spans: Iterable[RegisterSpan],
+    max_gap: int = 0,
+    max_count: int = MAX_READ_REGISTERS,
+) -> List[ReadRequest]:
+    """Merges register spans into read requests.
+
+    Overlapping and adjacent spans are always merged. Spans separated by at most
+    ``max_gap`` unused registers are merged as well, as long as the resulting
+    request does not exceed ``max_count`` registers.
+    """
+    if max_gap < 0:
+        raise ValueError("max_gap must not be negative")
+
+    requests: List[ReadRequest] = []
+    for span in sorted(spans, key=lambda s: (s.address, s.count)):
+        if span.count < 1 or span.count > max_count:
+            raise ValueError(f"Span {span.name} has an invalid register count: {span.count}")
+
+        current = requests[-1] if requests else None
+        if (
+            current is not None
+            and span.address - current.end <= max_gap
+            and max(current.end, span.end) - current.address <= max_count
+        ):
+            current.count = max(current.end, span.end) - current.address
+            current.spans.append(span)
+        else:
+            requests.append(ReadRequest(span.address, span.count, [span]))
+
+    return requests
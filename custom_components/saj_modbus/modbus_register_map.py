@@ -0,0 +1,212 @@
+"""Declarative register tables and the engine that compiles them.
+
+A register table lists the blocks that are read from the inverter and, for
+every block, the registers in it with type, scale and the sensor they feed.
+The read planner, the block decoders and the sensor descriptions are all
+generated from it, so offsets and skip_bytes are never written by hand.
+"""
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .modbus_const import TIER_FAST, TIER_NORMAL, TIER_SLOW, TIER_STATIC
+from .modbus_decoder import BlockDecoder
+from .modbus_read_planner import MAX_READ_REGISTERS
+
+# Register types and the number of registers they occupy; strings give their size
+REGISTER_TYPES = {"16u": 1, "16i": 1, "32u": 2, "32i": 2, "string": None}
+TIERS = (TIER_FAST, TIER_NORMAL, TIER_SLOW, TIER_STATIC)
+
+
+class RegisterMapError(ValueError):
+    """Raised when a register table is inconsistent."""
+
+
+@dataclass(frozen=True)
+class SensorSpec:
+    """The sensor entity a value is shown as; ``group`` selects the sensor group in const."""
+    group: str
+    name: str
+    icon: Optional[str] = None
+    enabled: bool = True
+    unit: Optional[str] = None  # overrides the unit of the group
+
+
+@dataclass(frozen=True)
+class Register:
+    """One value in a block: a 16 or 32 bit number, or a string of ``size`` registers."""
+    key: str
+    address: int
+    type: str = "16u"
+    scale: float = 1
+    sensor: Optional[SensorSpec] = None
+    size: Optional[int] = None
+
+    @property
+    def count(self) -> int:
+        return self.size if self.type == "string" else REGISTER_TYPES[self.type]
+
+    @property
+    def end(self) -> int:
+        return self.address + self.count
+
+
+@dataclass(frozen=True)
+class DerivedValue:
+    """A value computed from the decoded registers of its block by the block's ``derive``."""
+    key: str
+    sensor: Optional[SensorSpec] = None
+
+
+@dataclass(frozen=True)
+class BlockDefinition:
+    """A register range that is read and decoded as a unit."""
+    name: str
+    address: int
+    count: int
+    registers: Tuple[Register, ...]
+    tier: str = TIER_NORMAL
+    digits: int = 2
+    # Turns the decoded registers into the final values, e.g. status texts
+    derive: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+    derived: Tuple[DerivedValue, ...] = ()
+
+    @property
+    def end(self) -> int:
+        return self.address + self.count
+
+
+class RegisterMap:
+    """A validated register table, indexed by block name, register address and key."""
+
+    def __init__(self, blocks: Iterable[BlockDefinition]) -> None:
+        self.blocks: Dict[str, BlockDefinition] = {}
+        self.by_address: Dict[int, Register] = {}
+        self.by_key: Dict[str, Register] = {}
+        self.derived: Dict[str, DerivedValue] = {}
+        self._block_of_key: Dict[str, str] = {}
+
+        for block in blocks:
+            self._add_block(block)
+        self._check_block_overlaps()
+
+    def _add_block(self, block: BlockDefinition) -> None:
+        if block.name in self.blocks:
+            raise RegisterMapError(f"Block {block.name} is defined twice")
+        if not 1 <= block.count <= MAX_READ_REGISTERS:
+            raise RegisterMapError(f"Block {block.name} has {block.count} registers, 1 to {MAX_READ_REGISTERS} are allowed")
+        if block.tier not in TIERS:
+            raise RegisterMapError(f"Block {block.name} uses unknown tier {block.tier}")
+        if block.derived and block.derive is None:
+            raise RegisterMapError(f"Block {block.name} has derived values but no derive function")
+
+        previous: Optional[Register] = None
+        for register in sorted(block.registers, key=lambda r: r.address):
+            self._check_register(block, register)
+            if previous is not None and register.address < previous.end:
+                raise RegisterMapError(f"{register.key} at {register.address:#06x} overlaps {previous.key}")
+            if register.address in self.by_address:
+                raise RegisterMapError(f"Register {register.address:#06x} is defined twice")
+            self.by_address[register.address] = register
+            self._add_key(register.key, block)
+            self.by_key[register.key] = register
+            previous = register
+
+        for value in block.derived:
+            self._add_key(value.key, block)
+            self.derived[value.key] = value
+        self.blocks[block.name] = block
+
+    def _check_register(self, block: BlockDefinition, register: Register) -> None:
+        if register.type not in REGISTER_TYPES:
+            raise RegisterMapError(f"{register.key} has unknown type {register.type}")
+        if register.type == "string":
+            if not register.size or register.size < 1:
+                raise RegisterMapError(f"String {register.key} needs a size in registers")
+        elif register.size is not None:
+            raise RegisterMapError(f"{register.key}: only strings have a size")
+        if register.scale <= 0:
+            raise RegisterMapError(f"{register.key} has scale {register.scale}")
+        if register.address < block.address or register.end > block.end:
+            raise RegisterMapError(
+                f"{register.key} at {register.address:#06x} lies outside block {block.name} "
+                f"({block.address:#06x}-{block.end - 1:#06x})"
+            )
+
+    def _add_key(self, key: str, block: BlockDefinition) -> None:
+        if key in self._block_of_key:
+            raise RegisterMapError(f"Key {key} is used in {self._block_of_key[key]} and {block.name}")
+        self._block_of_key[key] = block.name
+
+    def _check_block_overlaps(self) -> None:
+        ordered = sorted(self.blocks.values(), key=lambda b: b.address)
+        for first, second in zip(ordered, ordered[1:]):
+            if second.address < first.end:
+                raise RegisterMapError(f"Blocks {first.name} and {second.name} overlap")
+
+    def block_of(self, key: str) -> BlockDefinition:
+        """Returns the block that produces a key."""
+        return self.blocks[self._block_of_key[key]]
+
+    def keys(self, block_name: str) -> List[str]:
+        """Returns the keys a block produces, registers first, then derived values."""
+        block = self.blocks[block_name]
+        return [register.key for register in block.registers] + [value.key for value in block.derived]
+
+    def blocks_for(self, keys: Iterable[str]) -> List[str]:
+        """Returns the names of the blocks that produce at least one of the keys, in table order.
+
+        Keys that are not in the table are ignored.
+        """
+        needed = {self._block_of_key[key] for key in keys if key in self._block_of_key}
+        return [name for name in self.blocks if name in needed]
+
+    def sensors(self) -> Iterator[Tuple[str, SensorSpec]]:
+        """Yields key and sensor of every value that is shown as a sensor, in table order."""
+        for block in self.blocks.values():
+            for value in (*block.registers, *block.derived):
+                if value.sensor is not None:
+                    yield value.key, value.sensor
+
+    def without(self, keys: Iterable[str] = (), blocks: Iterable[str] = ()) -> "RegisterMap":
+        """Returns a copy of the table without the given registers and blocks.
+
+        Blocks shrink to the registers that are left, blocks without registers are dropped.
+        Unused registers at the edges of a block are kept unless a removed register lay beyond them.
+        """
+        keys, blocks = set(keys), set(blocks)
+        unknown = (keys - set(self.by_key)) | (blocks - set(self.blocks))
+        if unknown:
+            raise RegisterMapError(f"Unknown registers or blocks: {', '.join(sorted(unknown))}")
+
+        remaining = []
+        for block in self.blocks.values():
+            registers = tuple(register for register in block.registers if register.key not in keys)
+            if block.name in blocks or not registers:
+                continue
+            address, end = block.address, block.end
+            if min(register.address for register in registers) > min(register.address for register in block.registers):
+                address = min(register.address for register in registers)
+            if max(register.end for register in registers) < max(register.end for register in block.registers):
+                end = max(register.end for register in registers)
+            remaining.append(replace(block, address=address, count=end - address, registers=registers))
+        return RegisterMap(remaining)
+
+    def compile(self, block_name: str, keys: Optional[Set[str]] = None) -> BlockDecoder:
+        """Compiles the decoder of a block.
+
+        Registers whose key is not in ``keys`` are skipped instead of decoded.
+        """
+        block = self.blocks[block_name]
+        instructions: List[tuple] = []
+        position = block.address
+        for register in sorted(block.registers, key=lambda r: r.address):
+            if keys is not None and register.key not in keys:
+                continue
+            if register.address > position:
+                instructions.append((None, "skip_bytes", 2 * (register.address - position)))
+            if register.type == "string":
+                instructions.append((register.key, "string", 2 * register.size))
+            else:
+                instructions.append((register.key, register.type, register.scale))
+            position = register.end
+        return BlockDecoder(instructions, block.count, digits=block.digits)
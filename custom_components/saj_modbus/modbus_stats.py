@@ -0,0 +1,198 @@
+"""Measurements of poll cycles and of the Modbus traffic of a hub."""
+from bisect import bisect_left
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional, Sequence
+
+# Modbus TCP frame sizes of a register read: MBAP header (7) + function code,
+# address and count (5); the response carries a byte count and two bytes per register
+READ_REQUEST_BYTES = 12
+READ_RESPONSE_OVERHEAD_BYTES = 9
+
+
+@dataclass
+class CycleStats:
+    """What one poll cycle cost: requests, bytes and where the time went.
+
+    Times are in seconds. ``bytes_sent`` and ``bytes_received`` are counted from
+    the frame sizes of successful reads, retries are not included.
+    """
+    wall_time: float = 0.0
+    requests: int = 0
+    failed_requests: int = 0
+    registers: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    decode_time: float = 0.0
+    sleep_time: float = 0.0
+
+    def add_read(self, count: int) -> None:
+        """Records a successful read of ``count`` registers."""
+        self.requests += 1
+        self.registers += count
+        self.bytes_sent += READ_REQUEST_BYTES
+        self.bytes_received += READ_RESPONSE_OVERHEAD_BYTES + 2 * count
+
+    def add_failed_read(self) -> None:
+        self.requests += 1
+        self.failed_requests += 1
+
+    @property
+    def io_time(self) -> float:
+        """Wall time that was neither spent decoding nor sleeping."""
+        return max(0.0, self.wall_time - self.decode_time - self.sleep_time)
+
+
+# Upper bounds of the latency histogram buckets in seconds, the last bucket is open
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+
+class LatencyHistogram:
+    """Counts durations in fixed buckets; keeps no samples, so it never grows."""
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last: Optional[float] = None
+
+    def add(self, seconds: float) -> None:
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Returns the upper bound of the bucket holding the given fraction of the samples.
+
+        Samples in the open bucket are reported as the largest duration seen.
+        """
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        buckets = {f"le_{int(bound * 1000)}ms": count for bound, count in zip(self.bounds, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "last": _round(self.last),
+            "mean": _round(self.mean),
+            "p50": _round(self.percentile(0.5)),
+            "p95": _round(self.percentile(0.95)),
+            "max": _round(self.max) if self.count else None,
+            "buckets": buckets,
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 4)
+
+
+@dataclass
+class BlockMetrics:
+    """Read statistics of one register block."""
+    reads: int = 0
+    failures: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "reads": self.reads,
+            "failures": self.failures,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "latency": self.latency.as_dict(),
+        }
+
+
+class ModbusMetrics:
+    """Long running statistics of a hub: read latencies, errors and connection churn.
+
+    Reads are recorded per register block; a request that carries several
+    merged blocks counts for each of them, the totals count it once.
+    """
+
+    def __init__(self) -> None:
+        self.blocks: Dict[str, BlockMetrics] = {}
+        self.cycle_duration = LatencyHistogram()
+        self.cycles = 0
+        self.connects = 0
+        self.disconnects = 0
+        self.circuit_trips = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.last_cycle: Optional[CycleStats] = None
+
+    def block(self, name: str) -> BlockMetrics:
+        metrics = self.blocks.get(name)
+        if metrics is None:
+            metrics = self.blocks[name] = BlockMetrics()
+        return metrics
+
+    def record_read(self, blocks: Sequence[str], latency: float) -> None:
+        """Records the latency of a successful request."""
+        for name in blocks:
+            metrics = self.block(name)
+            metrics.reads += 1
+            metrics.latency.add(latency)
+
+    def record_attempt_failed(self, blocks: Sequence[str], timeout: bool, retried: bool) -> None:
+        """Records a failed attempt of a request, which is retried or given up."""
+        self.timeouts += timeout
+        if retried:
+            self.retries += 1
+        else:
+            self.failures += 1
+        for name in blocks:
+            metrics = self.block(name)
+            if timeout:
+                metrics.timeouts += 1
+            if retried:
+                metrics.retries += 1
+            else:
+                metrics.failures += 1
+
+    def record_connect(self) -> None:
+        self.connects += 1
+
+    def record_disconnect(self) -> None:
+        self.disconnects += 1
+
+    def record_circuit_trip(self) -> None:
+        self.circuit_trips += 1
+
+    def record_cycle(self, duration: float, stats: Optional[CycleStats] = None) -> None:
+        self.cycles += 1
+        self.cycle_duration.add(duration)
+        if stats is not None:
+            self.last_cycle = stats
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "cycles": self.cycles,
+            "cycle_duration": self.cycle_duration.as_dict(),
+            "last_cycle": asdict(self.last_cycle) if self.last_cycle else None,
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "circuit_trips": self.circuit_trips,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "blocks": {name: metrics.as_dict() for name, metrics in sorted(self.blocks.items())},
+        }
@@ -1,9 +1,17 @@
 import asyncio
 import logging
-from typing import List, Optional
+import socket
+import time
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence
 import inspect
 from pymodbus.client import AsyncModbusTcpClient
 from pymodbus.exceptions import ConnectionException, ModbusIOException
+from .modbus_arbiter import RequestArbiter
+from .modbus_pacing import PacingController
+from .modbus_stats import ModbusMetrics
+
+if TYPE_CHECKING:
+    from .modbus_connection import ModbusConnection
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -30,69 +38,141 @@ async def safe_close(client: Optional[AsyncModbusTcpClient]) -> bool:
     finally:
         client = None
 
-async def close(client: Optional[AsyncModbusTcpClient], closing_flag: bool, connection_lock: asyncio.Lock) -> None:
-    """Closes the Modbus connection with improved resource management."""
-    if closing_flag:
-        return
+def _client_transport(client: AsyncModbusTcpClient) -> Optional[Any]:
+    """Returns the asyncio transport of the client, if there is one."""
+    ctx = getattr(client, "ctx", None)
+    transport = getattr(ctx, "transport", None) if ctx is not None else None
+    return transport or getattr(client, "transport", None)
+
+def is_connection_usable(client: Optional[AsyncModbusTcpClient]) -> bool:
+    """Returns True if the client is connected and its socket is not half-closed."""
+    if not client or not client.connected:
+        return False
+    transport = _client_transport(client)
+    return transport is None or not transport.is_closing()
+
+def enable_tcp_keepalive(
+    client: AsyncModbusTcpClient,
+    idle: int = 30,
+    interval: int = 10,
+    count: int = 3
+) -> bool:
+    """Enables TCP keepalive so that half-open connections are detected by the OS."""
+    transport = _client_transport(client)
+    sock = transport.get_extra_info("socket") if transport else None
+    if sock is None:
+        return False
 
-    closing_flag = True
     try:
-        async with asyncio.timeout(5.0):
-            async with connection_lock:
-                await safe_close(client)
-    except (asyncio.TimeoutError, Exception) as e:
-        _LOGGER.warning(f"Error during close: {e}", exc_info=True)
-    finally:
-        closing_flag = False
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # The fine-grained options are not available on every platform
+        for option, value in (("TCP_KEEPIDLE", idle), ("TCP_KEEPINTVL", interval), ("TCP_KEEPCNT", count)):
+            if hasattr(socket, option):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+        return True
+    except OSError as e:
+        _LOGGER.debug(f"Could not enable TCP keepalive: {e}")
+        return False
 
 async def ensure_connection(client: Optional[AsyncModbusTcpClient], host: str, port: int) -> AsyncModbusTcpClient:
     """Ensure the Modbus connection is established and stable."""
-    if client and client.connected:
+    if is_connection_usable(client):
         return client
 
+    if client and client.connected:
+        _LOGGER.info("Modbus connection is half-closed, reconnecting.")
+        await safe_close(client)
+
     client = client or AsyncModbusTcpClient(host=host, port=port, timeout=10)
     try:
-        await asyncio.wait_for(client.connect(), timeout=10)
+        if not await asyncio.wait_for(client.connect(), timeout=10):
+            raise ConnectionException(f"Connection to {host}:{port} refused")
         _LOGGER.info("Successfully connected to Modbus server.")
+        enable_tcp_keepalive(client)
         return client
     except Exception as e:
-        _LOGGER.warning(f"Error during connection attempt: {e}", exc_info=True)
+        # The connection owner decides how loud a failed attempt is
+        _LOGGER.debug(f"Error during connection attempt: {e}")
         raise ConnectionException("Failed to connect to Modbus server.") from e
 
+class ExceptionResponseError(ConnectionException):
+    """The inverter answered a read with a Modbus exception response, e.g. for registers it does not have."""
+
+    def __init__(self, address: int, exception_code: Optional[int]) -> None:
+        self.exception_code = exception_code
+        code = f"{exception_code:#04x}" if exception_code is not None else "without code"
+        super().__init__(f"Exception response {code} from address {address}")
+
+def is_timeout(error: BaseException) -> bool:
+    """Returns True if a request failed because the inverter did not answer in time."""
+    # pymodbus reports unanswered requests as ModbusIOException
+    return isinstance(error, asyncio.TimeoutError) or "No response received" in str(error)
+
 async def try_read_registers(
-    client: AsyncModbusTcpClient,
-    read_lock: asyncio.Lock,
+    connection: "ModbusConnection",
+    arbiter: RequestArbiter,
     unit: int,
     address: int,
     count: int,
-    max_retries: int = 3,
-    base_delay: float = 2.0
+    max_retries: int = 2,
+    retry_delay: float = 0.5,
+    metrics: Optional[ModbusMetrics] = None,
+    blocks: Sequence[str] = (),
+    pacing: Optional[PacingController] = None
 ) -> List[int]:
-    """Reads Modbus registers with optimized error handling."""
+    """Reads Modbus registers, retrying once after a short pause.
+
+    Transport failures are reported to the connection, which reconnects in the
+    background; while its circuit is open this fails at once instead of waiting.
+    Exception responses and other invalid answers are answers nonetheless: they
+    count as a response for the connection and ``pacing`` and end in
+    ExceptionResponseError or ConnectionException if the retry fails as well.
+    Latency, retries and timeouts are recorded in ``metrics`` for the given block names.
+    ``unit`` addresses the inverter behind a gateway.
+    """
     for attempt in range(max_retries):
         try:
-            async with read_lock:
-                response = await client.read_holding_registers(address=address, count=count)
-            
-            if (not response) or response.isError() or len(response.registers) != count:
-                raise ModbusIOException(f"Invalid response from address {address}")
-                
-            return response.registers
-            
-        except (ModbusIOException, ConnectionException) as e:
-            _LOGGER.error(f"Read attempt {attempt + 1} failed at address {address}: {e}")
-            if attempt < max_retries - 1:
-                delay = min(base_delay * (2 ** attempt), 10.0)
-                await asyncio.sleep(delay)
-                if not await safe_close(client):
-                    _LOGGER.warning("Failed to safely close the Modbus client.")
-                try:
-                    client = AsyncModbusTcpClient(host=client.host, port=client.port, timeout=10)
-                    await ensure_connection(client, client.host, client.port)
-                except ConnectionException:
-                    _LOGGER.error("Failed to reconnect Modbus client.")
-                    continue
-                else:
-                    _LOGGER.info("Reconnected Modbus client successfully.")
-    _LOGGER.error(f"Failed to read registers from unit {unit}, address {address} after {max_retries} attempts")
-    raise ConnectionException(f"Read operation failed for address {address} after {max_retries} attempts")
\ No newline at end of file
+            client = await connection.get_client()
+        except ConnectionException:
+            if metrics is not None:
+                metrics.record_attempt_failed(blocks, timeout=False, retried=False)
+            raise
+
+        timeout = False
+        try:
+            async with arbiter:
+                started = time.perf_counter()
+                response = await client.read_holding_registers(address=address, count=count, slave=unit)
+                latency = time.perf_counter() - started
+        except (ModbusIOException, ConnectionException, asyncio.TimeoutError) as e:
+            error: Exception = e
+            timeout = is_timeout(e)
+            if timeout or isinstance(e, ConnectionException):
+                connection.report_failure(e)
+            if pacing is not None:
+                pacing.record_failure()
+        else:
+            # The inverter answered, so the connection itself is fine
+            connection.report_success()
+            if pacing is not None:
+                pacing.record_response(latency)
+            if response and not response.isError() and len(response.registers) == count:
+                if metrics is not None:
+                    metrics.record_read(blocks, latency)
+                return response.registers
+            if response and response.isError():
+                error = ExceptionResponseError(address, getattr(response, "exception_code", None))
+            else:
+                error = ModbusIOException(f"Invalid response from address {address}")
+
+        retried = attempt < max_retries - 1 and not connection.circuit_open
+        if metrics is not None:
+            metrics.record_attempt_failed(blocks, timeout, retried)
+        _LOGGER.warning(f"Read attempt {attempt + 1} failed at address {address}: {error}")
+        if not retried:
+            if isinstance(error, ExceptionResponseError):
+                raise error
+            raise ConnectionException(f"Read operation failed for address {address}: {error}") from error
+        await asyncio.sleep(retry_delay)
+
+    raise ConnectionException(f"Read operation failed for address {address} after {max_retries} attempts")
@@ -0,0 +1,131 @@
+"""Debounced queue that merges register writes into as few transactions as possible."""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+FULL_MASK = 0xFFFF
+
+
+@dataclass
+class PendingWrite:
+    """A register value of which only the bits in ``mask`` are known."""
+    value: int
+    mask: int = FULL_MASK
+
+    @property
+    def complete(self) -> bool:
+        return self.mask == FULL_MASK
+
+    def merge(self, value: int, mask: int) -> None:
+        self.value = (self.value & ~mask) | (value & mask)
+        self.mask |= mask
+
+    def apply(self, current: int) -> int:
+        """Returns the register value with the pending bits written over ``current``."""
+        return (current & ~self.mask & FULL_MASK) | (self.value & self.mask)
+
+
+def group_adjacent(writes: Dict[int, PendingWrite]) -> List[Tuple[int, List[PendingWrite]]]:
+    """Groups pending writes into runs of consecutive register addresses."""
+    runs: List[Tuple[int, List[PendingWrite]]] = []
+    for address in sorted(writes):
+        if runs and runs[-1][0] + len(runs[-1][1]) == address:
+            runs[-1][1].append(writes[address])
+        else:
+            runs.append((address, [writes[address]]))
+    return runs
+
+
+class ModbusWriteQueue:
+    """Collects register writes and flushes them shortly after the last change.
+
+    Changes that arrive within the debounce delay are merged, partial writes
+    to the same register are combined bit by bit, and the flush callback
+    receives all pending registers at once so it can write adjacent ones in a
+    single transaction. Callers that need to know whether their write went
+    through use async_write, which waits for the flush that carries it.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[Dict[int, PendingWrite]], Awaitable[None]],
+        debounce: float = 0.5
+    ) -> None:
+        self._flush = flush
+        self._debounce = debounce
+        self._pending: Dict[int, PendingWrite] = {}
+        # Callers of async_write waiting for the flush of the pending registers
+        self._waiters: List[asyncio.Future] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._pending)
+
+    def set_register(self, address: int, value: int, mask: int = FULL_MASK) -> None:
+        """Queues a write of the bits in ``mask`` of a register and restarts the debounce timer."""
+        pending = self._pending.get(address)
+        if pending is None:
+            self._pending[address] = PendingWrite(value & mask, mask)
+        else:
+            pending.merge(value, mask)
+
+        if self._timer is not None:
+            self._timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(self._debounce, self._start_flush)
+
+    async def async_write(self, address: int, value: int, mask: int = FULL_MASK) -> None:
+        """Queues a write like set_register and waits until it is flushed.
+
+        Raises the error of the flush if the registers could not be written.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.set_register(address, value, mask)
+        await waiter
+
+    def _start_flush(self) -> None:
+        self._timer = None
+        self._task = asyncio.get_running_loop().create_task(self.async_flush())
+
+    async def async_flush(self, raise_errors: bool = False) -> None:
+        """Writes all pending registers immediately.
+
+        Errors are handed to the callers waiting in async_write, and logged or
+        raised with ``raise_errors`` for callers that report them themselves.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            writes, self._pending = self._pending, {}
+            waiters, self._waiters = self._waiters, []
+            try:
+                await self._flush(writes)
+            except Exception as e:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                if raise_errors:
+                    raise
+                if not waiters:
+                    _LOGGER.error(f"Error writing registers {', '.join(hex(a) for a in writes)}: {e}")
+            else:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+
+    async def async_shutdown(self) -> None:
+        """Flushes what is still pending and stops the queue."""
+        await self.async_flush()
+        if self._task is not None and not self._task.done():
+            await self._task
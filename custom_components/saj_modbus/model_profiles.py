@@ -0,0 +1,206 @@
+"""Register profiles of the supported inverter models and their compiled read plans.
+
+A profile is the part of the register table a model actually has. The hub
+picks it after reading the identity block at 0x8F00 and from then on reads
+and decodes only its blocks. Decoders and read plans of a profile are
+compiled once and can be stored with ``CompiledProfile.as_dict``; a stored
+profile is only used again if its version matches.
+"""
+import logging
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .modbus_const import TIER_STATIC
+from .modbus_data_readers import RegisterBlock, build_register_blocks
+from .modbus_decoder import BlockDecoder
+from .modbus_read_planner import MAX_READ_REGISTERS, ReadRequest, RegisterSpan, plan_reads
+from .modbus_register_map import RegisterMap
+from .saj_h1_registers import SAJ_H1_REGISTER_MAP
+
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_H1_SINGLE_PHASE = "h1_single_phase"
+PROFILE_H1_THREE_PHASE = "h1_three_phase"
+PROFILE_ALL_REGISTERS = "all_registers"
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    """The registers of one inverter model."""
+    name: str
+    title: str
+    # Increase whenever the registers of the profile change, it invalidates stored plans
+    version: int
+    register_map: RegisterMap
+    # Model codes at the start of the serial number, e.g. H1S2602J... for an H1 single phase 6 kW
+    serial_prefixes: Tuple[str, ...] = ()
+
+
+# Registers the single phase H1 does not have according to its protocol map
+_SECOND_AND_THIRD_PHASE = [
+    f"{phase}Grid{value}"
+    for phase in "ST"
+    for value in ("Volt", "Curr", "Freq", "DCI", "PowerWatt", "PowerVA", "PowerPF")
+]
+_PV3_AND_PV4 = [f"pv{number}{value}" for number in (3, 4) for value in ("Voltage", "TotalCurrent", "Power")]
+
+PROFILES: Dict[str, ModelProfile] = {
+    profile.name: profile
+    for profile in (
+        ModelProfile(
+            PROFILE_H1_SINGLE_PHASE, "SAJ H1 single phase", 2,
+            SAJ_H1_REGISTER_MAP.without(_SECOND_AND_THIRD_PHASE + _PV3_AND_PV4, ["additional_data_3"]),
+            ("H1S",),
+        ),
+        ModelProfile(PROFILE_H1_THREE_PHASE, "SAJ H1 three phase", 2, SAJ_H1_REGISTER_MAP, ("H1T",)),
+        # Not a model and matches no serial number; H2 and other inverters without a profile of their own get it
+        ModelProfile(PROFILE_ALL_REGISTERS, "SAJ (all registers)", 1, SAJ_H1_REGISTER_MAP),
+    )
+}
+
+# Unknown models get every register, which is what the integration always read
+DEFAULT_PROFILE = PROFILE_ALL_REGISTERS
+
+
+def device_type_key(inverter_data: Dict[str, Any]) -> Optional[str]:
+    """Returns the key of the devtype/subtype pair reported by the inverter."""
+    if inverter_data.get("devtype") is None or inverter_data.get("subtype") is None:
+        return None
+    return f"{inverter_data['devtype']}:{inverter_data['subtype']}"
+
+
+def select_profile(
+    inverter_data: Dict[str, Any],
+    known_device_types: Optional[Dict[str, str]] = None,
+    model: Optional[str] = None
+) -> Tuple[ModelProfile, str]:
+    """Selects the profile of an inverter and tells how it was found.
+
+    A configured ``model`` wins. Otherwise the model code in the serial
+    number selects the profile, then the profile recorded for the
+    devtype/subtype pair, then the default profile with every register.
+    A recorded pair never overrides the serial number: different models
+    may report the same pair.
+    """
+    if model in PROFILES:
+        return PROFILES[model], "configured"
+
+    serial = str(inverter_data.get("sn") or "").upper()
+    for profile in PROFILES.values():
+        if serial and serial.startswith(profile.serial_prefixes):
+            return profile, f"serial number {serial[:4]}"
+
+    key = device_type_key(inverter_data)
+    known = (known_device_types or {}).get(key)
+    if known in PROFILES:
+        return PROFILES[known], f"device type {key}"
+
+    return PROFILES[DEFAULT_PROFILE], "default"
+
+
+def _plan_key(block_names: Sequence[str], max_gap: int) -> str:
+    return f"{max_gap}:{','.join(sorted(block_names))}"
+
+
+class CompiledProfile:
+    """Decoders and read plans of a profile, ready for the poll cycle.
+
+    Plans are kept per set of due blocks and register gap; sets that were
+    not planned before are planned on first use and marked as ``changed``.
+    """
+
+    def __init__(
+        self,
+        profile: ModelProfile,
+        decoders: Dict[str, BlockDecoder],
+        plans: Optional[Dict[str, List[ReadRequest]]] = None
+    ) -> None:
+        self.profile = profile
+        self.blocks: Dict[str, RegisterBlock] = build_register_blocks(profile.register_map, decoders)
+        self.poll_blocks: List[RegisterBlock] = [block for block in self.blocks.values() if block.tier != TIER_STATIC]
+        self.changed = False
+        self._decoders = decoders
+        self._plans: Dict[str, List[ReadRequest]] = dict(plans or {})
+
+    @property
+    def name(self) -> str:
+        return self.profile.name
+
+    def plan(self, blocks: Sequence[RegisterBlock], max_gap: int = 0) -> List[ReadRequest]:
+        """Returns the read requests for the given blocks."""
+        key = _plan_key([block.name for block in blocks], max_gap)
+        requests = self._plans.get(key)
+        if requests is None:
+            requests = self._plans[key] = plan_reads([block.span for block in blocks], max_gap)
+            self.changed = True
+        return requests
+
+    def precompute(self, max_gap: int = 0) -> None:
+        """Plans every combination of tiers, the sets of blocks a poll cycle usually reads."""
+        tiers = sorted({block.tier for block in self.poll_blocks})
+        for size in range(1, len(tiers) + 1):
+            for selected in combinations(tiers, size):
+                self.plan([block for block in self.poll_blocks if block.tier in selected], max_gap)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The compiled profile in a JSON serializable form."""
+        return {
+            "version": self.profile.version,
+            "decoders": {name: decoder.as_dict() for name, decoder in self._decoders.items()},
+            "plans": {
+                key: [[request.address, request.count, [span.name for span in request.spans]] for request in requests]
+                for key, requests in self._plans.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, profile: ModelProfile, stored: Dict[str, Any]) -> "CompiledProfile":
+        """Restores a compiled profile; raises ValueError if it does not fit the profile any more."""
+        if stored.get("version") != profile.version:
+            raise ValueError(f"stored version {stored.get('version')}, current version {profile.version}")
+        definitions = profile.register_map.blocks
+        decoders = {}
+        for name, definition in definitions.items():
+            decoder = BlockDecoder.from_dict(stored["decoders"][name])
+            if decoder.count != definition.count:
+                raise ValueError(f"decoder of {name} reads {decoder.count} registers, the block has {definition.count}")
+            decoders[name] = decoder
+
+        spans = {name: RegisterSpan(definition.name, definition.address, definition.count)
+                 for name, definition in definitions.items()}
+        plans: Dict[str, List[ReadRequest]] = {}
+        for key, requests in stored.get("plans", {}).items():
+            plan = []
+            for address, count, names in requests:
+                request = ReadRequest(address, count, [spans[name] for name in names])
+                if count > MAX_READ_REGISTERS or any(
+                    span.address < request.address or span.end > request.end for span in request.spans
+                ):
+                    raise ValueError(f"stored plan {key} does not cover its blocks")
+                plan.append(request)
+            plans[key] = plan
+        return cls(profile, decoders, plans)
+
+
+def compile_profile(profile: ModelProfile, max_gap: int = 0) -> CompiledProfile:
+    """Compiles the decoders and the usual read plans of a profile."""
+    compiled = CompiledProfile(
+        profile, {name: profile.register_map.compile(name) for name in profile.register_map.blocks}
+    )
+    compiled.precompute(max_gap)
+    return compiled
+
+
+def load_profile(profile: ModelProfile, stored: Optional[Dict[str, Any]], max_gap: int = 0) -> CompiledProfile:
+    """Restores a stored compiled profile, or compiles it if there is none or it is outdated."""
+    if stored:
+        try:
+            compiled = CompiledProfile.from_dict(profile, stored)
+            _LOGGER.debug(f"Using the stored read plan of profile {profile.name}")
+            return compiled
+        except (KeyError, TypeError, ValueError) as e:
+            _LOGGER.debug(f"Stored read plan of profile {profile.name} is not usable ({e}), compiling it")
+    compiled = compile_profile(profile, max_gap)
+    compiled.changed = True
+    return compiled
@@ -1,6 +1,8 @@
 import logging
 import asyncio
+from pymodbus.exceptions import ModbusException
 from homeassistant.components.number import NumberEntity, NumberMode
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity import EntityCategory
 from .const import DOMAIN
 
@@ -9,17 +11,21 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up SAJ number entities."""
     hub = hass.data[DOMAIN][entry.entry_id]["hub"]
-    async_add_entities([SajFirstChargeDayMaskInputEntity(hub), SajFirstChargePowerPercentInputEntity(hub)])
+    device_info = hass.data[DOMAIN][entry.entry_id]["device_info"]
+    async_add_entities([
+        SajFirstChargeDayMaskInputEntity(hub, device_info), SajFirstChargePowerPercentInputEntity(hub, device_info)
+    ])
 
 class SajNumberEntity(NumberEntity):
     """Base class for SAJ writable number entities."""
     _attr_mode = NumberMode.BOX
     _attr_entity_category = EntityCategory.CONFIG
 
-    def __init__(self, hub, name, unique_id, min_val, max_val, step, default, unit=None):
+    def __init__(self, hub, device_info, name, key, min_val, max_val, step, default, unit=None):
         self._hub = hub
         self._attr_name = name
-        self._attr_unique_id = unique_id
+        self._attr_unique_id = f"{hub.name}_{key}"
+        self._attr_device_info = device_info
         self._attr_native_min_value = min_val
         self._attr_native_max_value = max_val
         self._attr_native_step = step
@@ -31,26 +37,33 @@ class SajNumberEntity(NumberEntity):
 
     async def async_update(self): pass
 
+    async def _async_write(self, setter, val):
+        """Writes the value with the hub setter and shows it only once the inverter took it."""
+        try:
+            await setter(val)
+        except (ValueError, ModbusException) as e:
+            raise HomeAssistantError(f"Could not set {self.name} to {val}: {e}") from e
+        self._attr_native_value = val
+        self.async_write_ha_state()
+
 class SajFirstChargeDayMaskInputEntity(SajNumberEntity):
     """Entity for First Charge Day Mask (0-127)."""
-    def __init__(self, hub):
-        super().__init__(hub, "SAJ First Charge Day Mask (Input)", "saj_first_charge_day_mask_input", 0, 127, 1, 127)
+    def __init__(self, hub, device_info):
+        super().__init__(hub, device_info, "SAJ First Charge Day Mask (Input)", "first_charge_day_mask_input", 0, 127, 1, 127)
 
     async def async_set_native_value(self, value):
         val = int(value)
         if not 0 <= val <= 127: _LOGGER.error(f"Invalid Day Mask: {val}"); return
-        self._attr_native_value = val
-        await self._hub.set_first_charge_day_mask(val)
-        self.async_write_ha_state()
+        await self._async_write(self._hub.set_first_charge_day_mask, val)
 
 class SajFirstChargePowerPercentInputEntity(SajNumberEntity):
     """Entity for First Charge Power Percent (0-25%)."""
-    def __init__(self, hub):
-        super().__init__(hub, "SAJ First Charge Power Percent (Input)", "saj_first_charge_power_percent_input", 0, 25, 1, 5, "%")
+    def __init__(self, hub, device_info):
+        super().__init__(
+            hub, device_info, "SAJ First Charge Power Percent (Input)", "first_charge_power_percent_input", 0, 25, 1, 5, "%"
+        )
 
     async def async_set_native_value(self, value):
         val = int(value)
         if not 0 <= val <= 25: _LOGGER.error(f"Invalid percent: {val}"); return
-        self._attr_native_value = val
-        await self._hub.set_first_charge_power_percent(val)
-        self.async_write_ha_state()
\ No newline at end of file
+        await self._async_write(self._hub.set_first_charge_power_percent, val)
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""Multi-rate scheduling of register block reads."""
+from typing import Dict, Iterable, List, Optional, Set
+
+from .modbus_const import TIER_FAST, TIER_NORMAL, TIER_SLOW, TIER_STATIC
+from .modbus_data_readers import RegisterBlock
+
+
+class PollScheduler:
+    """Decides which register blocks are due in a poll cycle.
+
+    Every block belongs to a tier and every tier has its own interval in
+    seconds. Blocks of the static tier are read once and then kept. A block
+    whose read failed is due again in the next cycle, whatever its tier.
+    """
+
+    def __init__(self, blocks: Iterable[RegisterBlock], intervals: Dict[str, Optional[float]]) -> None:
+        self._blocks = list(blocks)
+        self._intervals: Dict[str, Optional[float]] = {TIER_STATIC: None, **intervals}
+        self._last_read: Dict[str, float] = {}
+        # Blocks whose last read failed
+        self._failed: Set[str] = set()
+
+        for block in self._blocks:
+            if block.tier not in self._intervals:
+                raise ValueError(f"Block {block.name} uses unknown tier {block.tier}")
+
+    @property
+    def shortest_interval(self) -> float:
+        """The interval at which the coordinator has to run to serve every tier."""
+        used = {block.tier for block in self._blocks}
+        return min(
+            (interval for tier, interval in self._intervals.items() if interval is not None and tier in used),
+            default=self._intervals[TIER_NORMAL],
+        )
+
+    def set_blocks(self, blocks: Iterable[RegisterBlock]) -> None:
+        """Replaces the blocks, e.g. once the inverter model is known; reads of kept blocks are remembered."""
+        blocks = list(blocks)
+        for block in blocks:
+            if block.tier not in self._intervals:
+                raise ValueError(f"Block {block.name} uses unknown tier {block.tier}")
+        self._blocks = blocks
+        names = {block.name for block in blocks}
+        self._last_read = {name: last for name, last in self._last_read.items() if name in names}
+        self._failed &= names
+
+    def set_interval(self, tier: str, interval: Optional[float]) -> None:
+        """Changes the interval of a tier."""
+        self._intervals[tier] = interval
+
+    def due_blocks(self, now: float) -> List[RegisterBlock]:
+        """Returns the blocks that have to be read in the cycle starting at ``now``."""
+        # Cycles never start exactly on time, so allow them to be a little early
+        slack = self.shortest_interval / 2
+        due = []
+        for block in self._blocks:
+            last_read = self._last_read.get(block.name)
+            interval = self._intervals[block.tier]
+            if last_read is None or block.name in self._failed or (interval is not None and now - last_read + slack >= interval):
+                due.append(block)
+        return due
+
+    def mark_read(self, block_names: Iterable[str], now: float) -> None:
+        """Records that the given blocks have been read successfully."""
+        for name in block_names:
+            self._last_read[name] = now
+            self._failed.discard(name)
+
+    def mark_failed(self, block_names: Iterable[str]) -> None:
+        """Records that the given blocks could not be read, so they are due in the next cycle."""
+        self._failed.update(block_names)
+
+    def reset(self) -> None:
+        """Forgets all reads so that every block is due in the next cycle."""
+        self._last_read.clear()
+        self._failed.clear()
+
+
+def default_tier_intervals(fast: float, normal: float, slow: float) -> Dict[str, Optional[float]]:
+    """Builds the interval table from the configured scan intervals."""
+    return {
+        TIER_FAST: fast,
+        TIER_NORMAL: normal,
+        TIER_SLOW: slow,
+        TIER_STATIC: None,
+    }
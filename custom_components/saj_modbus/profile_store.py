@@ -0,0 +1,81 @@
+"""Disk cache of the compiled model profiles, shared by all hubs."""
+import asyncio
+from typing import Any, Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .model_profiles import CompiledProfile, ModelProfile, load_profile
+
+STORAGE_KEY = f"{DOMAIN}.profiles"
+STORAGE_VERSION = 1
+SAVE_DELAY = 30
+DATA_PROFILE_STORE = f"{DOMAIN}_profile_store"
+
+
+class ProfileStore:
+    """Keeps the compiled profiles and the profile chosen for each devtype/subtype pair.
+
+    Compiled profiles are loaded from ``.storage`` on first use, so Home
+    Assistant does not compile them again on every start.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._lock = asyncio.Lock()
+        self._stored: Optional[Dict[str, Any]] = None
+        self._compiled: Dict[str, CompiledProfile] = {}
+
+    async def _async_stored(self) -> Dict[str, Any]:
+        async with self._lock:
+            if self._stored is None:
+                self._stored = await self._store.async_load() or {}
+                self._stored.setdefault("profiles", {})
+                self._stored.setdefault("device_types", {})
+            return self._stored
+
+    async def async_device_types(self) -> Dict[str, str]:
+        """Returns the profile names recorded per devtype/subtype pair."""
+        return dict((await self._async_stored())["device_types"])
+
+    async def async_compiled(self, profile: ModelProfile, max_gap: int = 0) -> CompiledProfile:
+        """Returns the compiled profile, from the disk cache if it is still valid."""
+        stored = await self._async_stored()
+        compiled = self._compiled.get(profile.name)
+        if compiled is None:
+            compiled = load_profile(profile, stored["profiles"].get(profile.name), max_gap)
+            self._compiled[profile.name] = compiled
+        compiled.precompute(max_gap)
+        self.async_save_changes()
+        return compiled
+
+    @callback
+    def async_record_device_type(self, device_type: Optional[str], profile_name: str) -> None:
+        """Remembers the profile of a devtype/subtype pair for the next start."""
+        if device_type is None or self._stored is None:
+            return
+        if self._stored["device_types"].get(device_type) != profile_name:
+            self._stored["device_types"][device_type] = profile_name
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_save_changes(self) -> None:
+        """Schedules a save if a profile got plans that are not on disk yet."""
+        if any(compiled.changed for compiled in self._compiled.values()):
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> Dict[str, Any]:
+        for name, compiled in self._compiled.items():
+            self._stored["profiles"][name] = compiled.as_dict()
+            compiled.changed = False
+        return self._stored
+
+
+@callback
+def get_profile_store(hass: HomeAssistant) -> ProfileStore:
+    """Returns the profile store of this Home Assistant instance."""
+    if DATA_PROFILE_STORE not in hass.data:
+        hass.data[DATA_PROFILE_STORE] = ProfileStore(hass)
+    return hass.data[DATA_PROFILE_STORE]
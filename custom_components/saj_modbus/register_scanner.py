@@ -0,0 +1,198 @@
+"""Sweep of an arbitrary register range, e.g. to find undocumented registers.
+
+The range is read in chunks of up to 125 registers. A chunk the inverter
+rejects is halved until it is accepted or a chunk of ``min_chunk`` registers
+is rejected too, which is then reported as unreadable; after every readable
+chunk the size doubles again. Behind a rejected chunk of ``min_chunk``
+registers the scan gallops: it probes ``min_chunk`` registers at twice the
+distance each time and counts the registers it skipped as unreadable as well,
+until a probe is accepted. The border before that probe is then searched
+again from the end of the unreadable run. Readable areas cost one request
+per 125 registers, an unreadable area of n registers about log2(n) requests.
+Readable areas inside a long unreadable area that lie between two probes are
+not found.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+from .modbus_arbiter import RequestArbiter
+from .modbus_connection import ModbusConnection
+from .modbus_const import DEFAULT_UNIT_ID
+from .modbus_pacing import PacingController
+from .modbus_read_planner import MAX_READ_REGISTERS
+from .modbus_utils import is_timeout
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_ADDRESS = 0xFFFF
+
+# Awaited with address, count and either the registers or why they could not be read
+RangeCallback = Callable[[int, int, Optional[List[int]], Optional[str]], Awaitable[None]]
+
+
+@dataclass
+class ScanResult:
+    """Totals of a scan; ``error`` is set if it stopped before ``end``."""
+    start: int
+    end: int
+    readable: int = 0
+    unreadable: int = 0
+    requests: int = 0
+    timeouts: int = 0
+    duration: float = 0.0
+    error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+async def scan_registers(
+    connection: ModbusConnection,
+    arbiter: RequestArbiter,
+    start: int,
+    end: int,
+    on_range: RangeCallback,
+    unit: int = DEFAULT_UNIT_ID,
+    max_chunk: int = MAX_READ_REGISTERS,
+    min_chunk: int = 1,
+    pacing: Optional[PacingController] = None
+) -> ScanResult:
+    """Reads the holding registers from ``start`` up to, not including, ``end``.
+
+    ``on_range`` gets every readable chunk and every unreadable run in address
+    order while the scan goes on. Each request waits for the arbiter on its
+    own, so a running poll cycle gets its requests in between. Unanswered
+    chunks count as unreadable; once the connection circuit opens the scan stops.
+    """
+    if not 1 <= min_chunk <= max_chunk <= MAX_READ_REGISTERS:
+        raise ValueError(f"Invalid chunk sizes {min_chunk}..{max_chunk}")
+    if not 0 <= start < end <= MAX_ADDRESS + 1:
+        raise ValueError(f"Invalid register range {start:#06x}..{end:#06x}")
+
+    result = ScanResult(start, end)
+    started = time.monotonic()
+    # Unreadable run that is not reported yet: address, count, reason
+    gap: Optional[Tuple[int, int, str]] = None
+    address = start
+    size = max_chunk
+    # Distance of the next probe while galloping over an unreadable run, 0 otherwise
+    skip = 0
+    # Start of a chunk ahead that a probe found readable; no probe goes beyond it
+    readable_at = end
+    try:
+        while address < end:
+            if address >= readable_at:
+                readable_at = end
+            if skip:
+                probe = address + skip
+                if probe >= readable_at:
+                    # Search the border before the readable probe chunk by chunk
+                    skip = 0
+                    continue
+                count = min(min_chunk, readable_at - probe)
+            else:
+                probe = address
+                count = min(size, end - address)
+            if result.requests and pacing is not None and pacing.delay:
+                await asyncio.sleep(pacing.delay)
+            registers, reason = await _read_chunk(connection, arbiter, unit, probe, count, result, pacing)
+
+            if skip and registers is not None:
+                # The unreadable run ends before the probe, its registers are read again from there on
+                readable_at = probe
+                skip = 0
+            elif skip:
+                gap = await _add_unreadable(gap, address, probe + count - address, reason, on_range)
+                result.unreadable += probe + count - address
+                address = probe + count
+                skip *= 2
+            elif registers is not None:
+                if gap is not None:
+                    await on_range(*gap[:2], None, gap[2])
+                    gap = None
+                await on_range(address, count, registers, None)
+                result.readable += count
+                address += count
+                size = min(max_chunk, size * 2)
+            elif count > min_chunk:
+                size = max(min_chunk, count // 2)
+            else:
+                gap = await _add_unreadable(gap, address, count, reason, on_range)
+                result.unreadable += count
+                address += count
+                skip = min_chunk
+    except ConnectionException as e:
+        result.error = str(e)
+        _LOGGER.warning(f"Register scan stopped at {address:#06x}: {e}")
+
+    if gap is not None:
+        await on_range(*gap[:2], None, gap[2])
+    result.duration = time.monotonic() - started
+    return result
+
+
+async def _add_unreadable(
+    gap: Optional[Tuple[int, int, str]],
+    address: int,
+    count: int,
+    reason: str,
+    on_range: RangeCallback
+) -> Tuple[int, int, str]:
+    """Adds an unreadable run to ``gap``, reporting ``gap`` first if the reason differs."""
+    if gap is not None and gap[2] == reason:
+        return gap[0], gap[1] + count, reason
+    if gap is not None:
+        await on_range(*gap[:2], None, gap[2])
+    return address, count, reason
+
+
+async def _read_chunk(
+    connection: ModbusConnection,
+    arbiter: RequestArbiter,
+    unit: int,
+    address: int,
+    count: int,
+    result: ScanResult,
+    pacing: Optional[PacingController] = None
+) -> Tuple[Optional[List[int]], Optional[str]]:
+    """Reads one chunk; returns its registers, or None and why they could not be read.
+
+    Raises ConnectionException if the inverter cannot be reached any more.
+    Exception responses are answers too, they shorten the pause of ``pacing``.
+    """
+    client = await connection.get_client()
+    result.requests += 1
+    try:
+        async with arbiter:
+            started = time.perf_counter()
+            response = await client.read_holding_registers(address=address, count=count, slave=unit)
+            latency = time.perf_counter() - started
+    except ConnectionException as e:
+        connection.report_failure(e)
+        raise
+    except (ModbusIOException, asyncio.TimeoutError) as e:
+        if not is_timeout(e):
+            return None, "invalid response"
+        # Enough of these in a row open the circuit, which ends the scan
+        connection.report_failure(e)
+        if pacing is not None:
+            pacing.record_failure()
+        result.timeouts += 1
+        return None, "no response"
+
+    connection.report_success()
+    if pacing is not None:
+        pacing.record_response(latency)
+    if not response:
+        return None, "empty response"
+    if response.isError():
+        code = getattr(response, "exception_code", None)
+        return None, f"exception {code:#04x}" if code is not None else "error response"
+    if len(response.registers) != count:
+        return None, "incomplete response"
+    return response.registers, None
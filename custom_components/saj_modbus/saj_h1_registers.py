@@ -0,0 +1,250 @@
+"""Register table of the SAJ H1 inverters.
+
+Every register the integration reads is listed here once, with its type,
+scale and the sensor it is shown as. Addresses follow the SAJ H1 Modbus
+protocol; values without a sensor are still decoded for the hub and the
+attributes of other entities.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from .fault_engine import fault_text, fault_words
+from .modbus_const import DEVICE_STATUSSES, TIER_FAST, TIER_NORMAL, TIER_SLOW, TIER_STATIC
+from .modbus_register_map import BlockDefinition, DerivedValue, Register, RegisterMap, SensorSpec
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _info(name: str, enabled: bool = False, icon: str = "information-outline") -> SensorSpec:
+    return SensorSpec("information", name, icon, enabled)
+
+
+def derive_realtime_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Adds the inverter status and the texts of the active fault bits.
+
+    The fault texts are cached per combination of fault words; the hub reports
+    raised and cleared faults itself, so nothing is logged here.
+    """
+    data["mpvstatus"] = DEVICE_STATUSSES.get(data.get("mpvmode"), "Unknown")
+    data["faultmsg"] = fault_text(fault_words(data))
+    return data
+
+
+def _decode_time(value: int) -> str:
+    return f"{(value >> 8) & 0xFF:02d}:{value & 0xFF:02d}"
+
+
+def derive_first_charge_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Turns the raw First Charge registers into times, day mask and power percent."""
+    data["first_charge_start_time"] = _decode_time(data.pop("first_charge_start_time_raw"))
+    data["first_charge_end_time"] = _decode_time(data.pop("first_charge_end_time_raw"))
+    power_value = data.pop("power_time_raw")
+    data["first_charge_day_mask"] = (power_value >> 8) & 0xFF
+    data["first_charge_power_percent"] = power_value & 0xFF
+    return data
+
+
+def _energy_counters(address: int, keys: List[str], sensors: Optional[Dict[str, SensorSpec]] = None) -> tuple:
+    """Consecutive 32 bit energy counters in 0.01 kWh."""
+    sensors = sensors or {}
+    return tuple(
+        Register(key, address + 2 * number, "32u", 0.01, sensors.get(key))
+        for number, key in enumerate(keys)
+    )
+
+
+def _grid_phase(phase: str, address: int) -> tuple:
+    """Voltage, current, frequency, DC component, power and power factor of one grid phase."""
+    return (
+        Register(f"{phase}GridVolt", address, "16u", 0.1,
+                 SensorSpec("voltage", f"{phase}-Phase Grid Voltage", "sine-wave", False)),
+        Register(f"{phase}GridCurr", address + 1, "16u", 0.01,
+                 SensorSpec("current", f"{phase}-Phase Grid Current", "current-dc", False)),
+        Register(f"{phase}GridFreq", address + 2, "16u", 0.01,
+                 SensorSpec("frequency", f"{phase}-Phase Grid Frequency", "sine-wave", False)),
+        Register(f"{phase}GridDCI", address + 3, "16i", 0.001,
+                 SensorSpec("current", f"{phase}-Phase Grid DC Component", "current-dc", False)),
+        Register(f"{phase}GridPowerWatt", address + 4, "16u", 0.001,
+                 SensorSpec("power", f"{phase}-Phase Grid Power Watt", "flash", False)),
+        Register(f"{phase}GridPowerVA", address + 5, "16u", 0.001,
+                 SensorSpec("power", f"{phase}-Phase Grid Power VA", "flash-outline", False)),
+        Register(f"{phase}GridPowerPF", address + 6, "16i", 0.001,
+                 SensorSpec("information", f"{phase}-Phase Grid Power Factor", "power-plug", False)),
+    )
+
+
+def _pv_string(number: int, address: int, enabled: bool) -> tuple:
+    """Voltage, current and power of one PV string."""
+    return (
+        Register(f"pv{number}Voltage", address, "16u", 0.1,
+                 SensorSpec("voltage", f"PV{number} Voltage", "sine-wave", enabled)),
+        Register(f"pv{number}TotalCurrent", address + 1, "16u", 0.01,
+                 SensorSpec("current", f"PV{number} Total Current", "current-dc", enabled)),
+        Register(f"pv{number}Power", address + 2, "16u", 0.01,
+                 SensorSpec("power", f"PV{number} Power", "flash", enabled)),
+    )
+
+
+def _energy(name: str, icon: str) -> SensorSpec:
+    return SensorSpec("energy", name, icon)
+
+
+INVERTER_DATA = BlockDefinition("inverter_data", 0x8F00, 29, (
+    Register("devtype", 0x8F00, sensor=_info("Device Type")),
+    Register("subtype", 0x8F01, sensor=_info("Sub Type")),
+    Register("commver", 0x8F02, scale=0.001, sensor=_info("Comms Protocol Version")),
+    Register("sn", 0x8F03, "string", size=10, sensor=_info("Serial Number")),
+    Register("pc", 0x8F0D, "string", size=10, sensor=_info("Product Code")),
+    Register("dv", 0x8F17, scale=0.001, sensor=_info("Display Software Version")),
+    Register("mcv", 0x8F18, scale=0.001, sensor=_info("Master Ctrl Software Version")),
+    Register("scv", 0x8F19, scale=0.001, sensor=_info("Slave Ctrl Software Version")),
+    Register("disphwversion", 0x8F1A, scale=0.001, sensor=_info("Display Board Hardware Version")),
+    Register("ctrlhwversion", 0x8F1B, scale=0.001, sensor=_info("Control Board Hardware Version")),
+    Register("powerhwversion", 0x8F1C, scale=0.001, sensor=_info("Power Board Hardware Version")),
+), TIER_STATIC, digits=3)
+
+REALTIME_DATA = BlockDefinition("realtime_data", 0x4004, 19, (
+    Register("mpvmode", 0x4004, sensor=_info("Inverter Working Mode", True)),
+    Register("faultMsg0", 0x4005, "32u"),
+    Register("faultMsg1", 0x4007, "32u"),
+    Register("faultMsg2", 0x4009, "32u"),
+    Register("errorcount", 0x400F),
+    Register("SinkTemp", 0x4010, "16i", 0.1, SensorSpec("temperature", "Inverter Temperature", "thermometer")),
+    Register("AmbTemp", 0x4011, "16i", 0.1, SensorSpec("temperature", "Environment Temperature", "thermometer-lines")),
+    Register("gfci", 0x4012, sensor=SensorSpec("gfci", "GFCI", "current-dc", False)),
+    Register("iso1", 0x4013, sensor=SensorSpec("iso_resistance", "PV1+ Isolation Resistance", "omega")),
+    Register("iso2", 0x4014, sensor=SensorSpec("iso_resistance", "PV2+ Isolation Resistance", "omega")),
+    Register("iso3", 0x4015, sensor=SensorSpec("iso_resistance", "PV3+ Isolation Resistance", "omega", False)),
+    Register("iso4", 0x4016, sensor=SensorSpec("iso_resistance", "PV4+ Isolation Resistance", "omega", False)),
+), TIER_NORMAL, derive=derive_realtime_data, derived=(
+    DerivedValue("mpvstatus", _info("Inverter Status", True)),
+    DerivedValue("faultmsg", _info("Inverter Error Message", True, "message-alert-outline")),
+))
+
+GRID_PHASE_DATA = BlockDefinition("grid_phase_data", 0x4031, 21, (
+    *_grid_phase("R", 0x4031),
+    *_grid_phase("S", 0x4038),
+    *_grid_phase("T", 0x403F),
+), TIER_NORMAL)
+
+BATTERY_DATA = BlockDefinition("battery_data", 0x4069, 5, (
+    Register("BatVolt", 0x4069, "16u", 0.1, SensorSpec("voltage", "Battery Voltage", "battery")),
+    Register("BatCurr", 0x406A, "16i", 0.01, SensorSpec("current", "Battery Current", "current-dc")),
+    Register("BatCurr1", 0x406B, "16i", 0.01, SensorSpec("current", "Battery Control 1 Current", "current-dc")),
+    Register("BatCurr2", 0x406C, "16i", 0.01, SensorSpec("current", "Battery Control 2 Current", "current-dc")),
+    Register("BatPower", 0x406D, "16i"),
+), TIER_FAST)
+
+ADDITIONAL_DATA_1_PART_1 = BlockDefinition("additional_data_1_part_1", 0x406E, 2, (
+    Register("BatTemp", 0x406E, "16i", 0.1,
+             SensorSpec("temperature", "Battery Temperature", "battery-thermometer")),
+    Register("batEnergyPercent", 0x406F, "16u", 0.01,
+             SensorSpec("battery", "Battery Energy Percent", "battery-charging-100")),
+), TIER_FAST)
+
+# A block of its own so that it can be skipped while PV is off; 0x4070 is undocumented
+# but keeps the block adjacent to the battery values, so both still go into one request
+PV_STRING_DATA = BlockDefinition("pv_string_data", 0x4070, 13, (
+    *_pv_string(1, 0x4071, True),
+    *_pv_string(2, 0x4074, True),
+    *_pv_string(3, 0x4077, False),
+    *_pv_string(4, 0x407A, False),
+), TIER_FAST)
+
+ADDITIONAL_DATA_1_PART_2 = BlockDefinition("additional_data_1_part_2", 0x4095, 25, (
+    Register("directionPV", 0x4095, sensor=_info("Direction PV", True, "arrow-all")),
+    Register("directionBattery", 0x4096, "16i", sensor=_info("Direction Battery", True, "arrow-all")),
+    Register("directionGrid", 0x4097, "16i", sensor=_info("Direction Grid", True, "arrow-all")),
+    Register("directionOutput", 0x4098, sensor=_info("Direction Ouput", True, "arrow-all")),
+    Register("TotalLoadPower", 0x40A0, "16i", sensor=SensorSpec("power", "Total Load Power", "transmission-tower")),
+    Register("CT_GridPowerWatt", 0x40A1, "16i", sensor=SensorSpec("power", "CT Grid Power Watt", "flash", False)),
+    Register("CT_GridPowerVA", 0x40A2, "16i", sensor=SensorSpec("power", "CT Grid Power VA", "flash-outline", False)),
+    Register("CT_PVPowerWatt", 0x40A3, "16i", sensor=SensorSpec("power", "CT PV Power Watt", "flash", False)),
+    Register("CT_PVPowerVA", 0x40A4, "16i", sensor=SensorSpec("power", "CT PV Power VA", "flash-outline", False)),
+    Register("pvPower", 0x40A5, "16i", sensor=SensorSpec("power", "PV Power", "solar-power")),
+    Register("batteryPower", 0x40A6, "16i", sensor=SensorSpec("power", "Battery Power", "battery-charging-100")),
+    Register("totalgridPower", 0x40A7, "16i", sensor=SensorSpec("power", "Total Grid Power", "power-socket")),
+    Register("totalgridPowerVA", 0x40A8, "16i"),
+    Register("inverterPower", 0x40A9, "16i", sensor=SensorSpec("power", "Inverter Power", "power-socket")),
+    Register("TotalInvPowerVA", 0x40AA, "16i",
+             sensor=SensorSpec("power", "Total Inverter Power VA", "flash", False)),
+    Register("BackupTotalLoadPowerWatt", 0x40AB,
+             sensor=SensorSpec("power", "Backup Total Load Power Watt", "home-lightning-bolt", False)),
+    Register("BackupTotalLoadPowerVA", 0x40AC,
+             sensor=SensorSpec("power", "Backup Total Load Power VA", "home-lightning-bolt-outline", False)),
+    Register("gridPower", 0x40AD, "16i", sensor=SensorSpec("power", "Grid Load Power", "power-socket")),
+), TIER_FAST)
+
+ADDITIONAL_DATA_2_PART_1 = BlockDefinition("additional_data_2_part_1", 0x40BF, 32, _energy_counters(0x40BF, [
+    "todayenergy", "monthenergy", "yearenergy", "totalenergy",
+    "bat_today_charge", "bat_month_charge", "bat_year_charge", "bat_total_charge",
+    "bat_today_discharge", "bat_month_discharge", "bat_year_discharge", "bat_total_discharge",
+    "inv_today_gen", "inv_month_gen", "inv_year_gen", "inv_total_gen",
+], {
+    "todayenergy": _energy("Today PV Energy", "solar-power"),
+    "monthenergy": _energy("Month PV Energy", "solar-power"),
+    "yearenergy": _energy("Year PV Energy", "solar-power"),
+    "totalenergy": _energy("Total PV Energy", "solar-power"),
+    "bat_today_charge": _energy("Battery Today Charge", "battery-charging"),
+    "bat_month_charge": _energy("Battery Month Charge", "battery-charging"),
+    "bat_year_charge": _energy("Battery Year Charge", "battery-charging"),
+    "bat_total_charge": _energy("Battery Total Charge", "battery-charging-100"),
+    "bat_today_discharge": _energy("Battery Today Discharge", "battery-minus"),
+    "bat_month_discharge": _energy("Battery Month Discharge", "battery-minus"),
+    "bat_year_discharge": _energy("Battery Year Discharge", "battery-minus"),
+    "bat_total_discharge": _energy("Battery Total Discharge", "battery-minus"),
+}), TIER_SLOW)
+
+ADDITIONAL_DATA_2_PART_2 = BlockDefinition("additional_data_2_part_2", 0x40DF, 32, _energy_counters(0x40DF, [
+    "total_today_load", "total_month_load", "total_year_load", "total_total_load",
+    "backup_today_load", "backup_month_load", "backup_year_load", "backup_total_load",
+    "sell_today_energy", "sell_month_energy", "sell_year_energy", "sell_total_energy",
+    "feedin_today_energy", "feedin_month_energy", "feedin_year_energy", "feedin_total_energy",
+], {
+    "sell_today_energy": _energy("Sell Today Energy", "solar-power"),
+    "sell_month_energy": _energy("Sell Month Energy", "solar-power"),
+    "sell_year_energy": _energy("Sell Year Energy", "solar-power"),
+    "sell_total_energy": _energy("Sell Total Energy", "solar-power"),
+    "feedin_today_energy": _energy("Feed-in Today Energy", "transmission-tower"),
+    "feedin_month_energy": _energy("Feed-in Month Energy", "transmission-tower"),
+    "feedin_year_energy": _energy("Feed-in Year Energy", "transmission-tower"),
+    "feedin_total_energy": _energy("Feed-in Total Energy", "transmission-tower"),
+}), TIER_SLOW)
+
+ADDITIONAL_DATA_3 = BlockDefinition("additional_data_3", 0x4137, 64, _energy_counters(0x4137, [
+    "today_pv_energy2", "month_pv_energy2", "year_pv_energy2", "total_pv_energy2",
+    "today_pv_energy3", "month_pv_energy3", "year_pv_energy3", "total_pv_energy3",
+    "sell_today_energy_2", "sell_month_energy_2", "sell_year_energy_2", "sell_total_energy_2",
+    "sell_today_energy_3", "sell_month_energy_3", "sell_year_energy_3", "sell_total_energy_3",
+    "feedin_today_energy_2", "feedin_month_energy_2", "feedin_year_energy_2", "feedin_total_energy_2",
+    "feedin_today_energy_3", "feedin_month_energy_3", "feedin_year_energy_3", "feedin_total_energy_3",
+    "sum_feed_in_today", "sum_feed_in_month", "sum_feed_in_year", "sum_feed_in_total",
+    "sum_sell_today", "sum_sell_month", "sum_sell_year", "sum_sell_total",
+]), TIER_SLOW)
+
+FIRST_CHARGE_DATA = BlockDefinition("first_charge_data", 0x3606, 3, (
+    Register("first_charge_start_time_raw", 0x3606),
+    Register("first_charge_end_time_raw", 0x3607),
+    Register("power_time_raw", 0x3608),  # day mask in the high byte, power percent in the low byte
+), TIER_NORMAL, derive=derive_first_charge_data, derived=(
+    DerivedValue("first_charge_start_time", SensorSpec("schedule", "First Charge Start Time", "clock-outline")),
+    DerivedValue("first_charge_end_time", SensorSpec("schedule", "First Charge End Time", "clock-outline")),
+    DerivedValue("first_charge_day_mask", SensorSpec("schedule", "First Charge Day Mask", "calendar")),
+    DerivedValue("first_charge_power_percent",
+                 SensorSpec("schedule", "First Charge Power Percent", "flash", unit="%")),
+))
+
+# Validated at import, an inconsistent table keeps the integration from loading
+SAJ_H1_REGISTER_MAP = RegisterMap([
+    INVERTER_DATA,
+    REALTIME_DATA,
+    ADDITIONAL_DATA_1_PART_1,
+    PV_STRING_DATA,
+    ADDITIONAL_DATA_1_PART_2,
+    ADDITIONAL_DATA_2_PART_1,
+    ADDITIONAL_DATA_2_PART_2,
+    ADDITIONAL_DATA_3,
+    GRID_PHASE_DATA,
+    BATTERY_DATA,
+    FIRST_CHARGE_DATA,
+])
@@ -0,0 +1,120 @@
+"""Bounded in-memory history of the fast power values, summarized per time window.
+
+Every value keeps its samples in a ring of two preallocated arrays of
+doubles (time and value), so the memory of a hub is fixed when it starts:
+16 bytes per sample and value. Entities publish the minimum, mean and
+maximum of a window instead of every sample.
+"""
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+# Upper bound of samples per value, whatever window and interval are configured
+MAX_SAMPLES = 1024
+
+
+@dataclass(frozen=True)
+class WindowStats:
+    """Minimum, mean and maximum of the samples of one window."""
+    minimum: float
+    mean: float
+    maximum: float
+    count: int
+
+
+class SampleRing:
+    """The last ``capacity`` samples of one value; the oldest is overwritten when it is full."""
+
+    __slots__ = ("capacity", "_times", "_values", "_next", "_count")
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError(f"Invalid capacity {capacity}")
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, value: float) -> None:
+        self._times[self._next] = timestamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def window(self, since: float) -> Optional[WindowStats]:
+        """Summarizes the samples taken at or after ``since``; None if there are none."""
+        minimum = math.inf
+        maximum = -math.inf
+        total = 0.0
+        count = 0
+        index = self._next
+        # Newest first, stop at the first sample before the window
+        for _ in range(self._count):
+            index = (index - 1) % self.capacity
+            if self._times[index] < since:
+                break
+            value = self._values[index]
+            minimum = min(minimum, value)
+            maximum = max(maximum, value)
+            total += value
+            count += 1
+        if not count:
+            return None
+        return WindowStats(minimum, total / count, maximum, count)
+
+
+class SampleBuffer:
+    """One SampleRing per value of an inverter.
+
+    ``capacity`` samples per value cover the window at the shortest interval
+    the values are read at, see ``capacity_for``.
+    """
+
+    def __init__(self, keys: Iterable[str], capacity: int) -> None:
+        self.capacity = capacity
+        self._rings: Dict[str, SampleRing] = {key: SampleRing(capacity) for key in keys}
+
+    @property
+    def keys(self) -> List[str]:
+        return list(self._rings)
+
+    def record(self, timestamp: float, data: Mapping[str, Any], keys: Optional[Iterable[str]] = None) -> None:
+        """Appends the values in ``data`` that are buffered, only those of ``keys`` if given.
+
+        Missing and non-numeric values are skipped.
+        """
+        for key in self._rings if keys is None else keys:
+            ring = self._rings.get(key)
+            value = data.get(key)
+            if ring is not None and isinstance(value, (int, float)) and not isinstance(value, bool):
+                ring.append(timestamp, value)
+
+    def window(self, key: str, now: float, length: float) -> Optional[WindowStats]:
+        """Summarizes the samples of ``key`` of the last ``length`` seconds."""
+        ring = self._rings.get(key)
+        return ring.window(now - length) if ring is not None else None
+
+    @property
+    def memory(self) -> int:
+        """Bytes held by the sample arrays."""
+        # A time and a value per sample
+        return len(self._rings) * self.capacity * 2 * array("d").itemsize
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Size of the buffer for the diagnostics."""
+        return {
+            "keys": len(self._rings),
+            "capacity": self.capacity,
+            "memory_bytes": self.memory,
+            "samples": {key: len(ring) for key, ring in self._rings.items()},
+        }
+
+
+def capacity_for(window: float, shortest_interval: float) -> int:
+    """Samples per value needed to cover ``window`` seconds when reading every ``shortest_interval`` seconds."""
+    return max(1, min(MAX_SAMPLES, math.ceil(window / max(shortest_interval, 1)) + 1))
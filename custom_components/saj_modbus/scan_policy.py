@@ -0,0 +1,89 @@
+"""Adaptive scan interval, driven by the state of the inverter and how much its power values move."""
+from typing import Any, Dict, Optional
+
+# Working modes in which the inverter converts nothing: Initialization, Waiting
+IDLE_MODES = (0, 1)
+# Power values (W) whose change between two cycles tells how fast the situation moves
+VOLATILITY_KEYS = ("pvPower", "batteryPower", "totalgridPower", "TotalLoadPower")
+# Everything the policy looks at; the hub keeps reading these blocks
+INPUT_KEYS = ("mpvmode", *VOLATILITY_KEYS)
+# A change above this tightens the interval, below the stable one an idle inverter backs off
+VOLATILE_CHANGE = 500
+STABLE_CHANGE = 50
+# PV power (W) at or below which the strings count as off
+PV_OFF_POWER = 0
+
+STATE_NORMAL = "normal"
+STATE_IDLE = "idle"
+STATE_VOLATILE = "volatile"
+
+
+class AdaptiveScanPolicy:
+    """Chooses the scan interval of the fast values after every poll cycle.
+
+    The interval starts at ``base``. It halves, down to ``minimum``, when a
+    power value changed by more than ``volatile_change`` watts since the last
+    cycle, and doubles, up to ``maximum``, while the inverter is idle and no
+    value changed by more than ``stable_change`` watts. Otherwise it goes
+    back to ``base``. ``pv_off`` tells whether the PV strings can be skipped.
+    """
+
+    def __init__(
+        self,
+        base: float,
+        minimum: float,
+        maximum: float,
+        volatile_change: float = VOLATILE_CHANGE,
+        stable_change: float = STABLE_CHANGE,
+        pv_off_power: float = PV_OFF_POWER
+    ) -> None:
+        if not 0 < minimum <= maximum:
+            raise ValueError(f"Invalid scan interval bounds {minimum} to {maximum}")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.base = min(max(base, minimum), maximum)
+        self.interval = self.base
+        self.state = STATE_NORMAL
+        self.pv_off = False
+        self._volatile_change = volatile_change
+        self._stable_change = stable_change
+        self._pv_off_power = pv_off_power
+        self._last: Dict[str, float] = {}
+
+    def update(self, data: Dict[str, Any]) -> float:
+        """Takes the data of a poll cycle and returns the interval until the next one."""
+        values = {
+            key: data[key] for key in VOLATILITY_KEYS
+            if isinstance(data.get(key), (int, float)) and not isinstance(data.get(key), bool)
+        }
+        if not values:
+            # Nothing was read, keep the interval until the inverter answers again
+            return self.interval
+        change = max((abs(value - self._last[key]) for key, value in values.items() if key in self._last), default=None)
+        self._last = values
+
+        pv_power: Optional[float] = values.get("pvPower")
+        self.pv_off = pv_power is not None and pv_power <= self._pv_off_power
+        idle = self.pv_off or data.get("mpvmode") in IDLE_MODES
+
+        if change is not None and change > self._volatile_change:
+            self.state = STATE_VOLATILE
+            self.interval = max(self.minimum, min(self.interval, self.base) / 2)
+        elif idle and change is not None and change <= self._stable_change:
+            self.state = STATE_IDLE
+            self.interval = min(self.maximum, max(self.interval, self.base) * 2)
+        else:
+            self.state = STATE_NORMAL
+            self.interval = self.base
+        return self.interval
+
+    def as_dict(self) -> Dict[str, Any]:
+        """State of the policy for the diagnostics."""
+        return {
+            "interval": self.interval,
+            "base": self.base,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "state": self.state,
+            "pv_off": self.pv_off,
+        }
@@ -1,13 +1,25 @@
 """SAJ Modbus Hub."""
+from dataclasses import dataclass
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
 
 from .const import DOMAIN, SENSOR_TYPES, SajModbusSensorEntityDescription
 from .hub import SAJModbusHub
+from .modbus_data_readers import CHARGING_STATE, POLL_BLOCKS
+from .modbus_stats import LatencyHistogram, ModbusMetrics
+from .sample_buffer import WindowStats
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -16,14 +28,135 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     hub: SAJModbusHub = hass.data[DOMAIN][entry.entry_id]["hub"]
     device_info = hass.data[DOMAIN][entry.entry_id]["device_info"]
     
+    # Only the sensors of the registers the inverter model has
+    profile_keys = {key for key, _ in hub.profile.register_map.sensors()}
     entities = []
     for description in SENSOR_TYPES.values():
+        if description.key not in profile_keys:
+            continue
         entity = SajSensor(hub, device_info, description)
         entities.append(entity)
 
+    if hub.samples is not None:
+        # Averages of the fast power values, published once per window
+        for key in hub.samples.keys:
+            if key in SENSOR_TYPES and key in profile_keys:
+                entities.append(SajWindowSensor(hub, device_info, SENSOR_TYPES[key]))
+
+    for description in _diagnostic_descriptions():
+        entities.append(SajDiagnosticSensor(hub, device_info, description))
+
     async_add_entities(entities)
     _LOGGER.info(f"Added {len(entities)} SAJ sensors")
 
+
+@dataclass
+class SajModbusDiagnosticEntityDescription(SensorEntityDescription):
+    """Describes a diagnostic sensor that shows a metric of the hub."""
+    value_fn: Callable[[ModbusMetrics], Any] = lambda metrics: None
+    attributes_fn: Optional[Callable[[ModbusMetrics], Dict[str, Any]]] = None
+
+
+def _milliseconds(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def _latency_attributes(histogram: LatencyHistogram) -> Dict[str, Any]:
+    return {
+        "mean_ms": _milliseconds(histogram.mean),
+        "p50_ms": _milliseconds(histogram.percentile(0.5)),
+        "p95_ms": _milliseconds(histogram.percentile(0.95)),
+        "max_ms": _milliseconds(histogram.max) if histogram.count else None,
+        "histogram": histogram.as_dict()["buckets"],
+    }
+
+
+def _cycle_attributes(metrics: ModbusMetrics) -> Dict[str, Any]:
+    attributes = {"cycles": metrics.cycles, **_latency_attributes(metrics.cycle_duration)}
+    if metrics.last_cycle is not None:
+        attributes.update(
+            requests=metrics.last_cycle.requests,
+            failed_requests=metrics.last_cycle.failed_requests,
+            bytes_received=metrics.last_cycle.bytes_received,
+            sleep_ms=_milliseconds(metrics.last_cycle.sleep_time),
+        )
+    return attributes
+
+
+def _block_latency_description(block: str) -> SajModbusDiagnosticEntityDescription:
+    def block_attributes(metrics: ModbusMetrics) -> Dict[str, Any]:
+        block_metrics = metrics.block(block)
+        return {
+            "reads": block_metrics.reads,
+            "failures": block_metrics.failures,
+            "retries": block_metrics.retries,
+            "timeouts": block_metrics.timeouts,
+            **_latency_attributes(block_metrics.latency),
+        }
+
+    return SajModbusDiagnosticEntityDescription(
+        key=f"read_latency_{block}",
+        name=f"Read Latency {block.replace('_', ' ').title()}",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-outline",
+        entity_registry_enabled_default=False,
+        value_fn=lambda metrics: _milliseconds(metrics.block(block).latency.last),
+        attributes_fn=block_attributes,
+    )
+
+
+def _diagnostic_descriptions() -> List[SajModbusDiagnosticEntityDescription]:
+    descriptions = [
+        SajModbusDiagnosticEntityDescription(
+            key="poll_cycle_duration",
+            name="Poll Cycle Duration",
+            native_unit_of_measurement=UnitOfTime.SECONDS,
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            icon="mdi:timer-sync-outline",
+            value_fn=lambda metrics: None if metrics.cycle_duration.last is None else round(metrics.cycle_duration.last, 3),
+            attributes_fn=_cycle_attributes,
+        ),
+        SajModbusDiagnosticEntityDescription(
+            key="read_retries",
+            name="Read Retries",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            icon="mdi:reload-alert",
+            value_fn=lambda metrics: metrics.retries,
+        ),
+        SajModbusDiagnosticEntityDescription(
+            key="read_timeouts",
+            name="Read Timeouts",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            icon="mdi:timer-alert-outline",
+            value_fn=lambda metrics: metrics.timeouts,
+        ),
+        SajModbusDiagnosticEntityDescription(
+            key="read_failures",
+            name="Read Failures",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            icon="mdi:alert-circle-outline",
+            value_fn=lambda metrics: metrics.failures,
+        ),
+        SajModbusDiagnosticEntityDescription(
+            key="modbus_connections",
+            name="Modbus Connections",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            icon="mdi:lan-connect",
+            value_fn=lambda metrics: metrics.connects,
+            attributes_fn=lambda metrics: {
+                "disconnects": metrics.disconnects,
+                "circuit_trips": metrics.circuit_trips,
+            },
+        ),
+    ]
+    # One latency sensor per register block, disabled until someone needs it
+    blocks = [block.name for block in POLL_BLOCKS] + [CHARGING_STATE]
+    descriptions.extend(_block_latency_description(block) for block in blocks)
+    return descriptions
+
 class SajSensor(CoordinatorEntity, SensorEntity):
     """Representation of an SAJ Modbus sensor."""
 
@@ -36,13 +169,18 @@ class SajSensor(CoordinatorEntity, SensorEntity):
         self._attr_name = f"{hub.name} {description.name}"
         self._attr_entity_registry_enabled_default = description.entity_registry_enabled_default
         self._attr_force_update = description.force_update
-                
-       
+        # Position of the value in the coordinator data, looked up once
+        self._slot = hub.slot(description.key)
+        self._published = False
+        self._last_published_value: Any = None
+        self._last_published_available: Optional[bool] = None
+        self._last_published_stale = False
+        self._last_published_at = 0.0
 
     @property
     def native_value(self):
         """Return the state of the sensor."""
-        value = self.coordinator.data.get(self.entity_description.key)
+        value = self.coordinator.values.value(self._slot)
         if value is None:
             _LOGGER.debug(f"No data for sensor {self._attr_name}")
         return value
@@ -52,19 +190,148 @@ class SajSensor(CoordinatorEntity, SensorEntity):
         """Return if entity is available."""
         return self.coordinator.last_update_success
 
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        """Marks values restored from the last run until the inverter has been read."""
+        restored_at = self.coordinator.restored_at
+        if restored_at is None:
+            return None
+        return {"stale": True, "restored_from": restored_at.isoformat()}
+
+    def _should_publish(self, value: Any, available: bool, now: float) -> bool:
+        """Applies the publish policy of the entity description to a new value."""
+        description = self.entity_description
+        stale = self.coordinator.restored_at is not None
+        if not self._published or available != self._last_published_available or stale != self._last_published_stale:
+            return True
+        if description.max_silence is not None and now - self._last_published_at >= description.max_silence:
+            return True
+
+        last = self._last_published_value
+        if value == last:
+            return False
+        if description.on_change_only:
+            return True
+
+        numeric = isinstance(value, (int, float)) and isinstance(last, (int, float))
+        if not numeric or (description.deadband is None and description.relative_deadband is None):
+            return True
+
+        threshold = max(
+            description.deadband or 0,
+            (description.relative_deadband or 0) * abs(last),
+        )
+        return abs(value - last) > threshold
+
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
+        """Handle updated data from the coordinator, skipping writes the publish policy rejects."""
+        value = self.native_value
+        available = self.available
+        now = time.monotonic()
+        if not self._should_publish(value, available, now):
+            return
+
+        self._published = True
+        self._last_published_value = value
+        self._last_published_available = available
+        self._last_published_stale = self.coordinator.restored_at is not None
+        self._last_published_at = now
         self.async_write_ha_state()
 
     async def async_added_to_hass(self) -> None:
         """Run when entity about to be added to hass."""
+        # CoordinatorEntity already subscribes _handle_coordinator_update
         await super().async_added_to_hass()
-        self.async_on_remove(
-            self.coordinator.async_add_listener(self._handle_coordinator_update)
-        )
         _LOGGER.debug(f"Sensor {self._attr_name} added to Home Assistant")
 
     async def async_update(self) -> None:
         """Update the entity."""
         await self.coordinator.async_request_refresh()
+
+
+class SajWindowSensor(CoordinatorEntity, SensorEntity):
+    """Mean of a fast power value over the aggregation window, minimum and maximum as attributes.
+
+    The samples of every poll cycle stay in the sample buffer of the hub; the
+    state is written once per window instead of with every sample.
+    """
+
+    def __init__(self, hub: SAJModbusHub, device_info: dict, description: SajModbusSensorEntityDescription):
+        super().__init__(coordinator=hub)
+        self._key = description.key
+        self._attr_device_info = device_info
+        self._attr_unique_id = f"{hub.name}_{description.key}_window"
+        self._attr_name = f"{hub.name} {description.name} Average"
+        self._attr_native_unit_of_measurement = description.native_unit_of_measurement
+        self._attr_device_class = description.device_class
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_icon = description.icon
+        self._attr_entity_registry_enabled_default = description.entity_registry_enabled_default
+        self._stats: Optional[WindowStats] = None
+        self._published_at: Optional[float] = None
+        self._last_available: Optional[bool] = None
+
+    @property
+    def native_value(self):
+        return None if self._stats is None else round(self._stats.mean, 1)
+
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        if self._stats is None:
+            return None
+        return {
+            "min": self._stats.minimum,
+            "max": self._stats.maximum,
+            "samples": self._stats.count,
+            "window": self.coordinator.aggregate_window,
+        }
+
+    @property
+    def available(self) -> bool:
+        return self.coordinator.last_update_success
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Publishes the aggregates once the window has passed, or when the availability changes."""
+        now = time.monotonic()
+        available = self.available
+        window = self.coordinator.aggregate_window
+        # Half an interval of slack, so that the window does not slip by a whole cycle every time
+        due = self._published_at is None or now - self._published_at >= window - self.coordinator.update_interval.total_seconds() / 2
+        if available == self._last_available and not due:
+            return
+
+        self._stats = self.coordinator.samples.window(self._key, now, window)
+        self._published_at = now
+        self._last_available = available
+        self.async_write_ha_state()
+
+
+class SajDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor showing read latencies, errors and connection churn of the hub."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, hub: SAJModbusHub, device_info: dict, description: SajModbusDiagnosticEntityDescription):
+        super().__init__(coordinator=hub)
+        self.entity_description = description
+        self._attr_device_info = device_info
+        self._attr_unique_id = f"{hub.name}_{description.key}"
+        self._attr_name = f"{hub.name} {description.name}"
+        self._attr_entity_registry_enabled_default = description.entity_registry_enabled_default
+
+    @property
+    def native_value(self):
+        return self.entity_description.value_fn(self.coordinator.metrics)
+
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self.coordinator.metrics)
+
+    @property
+    def available(self) -> bool:
+        # The metrics are most interesting exactly when the polls fail
+        return True
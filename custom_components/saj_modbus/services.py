@@ -0,0 +1,205 @@
+"""Services of the SAJ Modbus integration."""
+import csv
+import logging
+import os
+from typing import IO, Any, List, Optional
+
+import voluptuous as vol
+from pymodbus.exceptions import ModbusException
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+from .hub import SAJModbusHub, charge_schedule_registers
+from .modbus_read_planner import MAX_READ_REGISTERS
+from .register_scanner import MAX_ADDRESS
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SCAN_REGISTERS = "scan_registers"
+SERVICE_SET_CHARGE_SCHEDULE = "set_charge_schedule"
+
+ATTR_ENTRY_ID = "entry_id"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_MAX_CHUNK = "max_chunk"
+ATTR_MIN_CHUNK = "min_chunk"
+ATTR_FILENAME = "filename"
+ATTR_START_TIME = "start_time"
+ATTR_END_TIME = "end_time"
+ATTR_DAY_MASK = "day_mask"
+ATTR_POWER_PERCENT = "power_percent"
+ATTR_CHARGING = "charging"
+
+# Scan files are written to this subdirectory of the config directory, never over an existing file
+SCAN_DIRECTORY = f"{DOMAIN}_scans"
+# One row per readable register, one per unreadable run of registers
+SCAN_COLUMNS = ("address", "address_hex", "value", "value_hex", "count", "error")
+
+
+def _address(value: Any) -> int:
+    """Register address as a number or a string such as "0x3000"."""
+    if isinstance(value, str):
+        try:
+            value = int(value, 0)
+        except ValueError as e:
+            raise vol.Invalid(f"Invalid register address {value}") from e
+    return vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_ADDRESS))(value)
+
+
+SCAN_REGISTERS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTRY_ID): cv.string,
+        vol.Required(ATTR_START): _address,
+        vol.Required(ATTR_END): _address,
+        vol.Optional(ATTR_MAX_CHUNK, default=MAX_READ_REGISTERS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_READ_REGISTERS)
+        ),
+        vol.Optional(ATTR_MIN_CHUNK, default=1): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_READ_REGISTERS)),
+        # A plain file name without directories; .csv is appended if missing
+        vol.Optional(ATTR_FILENAME): vol.All(cv.string, vol.Match(r"^\w[\w.-]*$")),
+    }
+)
+
+
+SET_CHARGE_SCHEDULE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTRY_ID): cv.string,
+        vol.Required(ATTR_START_TIME): cv.time,
+        vol.Required(ATTR_END_TIME): cv.time,
+        # Same ranges as the First Charge number entities
+        vol.Required(ATTR_DAY_MASK): vol.All(vol.Coerce(int), vol.Range(min=0, max=127)),
+        vol.Required(ATTR_POWER_PERCENT): vol.All(vol.Coerce(int), vol.Range(min=0, max=25)),
+        vol.Required(ATTR_CHARGING): cv.boolean,
+    }
+)
+
+
+def _get_hub(hass: HomeAssistant, entry_id: Optional[str]) -> SAJModbusHub:
+    """The hub of the given entry; the entry may be left out if there is only one."""
+    entries = hass.data.get(DOMAIN, {})
+    if entry_id is not None:
+        if entry_id not in entries:
+            raise HomeAssistantError(f"No loaded SAJ Modbus entry {entry_id}")
+        return entries[entry_id]["hub"]
+    if len(entries) != 1:
+        raise HomeAssistantError(f"{len(entries)} SAJ Modbus entries are loaded, set {ATTR_ENTRY_ID}")
+    return next(iter(entries.values()))["hub"]
+
+
+def _scan_rows(address: int, count: int, registers: Optional[List[int]], error: Optional[str]) -> List[List[Any]]:
+    if registers is None:
+        return [[address, f"{address:#06x}", "", "", count, error]]
+    return [
+        [address + offset, f"{address + offset:#06x}", value, f"{value:#06x}", 1, ""]
+        for offset, value in enumerate(registers)
+    ]
+
+
+async def _async_scan_registers(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Sweeps a register range of an inverter and writes what it finds to a new CSV file under SCAN_DIRECTORY."""
+    hub = _get_hub(hass, call.data.get(ATTR_ENTRY_ID))
+    start = call.data[ATTR_START]
+    end = call.data[ATTR_END]
+    max_chunk = call.data[ATTR_MAX_CHUNK]
+    min_chunk = min(call.data[ATTR_MIN_CHUNK], max_chunk)
+    if end < start:
+        raise HomeAssistantError(f"The end {end:#06x} lies before the start {start:#06x}")
+
+    filename = call.data.get(ATTR_FILENAME) or (
+        f"{DOMAIN}_scan_{slugify(hub.name)}_{dt_util.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+    if not filename.lower().endswith(".csv"):
+        filename += ".csv"
+    path = hass.config.path(SCAN_DIRECTORY, filename)
+
+    def _open() -> IO[str]:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # "x" refuses to overwrite a file that is already there
+        file = open(path, "x", newline="", encoding="utf-8")
+        csv.writer(file).writerow(SCAN_COLUMNS)
+        return file
+
+    def _write(rows: List[List[Any]]) -> None:
+        csv.writer(file).writerows(rows)
+        # Keeps what was found if Home Assistant stops during a long scan
+        file.flush()
+
+    async def _on_range(address: int, count: int, registers: Optional[List[int]], error: Optional[str]) -> None:
+        await hass.async_add_executor_job(_write, _scan_rows(address, count, registers, error))
+
+    try:
+        file = await hass.async_add_executor_job(_open)
+    except FileExistsError as e:
+        raise HomeAssistantError(f"{path} already exists, choose another {ATTR_FILENAME}") from e
+    try:
+        # The end of the service range is the last register to read
+        result = await hub.async_scan_registers(start, end + 1, _on_range, max_chunk, min_chunk)
+    finally:
+        await hass.async_add_executor_job(file.close)
+
+    _LOGGER.info(
+        f"Scanned registers {start:#06x} to {end:#06x} in {result.duration:.1f} s with {result.requests} requests: "
+        f"{result.readable} readable, {result.unreadable} unreadable, written to {path}"
+    )
+    return {"file": path, **result.as_dict()}
+
+
+async def _async_set_charge_schedule(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Writes a complete First Charge schedule and the charging switch, and checks them with one read-back."""
+    hub = _get_hub(hass, call.data.get(ATTR_ENTRY_ID))
+    schedule = (
+        call.data[ATTR_START_TIME].strftime("%H:%M"),
+        call.data[ATTR_END_TIME].strftime("%H:%M"),
+        call.data[ATTR_DAY_MASK],
+        call.data[ATTR_POWER_PERCENT],
+        call.data[ATTR_CHARGING],
+    )
+    try:
+        registers = await hub.async_set_charge_schedule(*schedule)
+    except ModbusException as e:
+        raise HomeAssistantError(f"Could not set the charge schedule of {hub.name}: {e}") from e
+
+    expected = charge_schedule_registers(*schedule)
+    mismatched = [address for address, value in expected.items() if registers.get(address) != value]
+    if mismatched:
+        details = ", ".join(
+            f"{address:#06x} is {registers.get(address)} instead of {expected[address]}" for address in mismatched
+        )
+        raise HomeAssistantError(f"The inverter {hub.name} did not take the charge schedule: {details}")
+    _LOGGER.info(f"Charge schedule of {hub.name} set and verified: {', '.join(str(value) for value in schedule)}")
+    return {
+        ATTR_START_TIME: schedule[0],
+        ATTR_END_TIME: schedule[1],
+        ATTR_DAY_MASK: schedule[2],
+        ATTR_POWER_PERCENT: schedule[3],
+        ATTR_CHARGING: schedule[4],
+    }
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Registers the services of the integration."""
+
+    async def async_scan_registers(call: ServiceCall) -> ServiceResponse:
+        return await _async_scan_registers(hass, call)
+
+    async def async_set_charge_schedule(call: ServiceCall) -> ServiceResponse:
+        return await _async_set_charge_schedule(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SCAN_REGISTERS,
+        async_scan_registers,
+        schema=SCAN_REGISTERS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_CHARGE_SCHEDULE,
+        async_set_charge_schedule,
+        schema=SET_CHARGE_SCHEDULE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
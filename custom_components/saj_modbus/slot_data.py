@@ -0,0 +1,161 @@
+"""Coordinator data of an inverter in preallocated slots.
+
+SlotIndex gives every key of the register table a fixed position. SlotData
+keeps the values in one list of that size, allocated when the hub starts:
+the decoders write a block into its slots in place and every write tells
+whether a value changed, entities keep the slot of their key and read it by
+position. SlotData is a read-only mapping otherwise, so code that only needs
+``data.get(key)`` does not have to know about slots.
+
+SlotData also remembers when every block was read last and how many reads of
+it failed since, so that the values of a block that cannot be read any more
+are cleared instead of being kept as if they were current.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .modbus_register_map import RegisterMap
+
+# Value of a slot that was never written
+_MISSING = object()
+
+
+class SlotIndex:
+    """Fixed key to slot assignment, the same for every cycle."""
+
+    def __init__(self, keys: Iterable[str]) -> None:
+        self.keys: List[str] = list(dict.fromkeys(keys))
+        self._slots: Dict[str, int] = {key: slot for slot, key in enumerate(self.keys)}
+        # Slots of the keys each block decodes, see bind()
+        self._bound: Dict[str, Tuple[Sequence[str], Optional[Tuple[int, ...]]]] = {}
+
+    @classmethod
+    def for_register_map(cls, register_map: RegisterMap, extra_keys: Iterable[str] = ()) -> "SlotIndex":
+        """One slot per register and derived value of the table, then one per extra key."""
+        keys = [key for name in register_map.blocks for key in register_map.keys(name)]
+        return cls([*keys, *extra_keys])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._slots
+
+    def slot(self, key: str) -> int:
+        """The slot of a key; raises KeyError for keys without one."""
+        return self._slots[key]
+
+    def get(self, key: str) -> Optional[int]:
+        return self._slots.get(key)
+
+    def bind(self, name: str, keys: Sequence[str]) -> Optional[Tuple[int, ...]]:
+        """The slots of the keys a block decodes, None if one of them has no slot.
+
+        Cached per block name as long as the block hands in the same ``keys`` object.
+        """
+        bound = self._bound.get(name)
+        if bound is None or bound[0] is not keys:
+            slots = tuple(self._slots[key] for key in keys) if all(key in self._slots for key in keys) else None
+            bound = self._bound[name] = (keys, slots)
+        return bound[1]
+
+
+class SlotData(Mapping[str, Any]):
+    """The values of an inverter, one slot per key of ``index``.
+
+    Keys without a slot, e.g. from data stored by an older version, are kept
+    in a small dict next to the slots. ``read_at`` holds the time of the last
+    successful read of every block.
+    """
+
+    def __init__(self, index: SlotIndex, data: Optional[Mapping[str, Any]] = None) -> None:
+        self.index = index
+        self._values: List[Any] = [_MISSING] * len(index)
+        self._extra: Dict[str, Any] = {}
+        self.read_at: Dict[str, float] = {}
+        self._failed_reads: Dict[str, int] = {}
+        if data:
+            self.update(data)
+
+    def __getitem__(self, key: str) -> Any:
+        slot = self.index.get(key)
+        if slot is None:
+            return self._extra[key]
+        value = self._values[slot]
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.update({key: value})
+
+    def __iter__(self) -> Iterator[str]:
+        for key, value in zip(self.index.keys, self._values):
+            if value is not _MISSING:
+                yield key
+        yield from self._extra
+
+    def __len__(self) -> int:
+        return len(self._values) - self._values.count(_MISSING) + len(self._extra)
+
+    def value(self, slot: int, default: Any = None) -> Any:
+        """The value of a slot, ``default`` if it was never written."""
+        value = self._values[slot]
+        return default if value is _MISSING else value
+
+    def write(self, slots: Sequence[int], values: Sequence[Any]) -> bool:
+        """Writes the values into their slots; returns True if any of them changed."""
+        current = self._values
+        changed = False
+        for slot, value in zip(slots, values):
+            if current[slot] != value:
+                current[slot] = value
+                changed = True
+        return changed
+
+    def update(self, data: Mapping[str, Any]) -> bool:
+        """Writes the values by key; returns True if any of them changed."""
+        changed = False
+        for key, value in data.items():
+            slot = self.index.get(key)
+            if slot is None:
+                if self._extra.get(key, _MISSING) != value:
+                    self._extra[key] = value
+                    changed = True
+            elif self._values[slot] != value:
+                self._values[slot] = value
+                changed = True
+        return changed
+
+    def clear(self, slots: Sequence[int]) -> bool:
+        """Forgets the values of the slots; returns True if any of them had one."""
+        current = self._values
+        changed = False
+        for slot in slots:
+            if current[slot] is not _MISSING:
+                current[slot] = _MISSING
+                changed = True
+        return changed
+
+    def mark_read(self, name: str, now: float) -> None:
+        """Records that the block ``name`` was read successfully at ``now``."""
+        self.read_at[name] = now
+        self._failed_reads.pop(name, None)
+
+    def mark_failed(self, name: str, keys: Sequence[str], max_failed_reads: Optional[int]) -> bool:
+        """Records a failed read of the block ``name`` with the given ``keys``.
+
+        Once ``max_failed_reads`` reads in a row have failed the values of the
+        block are cleared, so that they show up as unknown rather than stale;
+        with None they are kept. Returns True if that changed any value.
+        """
+        failed = self._failed_reads[name] = self._failed_reads.get(name, 0) + 1
+        if max_failed_reads is None or failed < max_failed_reads:
+            return False
+        slots = self.index.bind(name, keys)
+        if slots is None:
+            return False
+        return self.clear(slots)
+
+    def failed_reads(self, name: str) -> int:
+        """The number of reads of the block ``name`` that failed since its last successful one."""
+        return self._failed_reads.get(name, 0)
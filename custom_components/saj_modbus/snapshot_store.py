@@ -0,0 +1,44 @@
+"""Last decoded data of a hub, kept in ``.storage`` so that entities have values right after a restart."""
+from typing import Any, Callable, Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+# At most one write per interval, the data of the latest cycle is written
+SAVE_DELAY = 300
+
+
+class SnapshotStore:
+    """Stores the coordinator data of one config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.snapshot.{entry_id}")
+        self._save_pending = False
+
+    async def async_load(self) -> Optional[Dict[str, Any]]:
+        """Returns the stored snapshot, None if there is none or it is unreadable."""
+        snapshot = await self._store.async_load()
+        if not isinstance(snapshot, dict) or not isinstance(snapshot.get("data"), dict):
+            return None
+        return snapshot
+
+    @callback
+    def async_schedule_save(self, snapshot_fn: Callable[[], Dict[str, Any]]) -> None:
+        """Saves the snapshot returned by ``snapshot_fn`` within SAVE_DELAY seconds, and on shutdown."""
+        if self._save_pending:
+            return
+        self._save_pending = True
+
+        @callback
+        def _data_to_save() -> Dict[str, Any]:
+            self._save_pending = False
+            return snapshot_fn()
+
+        self._store.async_delay_save(_data_to_save, SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Deletes the snapshot, e.g. when the config entry is removed."""
+        await self._store.async_remove()
@@ -5,6 +5,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from .const import DOMAIN
+from .modbus_data_readers import CHARGING_ENABLED
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,18 +24,19 @@ class SajChargingSwitch(CoordinatorEntity, SwitchEntity):
         self._attr_unique_id = f"{hub.name}_charging_control"
         self._attr_name = f"{hub.name} Charging Control"
         self._attr_entity_registry_enabled_default = True
+        self._slot = hub.slot(CHARGING_ENABLED)
 
     @property
     def is_on(self) -> bool:
         """Check if charging is enabled."""
-        return self._hub.data.get("charging_enabled", False)
+        return self._hub.values.value(self._slot, False)
 
     async def async_turn_on(self, **kwargs) -> None:
         """Enable charging."""
         if self.is_on: _LOGGER.debug("Charging already on"); return
         try:
+            # The hub's write queue flushes the change and updates the state
             await self._hub.set_charging(True)
-            await self._hub.async_request_refresh()
         except Exception as e:
             _LOGGER.error(f"Turn on failed: {e}")
             raise
@@ -43,8 +45,8 @@ class SajChargingSwitch(CoordinatorEntity, SwitchEntity):
         """Disable charging."""
         if not self.is_on: _LOGGER.debug("Charging already off"); return
         try:
+            # The hub's write queue flushes the change and updates the state
             await self._hub.set_charging(False)
-            await self._hub.async_request_refresh()
         except Exception as e:
             _LOGGER.error(f"Turn off failed: {e}")
             raise
@@ -54,7 +56,7 @@ class SajChargingSwitch(CoordinatorEntity, SwitchEntity):
         try:
             state = await self._hub.get_charging_state()
             _LOGGER.debug(f"Charging state: {state}")
-            self._hub.data["charging_enabled"] = state
+            self._hub.values.write((self._slot,), (state,))
             self.async_write_ha_state()
         except Exception as e:
             _LOGGER.error(f"Update failed: {e}")
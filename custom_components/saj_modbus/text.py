@@ -3,8 +3,10 @@ import datetime
 import re
 import logging
 
+from pymodbus.exceptions import ModbusException
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.components.text import TextEntity
 
@@ -19,20 +21,22 @@ async def async_setup_entry(
 ) -> None:
     """Set up the writable time entities for First Charge."""
     hub = hass.data[DOMAIN][entry.entry_id]["hub"]
+    device_info = hass.data[DOMAIN][entry.entry_id]["device_info"]
     entities = [
-        SajFirstChargeStartTimeTextEntity(hub),
-        SajFirstChargeEndTimeTextEntity(hub),
+        SajFirstChargeStartTimeTextEntity(hub, device_info),
+        SajFirstChargeEndTimeTextEntity(hub, device_info),
     ]
     async_add_entities(entities)
 
 class SajFirstChargeStartTimeTextEntity(TextEntity):
     """Schreibbare Uhrzeit-Entität für den First Charge Start Time (Format HH:MM)."""
 
-    def __init__(self, hub):
+    def __init__(self, hub, device_info):
         """Initialisiere die Entität."""
         self._hub = hub
         self._attr_name = "SAJ First Charge Start Time (Time)"
-        self._attr_unique_id = "saj_first_charge_start_time_time"
+        self._attr_unique_id = f"{hub.name}_first_charge_start_time_time"
+        self._attr_device_info = device_info
         self._attr_native_value = "00:00"
         # Regex, das HH:MM erzwingt: Stunden von 00 bis 23, Minuten von 00 bis 59
         self._attr_pattern = r"^(0[0-9]|1[0-9]|2[0-3]):([0-5][0-9])$"
@@ -56,18 +60,23 @@ class SajFirstChargeStartTimeTextEntity(TextEntity):
             )
             return
 
-        await self._hub.set_first_charge_start(value)
+        # Der Zustand wird erst übernommen, wenn der Wechselrichter den Wert angenommen hat
+        try:
+            await self._hub.set_first_charge_start(value)
+        except (ValueError, ModbusException) as e:
+            raise HomeAssistantError(f"First Charge Start Time {value} konnte nicht geschrieben werden: {e}") from e
         self._attr_native_value = value
         self.async_write_ha_state()
 
 class SajFirstChargeEndTimeTextEntity(TextEntity):
     """Schreibbare Uhrzeit-Entität für den First Charge End Time (Format HH:MM)."""
 
-    def __init__(self, hub):
+    def __init__(self, hub, device_info):
         """Initialisiere die Entität."""
         self._hub = hub
         self._attr_name = "SAJ First Charge End Time (Time)"
-        self._attr_unique_id = "saj_first_charge_end_time_time"
+        self._attr_unique_id = f"{hub.name}_first_charge_end_time_time"
+        self._attr_device_info = device_info
         self._attr_native_value = "00:00"
         self._attr_pattern = r"^(0[0-9]|1[0-9]|2[0-3]):([0-5][0-9])$"
         self._attr_mode = "text"
@@ -88,6 +97,10 @@ class SajFirstChargeEndTimeTextEntity(TextEntity):
             )
             return
 
-        await self._hub.set_first_charge_end(value)
+        # Der Zustand wird erst übernommen, wenn der Wechselrichter den Wert angenommen hat
+        try:
+            await self._hub.set_first_charge_end(value)
+        except (ValueError, ModbusException) as e:
+            raise HomeAssistantError(f"First Charge End Time {value} konnte nicht geschrieben werden: {e}") from e
         self._attr_native_value = value
         self.async_write_ha_state()
@@ -0,0 +1,53 @@
+"""Test setup: the Modbus core of the integration and the SAJ H1 simulator.
+
+The integration package is loaded like tools/benchmark_poll_cycle.py does it,
+without its __init__.py, so the tests of the Modbus core run without Home
+Assistant. Tests that need Home Assistant import it with pytest.importorskip.
+"""
+import contextlib
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "tools"))
+sys.path.insert(0, str(ROOT))
+
+from benchmark_poll_cycle import load_integration  # noqa: E402
+from saj_h1_simulator import SajH1Simulator, load_register_map  # noqa: E402
+
+load_integration()
+
+REGISTER_MAP = load_register_map()
+
+
+@pytest.fixture
+def simulator():
+    """Starts a simulator on a free port: ``async with simulator(**options) as sim``."""
+    @contextlib.asynccontextmanager
+    async def start(**options):
+        sim = SajH1Simulator("127.0.0.1", 0, register_map=REGISTER_MAP, seed=1, **options)
+        await sim.start()
+        try:
+            yield sim
+        finally:
+            await sim.stop()
+
+    return start
+
+
+@pytest.fixture
+def frozen_simulator():
+    """A simulator that is not started, with the same values on every read, for direct reads."""
+    sim = SajH1Simulator(register_map=REGISTER_MAP, seed=1)
+    read_registers = sim.read_registers
+
+    def frozen_read(address, count):
+        # Noon of the simulated day, with the same noise every time
+        sim._random.seed(1)
+        return read_registers(address, count)
+
+    sim._elapsed = lambda: 150.0
+    sim.read_registers = frozen_read
+    return sim
@@ -0,0 +1,105 @@
+"""Compiled block decoders against the register by register decoding they replaced."""
+import random
+import struct
+
+import pytest
+from pymodbus.client.mixin import ModbusClientMixin
+
+from saj_modbus.modbus_data_readers import REGISTER_BLOCKS
+from saj_modbus.modbus_decoder import BlockDecoder
+from saj_modbus.saj_h1_registers import SAJ_H1_REGISTER_MAP
+
+# Register types the decoding of the baseline understood
+BASELINE_TYPES = {
+    "16i": ModbusClientMixin.DATATYPE.INT16,
+    "16u": ModbusClientMixin.DATATYPE.UINT16,
+    "32u": ModbusClientMixin.DATATYPE.UINT32,
+}
+
+NUMERIC_BLOCKS = [
+    name for name, block in SAJ_H1_REGISTER_MAP.blocks.items()
+    if all(register.type in BASELINE_TYPES for register in block.registers)
+]
+
+
+def baseline_instructions(name):
+    """The decode instructions of a block as the baseline listed them, gaps as skip_bytes."""
+    block = SAJ_H1_REGISTER_MAP.blocks[name]
+    instructions = []
+    position = block.address
+    for register in sorted(block.registers, key=lambda r: r.address):
+        if register.address > position:
+            instructions.append((None, "skip_bytes", 2 * (register.address - position)))
+        instructions.append((register.key, register.type, register.scale))
+        position = register.end
+    return instructions
+
+
+def baseline_decode(instructions, regs, digits=2):
+    """The register by register decoding of the baseline, with the conversions of pymodbus."""
+    data = {}
+    index = 0
+    for key, method, factor in instructions:
+        if method == "skip_bytes":
+            index += factor // 2
+            continue
+        if method == "32u":
+            value = ModbusClientMixin.convert_from_registers(regs[index:index + 2], BASELINE_TYPES[method])
+            index += 2
+        else:
+            value = ModbusClientMixin.convert_from_registers([regs[index]], BASELINE_TYPES[method])
+            index += 1
+        data[key] = round(value * factor, digits) if factor != 1 else value
+    return data
+
+
+@pytest.mark.parametrize("name", NUMERIC_BLOCKS)
+def test_compiled_decoder_matches_baseline_on_simulated_registers(frozen_simulator, name):
+    block = SAJ_H1_REGISTER_MAP.blocks[name]
+    regs = frozen_simulator.read_registers(block.address, block.count)
+
+    assert regs is not None
+    assert SAJ_H1_REGISTER_MAP.compile(name).decode(regs) == baseline_decode(baseline_instructions(name), regs, block.digits)
+
+
+@pytest.mark.parametrize("name", NUMERIC_BLOCKS)
+def test_compiled_decoder_matches_baseline_on_random_registers(name):
+    block = SAJ_H1_REGISTER_MAP.blocks[name]
+    decoder = SAJ_H1_REGISTER_MAP.compile(name)
+    rng = random.Random(name)
+    for _ in range(200):
+        regs = [rng.randrange(0x10000) for _ in range(block.count)]
+        assert decoder.decode(regs) == baseline_decode(baseline_instructions(name), regs, block.digits)
+
+
+def test_decode_values_follow_keys(frozen_simulator):
+    block = REGISTER_BLOCKS["grid_phase_data"]
+    regs = frozen_simulator.read_registers(block.address, block.count)
+
+    assert dict(zip(block.keys, block.decode_values(regs))) == block.decode(regs)
+
+
+def test_strings_are_decoded_like_the_baseline(frozen_simulator):
+    block = SAJ_H1_REGISTER_MAP.blocks["inverter_data"]
+    regs = frozen_simulator.read_registers(block.address, block.count)
+    data = SAJ_H1_REGISTER_MAP.compile("inverter_data").decode(regs)
+
+    # The baseline joined the ten registers of a string and only stripped whitespace
+    raw = b"".join(struct.pack(">H", register) for register in regs[3:13])
+    assert data["sn"] == raw.decode("ascii", errors="replace").strip()
+    assert data["sn"].rstrip("\x00") == "H1S2602J2301E00001"
+    assert (data["devtype"], data["subtype"]) == (1, 2)
+
+
+def test_decoder_survives_a_round_trip_through_its_compiled_form():
+    decoder = SAJ_H1_REGISTER_MAP.compile("realtime_data")
+    regs = list(range(decoder.count))
+
+    assert BlockDecoder.from_dict(decoder.as_dict()).decode(regs) == decoder.decode(regs)
+
+
+def test_wrong_register_count_raises():
+    decoder = SAJ_H1_REGISTER_MAP.compile("battery_data")
+
+    with pytest.raises(struct.error):
+        decoder.decode([0] * (decoder.count - 1))
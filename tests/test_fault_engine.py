@@ -0,0 +1,58 @@
+"""Raise and clear edges of the fault tracker."""
+from saj_modbus.fault_engine import FAULT_KEYS, Fault, FaultTracker, decode_fault_word, fault_text, fault_words
+from saj_modbus.modbus_const import FAULT_MESSAGES
+from saj_modbus.modbus_data_readers import REALTIME_DATA_BLOCK
+
+
+def test_simulated_inverter_without_faults_has_no_edges(frozen_simulator):
+    regs = frozen_simulator.read_registers(REALTIME_DATA_BLOCK.address, REALTIME_DATA_BLOCK.count)
+    words = fault_words(REALTIME_DATA_BLOCK.decode(regs))
+    tracker = FaultTracker()
+
+    assert words == (0,) * len(FAULT_KEYS)
+    assert tracker.update(words, 1) == []
+    assert tracker.active == {}
+    assert tracker.revision == 0
+
+
+def test_raised_fault_is_reported_once():
+    tracker = FaultTracker()
+
+    edges = tracker.update((0b100, 0, 0), "t1")
+
+    fault = Fault(0, 2, FAULT_MESSAGES[0][0b100])
+    assert [(edge.fault, edge.raised, edge.since) for edge in edges] == [(fault, True, "t1")]
+    assert tracker.active == {fault: "t1"}
+    assert tracker.update((0b100, 0, 0), "t2") == []
+    assert tracker.revision == 1
+
+
+def test_cleared_fault_reports_when_it_was_raised():
+    tracker = FaultTracker()
+    tracker.update((0, 1, 0), "t1")
+
+    edges = tracker.update((0, 0, 0), "t2")
+
+    assert [(edge.fault.word, edge.fault.bit, edge.raised, edge.since) for edge in edges] == [(1, 0, False, "t1")]
+    assert tracker.active == {}
+
+
+def test_change_within_a_word_clears_and_raises():
+    tracker = FaultTracker()
+    tracker.update((0, 0, 0b0011), "t1")
+
+    edges = tracker.update((0, 0, 0b0110), "t2")
+
+    assert [(edge.fault.bit, edge.raised, edge.since) for edge in edges] == [(0, False, "t1"), (2, True, "t2")]
+    assert {fault.bit: since for fault, since in tracker.active.items()} == {1: "t1", 2: "t2"}
+
+
+def test_high_bit_of_a_32_bit_word():
+    (fault,) = decode_fault_word(2, 0x80000000)
+
+    assert (fault.bit, fault.mask, fault.message) == (31, 0x80000000, "Bus Voltage Balance Error")
+
+
+def test_fault_text_joins_the_messages():
+    assert fault_text((0b11, 0, 0)) == f"{FAULT_MESSAGES[0][1]}, {FAULT_MESSAGES[0][2]}"
+    assert fault_text((0, 0, 0)) == ""
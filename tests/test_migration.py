@@ -0,0 +1,79 @@
+"""Migration of version 1 config entries to the unique ids of version 2."""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.saj_modbus import LEGACY_UNIQUE_IDS, async_migrate_entry  # noqa: E402
+
+
+def migrate(entry, registry_unique_ids=()):
+    """Runs the migration; returns the mocked hass and the new unique id of every registry entry."""
+    hass = MagicMock()
+    renamed = {}
+
+    async def migrate_entries(hass, entry_id, migrate_unique_id):
+        for unique_id in registry_unique_ids:
+            update = migrate_unique_id(SimpleNamespace(unique_id=unique_id))
+            renamed[unique_id] = update["new_unique_id"] if update else unique_id
+
+    with patch("custom_components.saj_modbus.er.async_migrate_entries", migrate_entries):
+        result = asyncio.run(async_migrate_entry(hass, entry))
+    return result, hass, renamed
+
+
+def version_1_entry(**data):
+    return SimpleNamespace(
+        version=1, entry_id="entry", unique_id="192.168.1.20",
+        data={"name": "SAJ", "host": "192.168.1.20", "port": 502, **data},
+    )
+
+
+def test_version_1_entry_gets_host_port_and_unit_as_unique_id():
+    entry = version_1_entry(unit_id=3)
+
+    result, hass, _ = migrate(entry)
+
+    assert result is True
+    hass.config_entries.async_update_entry.assert_called_once_with(entry, unique_id="192.168.1.20:502:3", version=2)
+
+
+def test_entries_without_unit_id_use_the_default_unit():
+    entry = version_1_entry()
+
+    _, hass, _ = migrate(entry)
+
+    hass.config_entries.async_update_entry.assert_called_once_with(entry, unique_id="192.168.1.20:502:1", version=2)
+
+
+def test_shared_entity_unique_ids_are_prefixed_with_the_name():
+    legacy = list(LEGACY_UNIQUE_IDS)
+
+    _, _, renamed = migrate(version_1_entry(), legacy + ["SAJ_pv_power"])
+
+    assert renamed == {
+        **{unique_id: f"SAJ_{key}" for unique_id, key in LEGACY_UNIQUE_IDS.items()},
+        "SAJ_pv_power": "SAJ_pv_power",
+    }
+
+
+def test_version_2_entry_is_left_alone():
+    entry = version_1_entry()
+    entry.version = 2
+
+    result, hass, _ = migrate(entry)
+
+    assert result is True
+    hass.config_entries.async_update_entry.assert_not_called()
+
+
+def test_entry_of_a_newer_version_is_refused():
+    entry = version_1_entry()
+    entry.version = 3
+
+    result, _, _ = migrate(entry)
+
+    assert result is False
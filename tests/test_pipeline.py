@@ -0,0 +1,121 @@
+"""Transaction matching of pipelined reads, against the simulator and a misbehaving gateway."""
+import asyncio
+import struct
+
+import pytest
+from pymodbus.exceptions import ModbusIOException
+
+from saj_modbus.modbus_pipeline import MBAP_HEADER, ModbusPipeline, PipelineError
+from saj_h1_simulator import PIPELINE_CONCURRENT, PIPELINE_DROP, PIPELINE_SERIAL
+
+IDENTITY_READS = [(0x8F00 + offset, count) for offset, count in enumerate(range(8, 0, -1))]
+
+
+def test_answers_out_of_order_reach_their_own_request(simulator):
+    async def main():
+        # The jitter lets later requests overtake earlier ones
+        async with simulator(latency=0.01, jitter=0.05, pipeline=PIPELINE_CONCURRENT) as sim:
+            pipeline = ModbusPipeline("127.0.0.1", sim.port, timeout=2)
+            try:
+                assert await pipeline.probe(1)
+                reads = await pipeline.read_registers(IDENTITY_READS + [(0x3606, 3)], 1)
+            finally:
+                await pipeline.disconnect()
+
+            assert [read.error for read in reads] == [None] * len(reads)
+            for (address, count), read in zip(IDENTITY_READS + [(0x3606, 3)], reads):
+                assert read.registers == sim.read_registers(address, count)
+            assert pipeline.max_in_flight > 1
+
+    asyncio.run(main())
+
+
+def test_exception_answer_fails_only_its_own_read(simulator):
+    async def main():
+        async with simulator(pipeline=PIPELINE_SERIAL) as sim:
+            pipeline = ModbusPipeline("127.0.0.1", sim.port, timeout=2)
+            try:
+                reads = await pipeline.read_registers([(0x3606, 3), (0x0001, 1), (0x8F00, 2)], 1)
+            finally:
+                await pipeline.disconnect()
+
+            assert reads[0].registers == sim.read_registers(0x3606, 3)
+            assert isinstance(reads[1].error, ModbusIOException)
+            assert reads[2].registers == sim.read_registers(0x8F00, 2)
+            assert pipeline.usable
+
+    asyncio.run(main())
+
+
+def test_probe_fails_if_the_gateway_drops_outstanding_requests(simulator):
+    async def main():
+        async with simulator(latency=0.01, pipeline=PIPELINE_DROP) as sim:
+            pipeline = ModbusPipeline("127.0.0.1", sim.port, timeout=0.2)
+
+            assert not await pipeline.probe(1)
+            assert pipeline.supported is False
+            with pytest.raises(PipelineError):
+                await pipeline.read_registers([(0x3606, 3)], 1)
+
+    asyncio.run(main())
+
+
+async def start_gateway(answer):
+    """A gateway that answers every read of ``count`` registers with the frame ``answer`` builds."""
+    async def handle(reader, writer):
+        try:
+            while True:
+                transaction_id, _protocol, length, unit = MBAP_HEADER.unpack(await reader.readexactly(MBAP_HEADER.size))
+                _function, _address, count = struct.unpack(">BHH", await reader.readexactly(length - 1))
+                writer.write(answer(transaction_id, unit, count))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def frame(transaction_id, unit, count):
+    pdu = bytes([0x03, 2 * count]) + struct.pack(f">{count}H", *range(count))
+    return MBAP_HEADER.pack(transaction_id, 0, len(pdu) + 1, unit) + pdu
+
+
+@pytest.mark.parametrize("answer", [
+    pytest.param(lambda transaction_id, unit, count: frame(transaction_id + 100, unit, count), id="unknown transaction"),
+    pytest.param(lambda transaction_id, unit, count: frame(transaction_id, unit + 1, count), id="other unit"),
+    pytest.param(lambda transaction_id, unit, count: MBAP_HEADER.pack(transaction_id, 0, 1, unit), id="invalid length"),
+    pytest.param(lambda transaction_id, unit, count: frame(transaction_id, unit, count + 1), id="wrong count"),
+])
+def test_mismatched_answer_gives_up_the_pipeline_without_waiting(answer):
+    async def main():
+        server = await start_gateway(answer)
+        pipeline = ModbusPipeline("127.0.0.1", server.sockets[0].getsockname()[1], timeout=5)
+        try:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            with pytest.raises(PipelineError):
+                await pipeline.read_registers([(0x4004, 2), (0x4010, 1)], 1)
+            assert loop.time() - started < 1
+            assert pipeline.supported is False
+        finally:
+            await pipeline.disconnect()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_matching_answers_from_a_gateway():
+    async def main():
+        server = await start_gateway(frame)
+        pipeline = ModbusPipeline("127.0.0.1", server.sockets[0].getsockname()[1], timeout=5)
+        try:
+            reads = await pipeline.read_registers([(0x4004, 2), (0x4010, 3)], 1)
+        finally:
+            await pipeline.disconnect()
+            server.close()
+            await server.wait_closed()
+
+        assert [read.registers for read in reads] == [[0, 1], [0, 1, 2]]
+
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+"""Merging and splitting of register reads by the read planner."""
+import pytest
+
+from saj_modbus.modbus_data_readers import POLL_BLOCKS
+from saj_modbus.modbus_read_planner import MAX_READ_REGISTERS, RegisterSpan, plan_reads
+
+
+def test_adjacent_and_overlapping_spans_are_merged():
+    requests = plan_reads([RegisterSpan("b", 110, 10), RegisterSpan("a", 100, 10), RegisterSpan("c", 115, 10)])
+
+    assert [(request.address, request.count) for request in requests] == [(100, 25)]
+    assert [span.name for span in requests[0].spans] == ["a", "b", "c"]
+
+
+def test_gap_is_read_only_up_to_max_gap():
+    spans = [RegisterSpan("a", 100, 10), RegisterSpan("b", 115, 10)]
+
+    assert len(plan_reads(spans)) == 2
+    assert len(plan_reads(spans, max_gap=4)) == 2
+    assert [(request.address, request.count) for request in plan_reads(spans, max_gap=5)] == [(100, 25)]
+
+
+def test_merge_stops_at_the_register_limit():
+    spans = [RegisterSpan("a", 0, 100), RegisterSpan("b", 100, 25), RegisterSpan("c", 125, 1)]
+
+    requests = plan_reads(spans)
+
+    assert [(request.address, request.count) for request in requests] == [(0, MAX_READ_REGISTERS), (125, 1)]
+
+
+def test_gap_merge_does_not_exceed_the_register_limit():
+    spans = [RegisterSpan("a", 0, 100), RegisterSpan("b", 110, 16)]
+
+    assert [(request.address, request.count) for request in plan_reads(spans, max_gap=20)] == [(0, 100), (110, 16)]
+    assert [(request.address, request.count) for request in plan_reads(spans[:1] + [RegisterSpan("b", 110, 15)], max_gap=20)] == [(0, 125)]
+
+
+def test_span_above_the_register_limit_is_rejected():
+    with pytest.raises(ValueError):
+        plan_reads([RegisterSpan("a", 0, MAX_READ_REGISTERS + 1)])
+
+
+@pytest.mark.parametrize("max_gap", [0, 10, 100])
+def test_planned_reads_of_the_poll_blocks_match_single_reads(frozen_simulator, max_gap):
+    requests = plan_reads([block.span for block in POLL_BLOCKS], max_gap)
+
+    assert sorted(span.name for request in requests for span in request.spans) == sorted(block.name for block in POLL_BLOCKS)
+    for request in requests:
+        assert request.count <= MAX_READ_REGISTERS
+        registers = frozen_simulator.read_registers(request.address, request.count)
+        assert registers is not None, f"The simulator rejects the read of {request.count} at {request.address:#06x}"
+        for span in request.spans:
+            assert request.slice(registers, span) == frozen_simulator.read_registers(span.address, span.count)
@@ -0,0 +1,129 @@
+"""Merging of queued writes, flushed to the simulator like the hub does it."""
+import asyncio
+
+import pytest
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ModbusIOException
+
+from saj_modbus.modbus_write_queue import ModbusWriteQueue, PendingWrite, group_adjacent
+
+
+def test_partial_writes_are_merged_bit_by_bit():
+    pending = PendingWrite(0x1100, 0xFF00)
+    pending.merge(0x0007, 0x00FF)
+
+    assert pending.complete
+    assert pending.value == 0x1107
+
+
+def test_partial_write_keeps_the_other_byte():
+    assert PendingWrite(0x1100, 0xFF00).apply(0x7F0A) == 0x110A
+    assert PendingWrite(0x0019, 0x00FF).apply(0x7F0A) == 0x7F19
+
+
+def test_adjacent_registers_are_grouped():
+    writes = {address: PendingWrite(0) for address in (0x3608, 0x3606, 0x3647, 0x3607)}
+
+    assert [(address, len(run)) for address, run in group_adjacent(writes)] == [(0x3606, 3), (0x3647, 1)]
+
+
+class SimulatorWriter:
+    """Flush callback that writes to the simulator like the hub: one transaction per run of registers."""
+
+    def __init__(self, port):
+        self.client = AsyncModbusTcpClient("127.0.0.1", port=port)
+        self.flushes = []
+
+    async def __call__(self, writes):
+        self.flushes.append(sorted(writes))
+        for address, run in group_adjacent(writes):
+            values = []
+            for offset, pending in enumerate(run):
+                if pending.complete:
+                    values.append(pending.value)
+                else:
+                    current = await self.client.read_holding_registers(address + offset, count=1, slave=1)
+                    values.append(pending.apply(current.registers[0]))
+            if len(values) == 1:
+                response = await self.client.write_register(address, values[0], slave=1)
+            else:
+                response = await self.client.write_registers(address, values, slave=1)
+            if response.isError():
+                raise ModbusIOException(f"Failed to write {values} to register {address:#06x}")
+
+
+def run_with_queue(simulator, test):
+    async def main():
+        async with simulator() as sim:
+            writer = SimulatorWriter(sim.port)
+            await writer.client.connect()
+            try:
+                await test(sim, writer, ModbusWriteQueue(writer, debounce=0.01))
+            finally:
+                writer.client.close()
+
+    asyncio.run(main())
+
+
+def test_day_mask_and_power_percent_go_out_as_one_write_of_0x3608(simulator):
+    async def test(sim, writer, queue):
+        await asyncio.gather(
+            queue.async_write(0x3608, 0x15 << 8, 0xFF00),
+            queue.async_write(0x3608, 20, 0x00FF),
+        )
+
+        assert writer.flushes == [[0x3608]]
+        assert sim.holding[0x3608] == (0x15 << 8) | 20
+
+    run_with_queue(simulator, test)
+
+
+def test_day_mask_alone_keeps_the_power_percent_of_the_inverter(simulator):
+    async def test(sim, writer, queue):
+        await queue.async_write(0x3608, 0x03 << 8, 0xFF00)
+
+        assert sim.holding[0x3608] == 0x030A
+
+    run_with_queue(simulator, test)
+
+
+def test_schedule_is_written_in_one_transaction(simulator):
+    async def test(sim, writer, queue):
+        queue.set_register(0x3606, 0x0130)
+        queue.set_register(0x3607, 0x0500)
+        queue.set_register(0x3608, 0x0007, 0x00FF)
+        queue.set_register(0x3608, 0x7F00, 0xFF00)
+        requests = sim.stats.requests
+        await queue.async_flush(raise_errors=True)
+
+        assert sim.stats.requests - requests == 1
+        assert [sim.holding[address] for address in (0x3606, 0x3607, 0x3608)] == [0x0130, 0x0500, 0x7F07]
+        assert not queue.pending
+
+    run_with_queue(simulator, test)
+
+
+def test_rejected_write_is_raised_to_every_waiting_caller(simulator):
+    async def test(sim, writer, queue):
+        results = await asyncio.gather(
+            queue.async_write(0x0001, 5),
+            queue.async_write(0x3647, 1),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, ModbusIOException) for result in results)
+        # The next write is not affected by the failed one
+        await queue.async_write(0x3647, 1)
+        assert sim.holding[0x3647] == 1
+
+    run_with_queue(simulator, test)
+
+
+def test_flush_error_is_raised_on_request(simulator):
+    async def test(sim, writer, queue):
+        queue.set_register(0x0001, 5)
+
+        with pytest.raises(ModbusIOException):
+            await queue.async_flush(raise_errors=True)
+
+    run_with_queue(simulator, test)
@@ -0,0 +1,299 @@
+"""Benchmark of the integration's poll cycle against the offline SAJ H1 simulator.
+
+Runs the Home Assistant independent core of ``SAJModbusHub._async_update_data``
+(``modbus_poller.run_poll_cycle``) for a matrix of scan profiles, link
+latencies, connection modes, request pacing and pipelining, and reports per cycle:
+wall time, PDUs and bytes on the wire, time spent decoding and time spent
+sleeping. Run it before and after a performance change::
+
+    python tools/benchmark_poll_cycle.py
+    python tools/benchmark_poll_cycle.py --latencies 0.15 --pacing 0.2 --cycles 20 --json
+    python tools/benchmark_poll_cycle.py --latencies 0.05 --pacing auto --pipeline off,on
+
+Scan profiles:
+
+``full``
+    every block is read in every cycle
+``tiered``
+    the blocks are read at the rates of their tiers (10 s / 60 s / 600 s by
+    default), simulated with a virtual clock so the benchmark does not wait
+    for the intervals to pass
+"""
+import argparse
+import asyncio
+import importlib
+import importlib.util
+import json
+import logging
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, List, Sequence, Union
+
+from saj_h1_simulator import PIPELINE_CONCURRENT, PIPELINE_MODES, SajH1Simulator, load_register_map
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "saj_modbus"
+PACKAGE_NAME = "saj_modbus"
+
+PROFILES = ("full", "tiered")
+CONNECTION_MODES = ("persistent", "close_per_cycle")
+PIPELINE_SETTINGS = ("off", "on")
+
+
+def load_integration() -> ModuleType:
+    """Imports the Modbus core of the integration without its Home Assistant entry point."""
+    if PACKAGE_NAME not in sys.modules:
+        # An empty package keeps __init__.py (and with it Home Assistant) from being imported
+        spec = importlib.util.spec_from_file_location(
+            PACKAGE_NAME, PACKAGE_DIR / "__init__.py", submodule_search_locations=[str(PACKAGE_DIR)]
+        )
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[PACKAGE_NAME] = package
+    for module in (
+        "modbus_const", "modbus_stats", "modbus_pacing", "modbus_connection", "modbus_pipeline", "modbus_data_readers",
+        "model_profiles", "poll_scheduler", "modbus_poller",
+    ):
+        importlib.import_module(f"{PACKAGE_NAME}.{module}")
+    return sys.modules[PACKAGE_NAME]
+
+
+@dataclass
+class Scenario:
+    profile: str
+    latency: float
+    connection_mode: str
+    pacing: Union[float, str]  # seconds, or "auto" for the hub's adaptive pacing
+    inverters: int = 1
+    pipeline: bool = False
+
+
+@dataclass
+class ScenarioResult:
+    """Per-cycle figures of a scenario; with several inverters they are summed over all of them."""
+    scenario: Scenario
+    wall_times: List[float] = field(default_factory=list)
+    pdus: List[int] = field(default_factory=list)
+    bytes_on_wire: List[int] = field(default_factory=list)
+    decode_times: List[float] = field(default_factory=list)
+    sleep_times: List[float] = field(default_factory=list)
+    failed_requests: int = 0
+
+    def summary(self) -> Dict[str, float]:
+        wall_ms = sorted(t * 1000 for t in self.wall_times)
+        return {
+            "wall_ms_mean": statistics.fmean(wall_ms),
+            "wall_ms_p50": _percentile(wall_ms, 0.5),
+            "wall_ms_p95": _percentile(wall_ms, 0.95),
+            "pdus": statistics.fmean(self.pdus),
+            "bytes": statistics.fmean(self.bytes_on_wire),
+            "decode_ms": statistics.fmean(self.decode_times) * 1000,
+            "sleep_ms": statistics.fmean(self.sleep_times) * 1000,
+            "failed_requests": self.failed_requests,
+        }
+
+
+def _percentile(values: Sequence[float], fraction: float) -> float:
+    index = min(len(values) - 1, max(0, round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+class PollerUnderTest:
+    """One simulated inverter together with the state a hub keeps for it."""
+
+    def __init__(self, integration: ModuleType, simulator: SajH1Simulator, scenario: Scenario, args) -> None:
+        readers = integration.modbus_data_readers
+        scheduler_module = integration.poll_scheduler
+        self._integration = integration
+        self.simulator = simulator
+        self.scenario = scenario
+        self.args = args
+        self.arbiter = integration.modbus_arbiter.RequestArbiter(f"{simulator.host}:{simulator.port}")
+        if scenario.profile == "full":
+            intervals = scheduler_module.default_tier_intervals(args.fast, args.fast, args.fast)
+        else:
+            intervals = scheduler_module.default_tier_intervals(args.fast, args.normal, args.slow)
+        self.scheduler = scheduler_module.PollScheduler(readers.POLL_BLOCKS, intervals)
+        self.connection = integration.modbus_connection.ModbusConnection(
+            simulator.host, simulator.port, timeout=args.timeout
+        )
+        self.compiled_profile = None
+        self.pacing = integration.modbus_pacing.PacingController() if scenario.pacing == "auto" else None
+        self.pipeline = (
+            integration.modbus_pipeline.ModbusPipeline(simulator.host, simulator.port, timeout=args.timeout)
+            if scenario.pipeline else None
+        )
+
+    async def start(self) -> None:
+        # The identity block is read once by the hub and not part of a cycle
+        inverter_data = await self._integration.modbus_data_readers.read_modbus_inverter_data(
+            self.connection, self.arbiter
+        )
+        if self.args.model != "all":
+            profiles = self._integration.model_profiles
+            profile, _ = profiles.select_profile(inverter_data, model=self.args.model)
+            self.compiled_profile = profiles.compile_profile(profile, self.args.max_gap)
+            self.scheduler.set_blocks(self.compiled_profile.poll_blocks)
+
+    async def stop(self) -> None:
+        if self.pipeline is not None:
+            await self.pipeline.disconnect()
+        await self.connection.close()
+
+    async def cycle(self, now: float):
+        stats = self._integration.modbus_stats.CycleStats()
+        started = time.perf_counter()
+        await self._integration.modbus_poller.run_poll_cycle(
+            self.connection,
+            self.arbiter,
+            self.scheduler,
+            self.args.max_gap,
+            request_delay=self.scenario.pacing if self.pacing is None else 0,
+            settle_delay=self.scenario.pacing if self.pacing is None else 0,
+            stats=stats,
+            now=now,
+            planner=self.compiled_profile.plan if self.compiled_profile else None,
+            pacing=self.pacing,
+            pipeline=self.pipeline,
+        )
+
+        if self.scenario.connection_mode == "close_per_cycle":
+            await self.connection.disconnect()
+            if self.pipeline is not None:
+                await self.pipeline.disconnect()
+        stats.wall_time = time.perf_counter() - started
+        return stats
+
+
+async def run_scenario(integration: ModuleType, scenario: Scenario, args, register_map) -> ScenarioResult:
+    simulators = [
+        SajH1Simulator(
+            "127.0.0.1", 0, scenario.latency, args.jitter, 0.0, 4, register_map, seed=number, pipeline=args.gateway
+        )
+        for number in range(scenario.inverters)
+    ]
+    for simulator in simulators:
+        await simulator.start()
+    pollers = [PollerUnderTest(integration, simulator, scenario, args) for simulator in simulators]
+    result = ScenarioResult(scenario)
+
+    try:
+        await asyncio.gather(*(poller.start() for poller in pollers))
+        for number in range(args.cycles):
+            for simulator in simulators:
+                simulator.stats.reset()
+            now = number * args.fast
+            started = time.perf_counter()
+            cycle_stats = await asyncio.gather(*(poller.cycle(now) for poller in pollers))
+            result.wall_times.append(time.perf_counter() - started)
+            result.pdus.append(sum(simulator.stats.requests for simulator in simulators))
+            result.bytes_on_wire.append(
+                sum(simulator.stats.bytes_received + simulator.stats.bytes_sent for simulator in simulators)
+            )
+            result.decode_times.append(sum(stats.decode_time for stats in cycle_stats))
+            result.sleep_times.append(sum(stats.sleep_time for stats in cycle_stats))
+            result.failed_requests += sum(stats.failed_requests for stats in cycle_stats)
+    finally:
+        for poller in pollers:
+            await poller.stop()
+        for simulator in simulators:
+            await simulator.stop()
+    return result
+
+
+def _floats(text: str) -> List[float]:
+    return [float(value) for value in text.split(",") if value]
+
+
+def _pacings(text: str) -> List[Union[float, str]]:
+    return [value if value == "auto" else float(value) for value in text.split(",") if value]
+
+
+def _names(choices: Sequence[str]):
+    def parse(text: str) -> List[str]:
+        names = [value for value in text.split(",") if value]
+        unknown = set(names) - set(choices)
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown value(s) {', '.join(sorted(unknown))}, choose from {', '.join(choices)}")
+        return names
+    return parse
+
+
+def _pacing_label(pacing: Union[float, str]) -> str:
+    return pacing if isinstance(pacing, str) else f"{pacing:.2f}"
+
+
+def print_table(results: List[ScenarioResult]) -> None:
+    header = (
+        f"{'profile':<8} {'latency':>7} {'connection':<16} {'pacing':>6} {'pipe':>4} {'inv':>3} "
+        f"{'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'PDUs':>6} {'bytes':>7} {'decode ms':>9} {'sleep ms':>9} {'failed':>6}"
+    )
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        scenario, summary = result.scenario, result.summary()
+        print(
+            f"{scenario.profile:<8} {scenario.latency:>7.3f} {scenario.connection_mode:<16} {_pacing_label(scenario.pacing):>6} "
+            f"{'on' if scenario.pipeline else 'off':>4} {scenario.inverters:>3} {summary['wall_ms_mean']:>9.1f} {summary['wall_ms_p50']:>9.1f} "
+            f"{summary['wall_ms_p95']:>9.1f} {summary['pdus']:>6.1f} {summary['bytes']:>7.0f} "
+            f"{summary['decode_ms']:>9.3f} {summary['sleep_ms']:>9.1f} {summary['failed_requests']:>6}"
+        )
+
+
+async def main_async(args) -> List[ScenarioResult]:
+    integration = load_integration()
+    register_map = load_register_map()
+    results = []
+    for profile in args.profiles:
+        for latency in args.latencies:
+            for connection_mode in args.connection_modes:
+                for pacing in args.pacing:
+                    for pipeline in args.pipeline:
+                        scenario = Scenario(profile, latency, connection_mode, pacing, args.inverters, pipeline == "on")
+                        results.append(await run_scenario(integration, scenario, args, register_map))
+                        if not args.json:
+                            print(f"finished {scenario}", file=sys.stderr)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=5, help="Poll cycles per scenario")
+    parser.add_argument("--profiles", type=_names(PROFILES), default=list(PROFILES))
+    parser.add_argument("--latencies", type=_floats, default=[0.0, 0.05, 0.15, 0.4],
+                        help="Comma separated link latencies in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency in seconds")
+    parser.add_argument("--connection-modes", type=_names(CONNECTION_MODES), default=list(CONNECTION_MODES))
+    parser.add_argument("--pacing", type=_pacings, default=[0.2, 0.0, "auto"],
+                        help="Comma separated sleeps between requests in seconds, or auto for the adaptive pacing of the hub")
+    parser.add_argument("--pipeline", type=_names(PIPELINE_SETTINGS), default=["off"],
+                        help="Comma separated: off reads block by block, on sends the block reads of a cycle at once")
+    parser.add_argument("--gateway", choices=PIPELINE_MODES, default=PIPELINE_CONCURRENT,
+                        help="How the simulator handles pipelined requests")
+    parser.add_argument("--max-gap", type=int, default=0, help="Register gap the read planner may bridge")
+    parser.add_argument("--model", default="all",
+                        help="Register profile: all (every block), auto (selected like the hub does) or a profile name")
+    parser.add_argument("--inverters", type=int, default=1, help="Inverters polled in parallel")
+    parser.add_argument("--fast", type=float, default=10, help="Fast tier interval, also the cycle period")
+    parser.add_argument("--normal", type=float, default=60, help="Normal tier interval of the tiered profile")
+    parser.add_argument("--slow", type=float, default=600, help="Slow tier interval of the tiered profile")
+    parser.add_argument("--timeout", type=float, default=10, help="Modbus client timeout in seconds")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.CRITICAL)
+    results = asyncio.run(main_async(args))
+
+    if args.json:
+        print(json.dumps(
+            [{**asdict(result.scenario), **result.summary()} for result in results], indent=2
+        ))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""Offline Modbus TCP simulator of a SAJ H1 inverter.
+
+The register map is taken from ``direcciones_protocolo modbus SAJH1.xlsx.csv``
+in the repository root. Values change over time so that the integration sees
+plausible, moving data. Latency, dropped requests and the connection limit of
+real WiFi dongles can be configured.
+
+Run it with::
+
+    python tools/saj_h1_simulator.py --port 5020 --latency 0.15 --drop-rate 0.01
+
+``--pipeline`` selects what happens to a request that arrives while another
+one is still unanswered: ``serial`` answers them one after the other like
+most WiFi dongles, ``concurrent`` answers each after its own latency like a
+wired gateway, ``drop`` ignores it like dongles that cannot queue requests.
+
+Point the integration (or tools/benchmark_poll_cycle.py) at that port.
+"""
+import argparse
+import asyncio
+import csv
+import logging
+import math
+import random
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+_LOGGER = logging.getLogger("saj_h1_simulator")
+
+REGISTER_MAP_CSV = Path(__file__).resolve().parent.parent / "direcciones_protocolo modbus SAJH1.xlsx.csv"
+
+# Address ranges the simulated inverter answers. The CSV documents 0x4004-0x40FF,
+# the integration also reads the per-phase counters up to 0x4176.
+INPUT_RANGE = range(0x4004, 0x4180)
+IDENTITY_RANGE = range(0x8F00, 0x8F1D)
+HOLDING_REGISTERS = {0x3606: 0x0100, 0x3607: 0x0500, 0x3608: 0x7F0A, 0x3647: 0}
+
+MAX_READ_COUNT = 125
+MAX_WRITE_COUNT = 123
+
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+
+PIPELINE_SERIAL = "serial"
+PIPELINE_CONCURRENT = "concurrent"
+PIPELINE_DROP = "drop"
+PIPELINE_MODES = (PIPELINE_SERIAL, PIPELINE_CONCURRENT, PIPELINE_DROP)
+
+
+@dataclass(frozen=True)
+class RegisterDefinition:
+    """One register (or register pair) from the CSV register map."""
+    address: int
+    size: int
+    name: str
+    data_type: str
+    rate: int
+    unit: str
+
+
+@dataclass
+class SimulatorStats:
+    """Traffic counters, used by the benchmark to report PDUs and bytes on the wire."""
+    connections: int = 0
+    rejected_connections: int = 0
+    requests: int = 0
+    responses: int = 0
+    dropped: int = 0
+    exceptions: int = 0
+    bytes_received: int = 0
+    bytes_sent: int = 0
+
+    def reset(self) -> None:
+        for name in self.__dataclass_fields__:
+            setattr(self, name, 0)
+
+
+def load_register_map(path: Path = REGISTER_MAP_CSV) -> Dict[int, RegisterDefinition]:
+    """Parses the register map CSV, skipping separators and undefined rows."""
+    registers: Dict[int, RegisterDefinition] = {}
+    with open(path, newline="", encoding="utf-8") as handle:
+        for row in csv.reader(handle):
+            if len(row) < 7 or not row[0].strip().isdigit():
+                continue
+            name = row[3].strip()
+            data_type = row[4].strip().lower()
+            if not name or not data_type or "?" in row[2]:
+                continue
+            try:
+                size = int(row[2])
+                rate = int(row[5] or 0)
+            except ValueError:
+                continue
+            registers[int(row[0])] = RegisterDefinition(
+                int(row[0]), size, name, data_type, rate, row[6].strip().lower()
+            )
+    return registers
+
+
+class SajH1Simulator:
+    """Modbus TCP server answering like a SAJ H1 inverter behind a dongle."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 5020,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        drop_rate: float = 0.0,
+        max_connections: int = 4,
+        register_map: Optional[Dict[int, RegisterDefinition]] = None,
+        seed: Optional[int] = None,
+        pipeline: str = PIPELINE_SERIAL,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.max_connections = max_connections
+        self.pipeline = pipeline
+        self.register_map = register_map if register_map is not None else load_register_map()
+        self.holding: Dict[int, int] = dict(HOLDING_REGISTERS)
+        self.stats = SimulatorStats()
+        self._random = random.Random(seed)
+        self._started = time.monotonic()
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Port 0 picks a free port, report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        _LOGGER.info("SAJ H1 simulator listening on %s:%s", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            # Let the connection handlers see the EOF and finish
+            await asyncio.sleep(0.01)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if len(self._writers) >= self.max_connections:
+            # Dongles simply drop connections beyond their tiny connection table
+            self.stats.rejected_connections += 1
+            writer.close()
+            return
+
+        self.stats.connections += 1
+        self._writers.add(writer)
+        answers: Set[asyncio.Task] = set()
+        try:
+            while True:
+                header = await reader.readexactly(7)
+                transaction_id, protocol_id, length, unit_id = struct.unpack(">HHHB", header)
+                pdu = await reader.readexactly(length - 1)
+                self.stats.requests += 1
+                self.stats.bytes_received += len(header) + len(pdu)
+                if self.pipeline == PIPELINE_SERIAL:
+                    await self._answer(writer, transaction_id, protocol_id, unit_id, pdu)
+                elif self.pipeline == PIPELINE_DROP and answers:
+                    self.stats.dropped += 1
+                else:
+                    answer = asyncio.get_running_loop().create_task(
+                        self._answer(writer, transaction_id, protocol_id, unit_id, pdu)
+                    )
+                    answers.add(answer)
+                    answer.add_done_callback(answers.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for answer in answers:
+                answer.cancel()
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _answer(
+        self,
+        writer: asyncio.StreamWriter,
+        transaction_id: int,
+        protocol_id: int,
+        unit_id: int,
+        pdu: bytes,
+    ) -> None:
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.drop_rate and self._random.random() < self.drop_rate:
+            self.stats.dropped += 1
+            return
+
+        response = self.handle_pdu(pdu)
+        frame = struct.pack(">HHHB", transaction_id, protocol_id, len(response) + 1, unit_id) + response
+        self.stats.responses += 1
+        self.stats.bytes_sent += len(frame)
+        writer.write(frame)
+        await writer.drain()
+
+    def handle_pdu(self, pdu: bytes) -> bytes:
+        """Executes one request PDU and returns the response PDU."""
+        function_code = pdu[0]
+        try:
+            if function_code in (0x03, 0x04):
+                address, count = struct.unpack(">HH", pdu[1:5])
+                if not 1 <= count <= MAX_READ_COUNT:
+                    return self._exception(function_code, ILLEGAL_DATA_VALUE)
+                values = self.read_registers(address, count)
+                if values is None:
+                    return self._exception(function_code, ILLEGAL_DATA_ADDRESS)
+                return struct.pack(f">BB{count}H", function_code, count * 2, *values)
+
+            if function_code == 0x06:
+                address, value = struct.unpack(">HH", pdu[1:5])
+                if address not in self.holding:
+                    return self._exception(function_code, ILLEGAL_DATA_ADDRESS)
+                self.holding[address] = value
+                return pdu[:5]
+
+            if function_code == 0x10:
+                address, count, byte_count = struct.unpack(">HHB", pdu[1:6])
+                if not 1 <= count <= MAX_WRITE_COUNT or byte_count != count * 2:
+                    return self._exception(function_code, ILLEGAL_DATA_VALUE)
+                if any(address + offset not in self.holding for offset in range(count)):
+                    return self._exception(function_code, ILLEGAL_DATA_ADDRESS)
+                for offset, value in enumerate(struct.unpack(f">{count}H", pdu[6:6 + byte_count])):
+                    self.holding[address + offset] = value
+                return struct.pack(">BHH", function_code, address, count)
+        except struct.error:
+            return self._exception(function_code, ILLEGAL_DATA_VALUE)
+
+        return self._exception(function_code, ILLEGAL_FUNCTION)
+
+    def _exception(self, function_code: int, code: int) -> bytes:
+        self.stats.exceptions += 1
+        return bytes([function_code | 0x80, code])
+
+    def read_registers(self, address: int, count: int) -> Optional[List[int]]:
+        """Returns the current register values, or None if part of the range is not mapped."""
+        addresses = range(address, address + count)
+        if all(a in self.holding for a in addresses):
+            return [self.holding[a] for a in addresses]
+        if all(a in IDENTITY_RANGE for a in addresses):
+            identity = self._identity_registers()
+            return [identity[a - IDENTITY_RANGE.start] for a in addresses]
+        if all(a in INPUT_RANGE for a in addresses):
+            values = self._input_registers(self._elapsed())
+            return [values.get(a, 0) for a in addresses]
+        return None
+
+    def _elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def _identity_registers(self) -> List[int]:
+        def ascii_registers(text: str) -> List[int]:
+            raw = text.encode("ascii").ljust(20, b"\x00")[:20]
+            return list(struct.unpack(">10H", raw))
+
+        return [
+            1, 0x0002, 1100,  # devtype, subtype, communication protocol version
+            *ascii_registers("H1S2602J2301E00001"),
+            *ascii_registers("PC01H1S2"),
+            1012, 1015, 1003, 1001, 1002, 1001,  # software and hardware versions
+        ]
+
+    def _input_registers(self, elapsed: float) -> Dict[int, int]:
+        """Generates the realtime block from the register map for the given time."""
+        # One simulated "day" every ten minutes keeps the values visibly moving
+        sun = max(0.0, math.sin(2 * math.pi * elapsed / 600))
+        noise = self._random.uniform
+        values: Dict[int, int] = {0x4004: 2 if sun > 0 else 1}  # running / waiting
+
+        for definition in self.register_map.values():
+            if definition.address not in INPUT_RANGE or definition.address == 0x4004:
+                continue
+            physical = self._physical_value(definition, sun, elapsed, noise)
+            raw = int(round(physical / (10 ** definition.rate)))
+            if definition.size == 2:
+                raw &= 0xFFFFFFFF
+                values[definition.address] = raw >> 16
+                values[definition.address + 1] = raw & 0xFFFF
+            else:
+                values[definition.address] = raw & 0xFFFF
+        return values
+
+    @staticmethod
+    def _physical_value(definition: RegisterDefinition, sun: float, elapsed: float, noise) -> float:
+        name = definition.name.lower()
+        unit = definition.unit
+        if "fault" in name:
+            return 0
+        if "direction" in name:
+            return 1 if sun > 0.05 else 0
+        if definition.size == 2:
+            # Energy counters only ever grow; longer periods hold more energy
+            base = {"today": 5, "month": 150, "year": 1800, "total": 9500}.get(name.split()[0], 100)
+            return base + elapsed * 0.0005
+        if unit == "w" or unit == "va":
+            return 3000 * sun + noise(-40, 40)
+        if unit == "v":
+            if name.startswith("pv"):
+                return 360 * sun + noise(-2, 2)
+            if name.startswith("bat") or name.startswith("bus"):
+                return 52.5 + noise(-0.3, 0.3)
+            return 230 + noise(-2, 2)
+        if unit == "a":
+            return 12 * sun + noise(-0.1, 0.1)
+        if unit == "hz":
+            return 50 + noise(-0.03, 0.03)
+        if unit == "℃":
+            return 30 + 10 * sun + noise(-0.2, 0.2)
+        if unit == "%":
+            return 60 + 30 * math.sin(2 * math.pi * elapsed / 1200)
+        if unit == "ma":
+            return 6 + noise(-1, 1)
+        if unit == "mv":
+            return noise(-5, 5)
+        if unit == "kω":
+            return 2000
+        if unit == "s":
+            return 0
+        return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency in seconds")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of requests left unanswered")
+    parser.add_argument("--max-connections", type=int, default=4)
+    parser.add_argument("--pipeline", choices=PIPELINE_MODES, default=PIPELINE_SERIAL,
+                        help="Handling of requests sent before the previous one was answered")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    simulator = SajH1Simulator(
+        args.host, args.port, args.latency, args.jitter, args.drop_rate, args.max_connections,
+        pipeline=args.pipeline
+    )
+    try:
+        asyncio.run(simulator.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()